@@ -0,0 +1,70 @@
+"""
+内存映射K线存储基准: BarStore.open (零拷贝视图) vs BarStore.load (整表读入)
+
+生成 10 年的分钟K线 (每天 390 根) 写入临时 BarStore，比较打开耗时、常驻内存增量，
+以及按日期二分切片后只访问一个月数据时的内存增量。
+运行: python benchmarks/bench_bar_store_mmap.py [年数]
+"""
+import sys
+import os
+import time
+import subprocess
+import tempfile
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from src.core.bar_store import BarStore
+
+SYMBOL, PERIOD, ADJUST = "BENCH.US", "1m", "forward"
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def generate(root: str, years: int):
+    days = pd.bdate_range("2010-01-04", periods=252 * years)
+    minutes = pd.timedelta_range("09:30:00", periods=390, freq="min")
+    timestamps = (days.values[:, None] + minutes.values[None, :]).ravel()
+    n = len(timestamps)
+    close = 100 * np.cumprod(1 + np.random.default_rng(5).normal(0, 0.0005, n))
+    BarStore(root).save(SYMBOL, PERIOD, ADJUST, pd.DataFrame({
+        "timestamp": timestamps, "open": close, "high": close, "low": close, "close": close,
+        "volume": np.full(n, 100, dtype=np.int64),
+    }))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--generate":
+        generate(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as root:
+        # 在子进程中生成，避免生成数据的内存计入本进程
+        subprocess.run([sys.executable, __file__, "--generate", root, str(years)], check=True, cwd=os.getcwd())
+        store = BarStore(root)
+        print(f"{store.meta(SYMBOL, PERIOD, ADJUST)['rows']:,} 1m bars ({years} years)")
+
+        base = rss_mb()
+        start = time.perf_counter()
+        view = store.open(SYMBOL, PERIOD, ADJUST)
+        open_ms = (time.perf_counter() - start) * 1e3
+        print(f"open (mmap)     : {open_ms:8.2f} ms  RSS +{rss_mb() - base:7.1f} MB")
+
+        start = time.perf_counter()
+        month = view.between("2015-06-01", "2015-06-30 23:59")
+        slice_ms = (time.perf_counter() - start) * 1e3
+        mean = float(np.mean(month['close']))
+        print(f"slice 1 month   : {slice_ms:8.2f} ms  RSS +{rss_mb() - base:7.1f} MB  ({len(month):,} bars, mean {mean:.2f})")
+        del view, month
+
+        base = rss_mb()
+        start = time.perf_counter()
+        df = store.load(SYMBOL, PERIOD, ADJUST)
+        load_ms = (time.perf_counter() - start) * 1e3
+        print(f"load (in-memory): {load_ms:8.2f} ms  RSS +{rss_mb() - base:7.1f} MB")
@@ -0,0 +1,49 @@
+"""
+并行批量回测基准: 不同进程数下的任务吞吐量与加速比
+
+运行: python benchmarks/bench_batch_backtest.py [标的数] [每个标的的K线数]
+"""
+import sys
+import os
+import time
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from src.backtest.batch import BatchBacktester
+
+def make_data(symbols: int, n: int) -> dict:
+    rng = np.random.default_rng(7)
+    index = pd.date_range("1990-01-01", periods=n, freq="B")
+    return {
+        f"SYM{i}.US": pd.DataFrame({
+            "timestamp": index,
+            "close": 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, n)),
+        })
+        for i in range(symbols)
+    }
+
+if __name__ == "__main__":
+    symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    bars = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    data = make_data(symbols, bars)
+    configs = [{'short_ma_period': s, 'long_ma_period': l} for s in (5, 10, 20) for l in (50, 100, 200)]
+    jobs = symbols * len(configs)
+
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+    print(f"jobs: {jobs} ({symbols} symbols x {len(configs)} parameter sets, {bars:,} bars each), cpus: {cpus}")
+
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = BatchBacktester(max_workers=workers).run(data, configs)
+        elapsed = time.perf_counter() - start
+        assert len(result) == jobs
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"workers={workers:2d}  {elapsed:7.2f} s  {jobs / elapsed:8.1f} jobs/s  "
+              f"speedup {speedup:5.2f}x  efficiency {speedup / workers:6.1%}")
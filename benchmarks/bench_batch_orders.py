@@ -0,0 +1,91 @@
+"""
+批量下单 / 撤单基准: Trader.submit_orders / cancel_orders vs 逐笔调用 (模拟券商 + 注入延迟)
+
+1. 无故障: 比较 N 笔逐笔下单与批量下单的耗时
+2. 注入网络故障 (请求丢失 / 回包丢失): 校验每笔订单恰好被受理一次 (无重复下单、无遗漏)
+3. 批量撤销全部挂单
+
+运行: python benchmarks/bench_batch_orders.py [订单数] [--latency 50] [--error-rate 0.1] [--workers 8]
+"""
+import sys
+import os
+import time
+import logging
+import argparse
+from collections import Counter
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+from src.core.context_pool import ContextPool
+from src.core.trader import Trader, OrderRequest
+
+def setup(latency_ms: float, error_rate: float, workers: int):
+    config = {
+        "symbol": "SYM0.US",
+        "trading": {"batch": {"max_workers": workers, "retries": 4, "backoff_seconds": 0.02}},
+        "account": {"cache_ttl_seconds": 0},
+        "broker": {"mode": "sim", "sim": {"initial_cash": 1e9, "latency_ms": latency_ms, "error_rate": error_rate}},
+    }
+    broker = ContextPool.configure(config).acquire('trade').broker
+    return Trader(config), broker
+
+def limit_requests(broker, n: int):
+    # 低于现价 10% 的限价买单，挂单不成交，便于之后批量撤单
+    requests = []
+    for i in range(n):
+        symbol = f"SYM{i}.US"
+        broker.market.load(symbol)
+        requests.append(OrderRequest(symbol, "Buy", 10, round(broker.market.price(symbol) * 0.9, 2), "Limit"))
+    return requests
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("orders", nargs="?", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    ok = True
+
+    # 1. 逐笔 vs 批量
+    trader, broker = setup(args.latency, 0.0, args.workers)
+    requests = limit_requests(broker, args.orders)
+    start = time.perf_counter()
+    for r in requests:
+        trader.submit_order(r.symbol, r.side, r.quantity, r.price, r.order_type)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = trader.submit_orders(requests)
+    batch = time.perf_counter() - start
+    ok &= all(r.ok for r in results)
+    print(f"submit {args.orders} orders @ {args.latency:.0f} ms: serial {serial:.2f}s, "
+          f"batch {batch:.2f}s ({batch / (args.latency / 1000):.1f} round trips)")
+
+    # 2. 故障注入下无重复 / 无遗漏
+    trader, broker = setup(args.latency, args.error_rate, args.workers)
+    requests = limit_requests(broker, args.orders)
+    start = time.perf_counter()
+    results = trader.submit_orders(requests)
+    elapsed = time.perf_counter() - start
+    accepted = Counter(o.symbol for o in broker.orders.values())
+    duplicates = sum(c > 1 for c in accepted.values())
+    failed = [r for r in results if not r.ok]
+    retried = sum(r.attempts > 1 for r in results)
+    ok &= duplicates == 0 and all(accepted[r.target.symbol] == 1 for r in results if r.ok)
+    print(f"error rate {args.error_rate:.0%}: {len(results) - len(failed)}/{len(results)} ok in {elapsed:.2f}s, "
+          f"{retried} retried, {duplicates} duplicates, {len(failed)} failed "
+          f"({', '.join(r.error for r in failed[:2])})")
+
+    # 3. 批量撤单
+    broker.error_rate = 0.0
+    open_ids = [o.order_id for o in broker.orders.values()]
+    start = time.perf_counter()
+    results = trader.cancel_orders(open_ids)
+    elapsed = time.perf_counter() - start
+    ok &= all(r.ok for r in results)
+    print(f"cancel {len(open_ids)} orders: {sum(r.ok for r in results)} ok in {elapsed:.2f}s")
+
+    sys.exit(0 if ok else 1)
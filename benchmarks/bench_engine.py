@@ -0,0 +1,130 @@
+"""
+常驻引擎基准: TradingEngine (常驻预热模块 + 增量均线) vs 每次重建模块的 run_job
+
+1. 冷启动: 每个交易日调用 run_job (重建获取器 / 策略 / Trader / 订单日志后计算信号并下单)
+2. 常驻: 同一 TradingEngine 预热一次后每个交易日调用 run_once
+   两者在相同的模拟行情 (注入 API 延迟) 上运行，成交次数必须一致，增量信号与 check_signal 一致
+3. 调度: AsyncIOScheduler 以秒级间隔并发运行 signal / risk / heartbeat 与一个故意超时的任务，
+   统计每个任务的耗时、延迟与 missed 次数
+
+运行: python benchmarks/bench_engine.py [交易日数] [--latency 20]
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import logging
+import tempfile
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from longport.openapi import OrderStatus
+from src.core.context_pool import ContextPool
+from src.core.engine import TradingEngine
+from src.core.strategy import Strategy
+from src.cli import run_cmd
+
+SYMBOL = "SIM.US"
+
+def make_config(tmp: str, latency_ms: float, days: int) -> dict:
+    start = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)[0]
+    return {
+        "symbol": SYMBOL,
+        "strategy": {"short_ma_period": 5, "long_ma_period": 20},
+        "trading": {"order_type": "Market", "position_ratio": 1.0},
+        "data": {"cache_enabled": True, "refresh_seconds": 0},
+        "orders": {"journal_path": os.path.join(tmp, "journal.jsonl")},
+        "notification": {"enabled": False},
+        "account": {"cache_ttl_seconds": 30, "background_refresh": False},
+        "broker": {"mode": "sim", "sim": {"bars": 600, "seed": 3, "start": str(start.date()),
+                                          "latency_ms": latency_ms, "cache_dir": os.path.join(tmp, "bars")}},
+    }
+
+def replay(days: int, latency_ms: float, warm: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, latency_ms, days)
+        sim = ContextPool.configure(config).acquire('trade').broker
+        ctx = SimpleNamespace(obj={"CONFIG": config})
+        engine, startup, mismatches = None, None, 0
+        if warm:
+            start = time.perf_counter()
+            engine = TradingEngine(config, 'live')
+            engine.warm()
+            startup = time.perf_counter() - start
+
+        durations = []
+        for _ in range(days):
+            sim.advance(3)
+            time.sleep(0.005)   # 等推送线程送达收盘行情 (实盘中 16:05 时早已到达)
+            start = time.perf_counter()
+            if warm:
+                engine.run_once()
+            else:
+                run_cmd.run_job(ctx, 'live')
+            durations.append(time.perf_counter() - start)
+            if warm:
+                bars = engine.fetcher.get_historical_klines(SYMBOL, period='day', count=40, refresh=True)
+                expected = Strategy(5, 20).check_signal(bars)
+                mismatches += expected.signal_type != engine.last_signals[SYMBOL].signal_type
+            sim.advance(1)
+        if engine is not None:
+            engine.close()
+        fills = sum(1 for o in sim.orders.values() if o.status == OrderStatus.Filled)
+        return {"durations": np.array(durations), "fills": fills, "startup": startup, "mismatches": mismatches,
+                "decisions": engine.decisions if engine else None}
+
+class IntervalEngine(TradingEngine):
+    """把每日任务换成秒级间隔，并加一个耗时超过间隔的任务以验证 missed 统计"""
+    def triggers(self):
+        from apscheduler.triggers.interval import IntervalTrigger
+        return {"signal": IntervalTrigger(seconds=0.2), "risk": IntervalTrigger(seconds=0.05),
+                "heartbeat": IntervalTrigger(seconds=0.1), "slow": IntervalTrigger(seconds=0.1)}
+
+    def jobs(self):
+        async def slow():
+            await asyncio.sleep(0.25)
+        return {**super().jobs(), "slow": slow}
+
+async def scheduled(config: dict, seconds: float):
+    engine = IntervalEngine(config, 'paper')
+    await engine.start()
+    await asyncio.sleep(seconds)
+    engine.shutdown()
+    return engine.job_summary()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("days", nargs="?", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=20.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    ok = True
+
+    cold = replay(args.days, args.latency, warm=False)
+    warm = replay(args.days, args.latency, warm=True)
+    for label, r in (("run_job (cold)", cold), ("engine (warm)", warm)):
+        d = r["durations"] * 1000
+        print(f"{label:15s}: first decision {d[0]:7.1f} ms, mean {d.mean():6.1f} ms, p50 {np.median(d):6.1f} ms, "
+              f"p99 {np.percentile(d, 99):6.1f} ms, fills {r['fills']}")
+    print(f"engine startup (init + warm): {warm['startup'] * 1000:.1f} ms @ {args.latency:.0f} ms API latency, "
+          f"decisions {warm['decisions']}, signal mismatches vs check_signal: {warm['mismatches']}")
+    ok &= cold["fills"] == warm["fills"] and warm["mismatches"] == 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, 5.0, 60)
+        config["paper"] = {"ledger_path": os.path.join(tmp, "paper.jsonl")}
+        config["risk"] = {"stop_loss_pct": 50}
+        config["engine"] = {"deadlines": {"slow": 0.2}}
+        ContextPool.configure(config)
+        rows = asyncio.run(scheduled(config, 2.0))
+        print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+        by_job = {r['job']: r for r in rows}
+        ok &= by_job['signal']['runs'] > 0 and by_job['heartbeat']['runs'] > 0 and by_job['slow']['missed'] > 0
+        ok &= all(r['failures'] == 0 for r in rows)
+
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,94 @@
+"""
+增量信号引擎校验与基准: IncrementalStrategy.update vs Strategy.calculate_indicators / check_signal
+
+在随机价格序列 (含停牌平盘段) 上逐根比对均线与信号，并比较单根 K 线的信号耗时。
+运行: python benchmarks/bench_incremental_signal.py [序列数]
+"""
+import sys
+import os
+import time
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from src.core.strategy import Strategy, IncrementalStrategy
+
+def make_series(seed: int, n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    # 插入若干平盘段，覆盖均线相等的边界情况
+    for _ in range(3):
+        start = rng.integers(0, n - 40)
+        closes[start:start + rng.integers(5, 40)] = closes[start]
+    closes = np.round(closes, 2)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2010-01-01", periods=n, freq="D"),
+        "close": closes,
+    })
+
+def expected_signals(strategy: Strategy, df: pd.DataFrame) -> tuple:
+    """由 calculate_indicators 的整列结果推出每根 K 线上 check_signal 的信号类型"""
+    ind = strategy.calculate_indicators(df)
+    s = ind[f'MA{strategy.short_window}'].to_numpy()
+    l = ind[f'MA{strategy.long_window}'].to_numpy()
+    s_prev, l_prev = np.roll(s, 1), np.roll(l, 1)
+    buy = (s_prev < l_prev) & (s >= l)
+    sell = (s_prev > l_prev) & (s <= l)
+    out = np.where(buy, 'BUY', np.where(sell, 'SELL', 'HOLD'))
+    out[:strategy.long_window] = 'HOLD'
+    return out, s, l
+
+def verify(corpus: int, n: int = 2000) -> int:
+    mismatches = 0
+    rng = np.random.default_rng(0)
+    for seed in range(corpus):
+        short_w = int(rng.integers(2, 30))
+        long_w = int(rng.integers(short_w + 1, 120))
+        df = make_series(seed, n)
+        ref = Strategy(short_w, long_w)
+        exp, s, l = expected_signals(ref, df)
+
+        inc = IncrementalStrategy(short_w, long_w)
+        for i, (ts, close) in enumerate(zip(df['timestamp'], df['close'])):
+            sig = inc.update(close, ts)
+            if sig.signal_type != exp[i]:
+                mismatches += 1
+                print(f"seed={seed} MA{short_w}/{long_w} bar {i}: {sig.signal_type} != {exp[i]}")
+            if i >= long_w and not (np.isclose(sig.short_ma, s[i], rtol=1e-12) and np.isclose(sig.long_ma, l[i], rtol=1e-12)):
+                mismatches += 1
+                print(f"seed={seed} MA{short_w}/{long_w} bar {i}: MA mismatch")
+
+        # seed() 预热后的信号与 check_signal 一致
+        seeded = IncrementalStrategy(short_w, long_w).seed(df)
+        checked = ref.check_signal(df)
+        if seeded.signal_type != checked.signal_type or not np.isclose(seeded.long_ma, checked.long_ma, rtol=1e-12):
+            mismatches += 1
+            print(f"seed={seed}: seed() {seeded.signal_type} != check_signal {checked.signal_type}")
+    return mismatches
+
+if __name__ == "__main__":
+    corpus = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    mismatches = verify(corpus)
+    print(f"equivalence: {corpus} random series, {mismatches} mismatches")
+
+    df = make_series(1, 5000)
+    ref = Strategy(5, 20)
+    window = df.iloc[-60:]
+    loops = 200
+    start = time.perf_counter()
+    for _ in range(loops):
+        ref.check_signal(window)
+    pandas_t = (time.perf_counter() - start) / loops
+
+    inc = IncrementalStrategy(5, 20)
+    start = time.perf_counter()
+    for ts, close in zip(df['timestamp'], df['close']):
+        inc.update(close, ts)
+    inc_t = (time.perf_counter() - start) / len(df)
+
+    print(f"check_signal (pandas, 60 bars): {pandas_t * 1e6:10.1f} us/bar")
+    print(f"IncrementalStrategy.update     : {inc_t * 1e6:10.1f} us/bar")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,144 @@
+"""
+多策略基准: 一个 TradingEngine 同时运行数百个策略实例 (config.strategies)
+
+1. paper: N 个标的 × 多组均线共 M 个实例，逐日 run_once，统计每轮耗时与券商 API 调用次数
+   (推送行情 / 关闭推送改为一次批量报价)，并与逐实例 Strategy.check_signal 的结果逐一比对
+2. live: 多个实例共用一个模拟券商账户，校验每个实例按订单日志计算的持仓成本不超过其资金上限，
+   且订单日志压缩并重新加载后各实例的持仓 (StrategyPositions 快照 + 日志中的新订单) 不变
+
+运行: python benchmarks/bench_multi_strategy.py [标的数] [--days 60] [--latency 5]
+"""
+import sys
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from longport.openapi import OrderStatus
+from src.core.context_pool import ContextPool
+from src.core.engine import TradingEngine
+from src.core.order_manager import OrderManager
+from src.core.strategy import Strategy
+
+WINDOWS = [(3, 10), (5, 20), (5, 30), (10, 30), (10, 50), (20, 60)]
+
+def make_config(tmp: str, symbols, latency_ms: float, days: int, capital: float = None) -> dict:
+    start = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)[0]
+    strategies = [{"symbols": symbols, "short_ma_period": s, "long_ma_period": l, "capital": capital}
+                  for s, l in WINDOWS]
+    return {
+        "symbol": symbols[0],
+        "strategies": strategies,
+        "trading": {"order_type": "Market", "position_ratio": 1.0},
+        "data": {"cache_enabled": True, "refresh_seconds": 0, "history": {"max_workers": 8}},
+        "orders": {"journal_path": os.path.join(tmp, "journal.jsonl")},
+        "paper": {"ledger_path": os.path.join(tmp, "paper.jsonl"), "initial_cash": 10000},
+        "notification": {"enabled": False},
+        "broker": {"mode": "sim", "sim": {"bars": 400, "seed": 5, "start": str(start.date()), "symbols": symbols,
+                                          "latency_ms": latency_ms, "cache_dir": os.path.join(tmp, "bars")}},
+    }
+
+def paper_run(symbols, days: int, latency_ms: float, push: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, symbols, latency_ms, days)
+        config["engine"] = {"quote_push": push}
+        sim = ContextPool.configure(config).acquire('trade').broker
+        engine = TradingEngine(config, 'paper')
+        start = time.perf_counter()
+        engine.warm()
+        startup = time.perf_counter() - start
+
+        durations, calls, mismatches, actionable = [], [], 0, 0
+        for _ in range(days):
+            sim.advance(3)
+            time.sleep(0.02)   # 等推送线程送达收盘行情
+            before = sum(sim.calls.values())
+            start = time.perf_counter()
+            engine.run_once()
+            durations.append(time.perf_counter() - start)
+            calls.append(sum(sim.calls.values()) - before)
+
+            # 逐实例参考实现
+            bars = {s: engine.fetcher.get_historical_klines(s, period='day', count=80, refresh=True) for s in symbols}
+            for inst in engine.instances:
+                expected = Strategy(inst.short_window, inst.long_window).check_signal(bars[inst.symbol])
+                got = engine.last_signals[inst.name].signal_type
+                mismatches += expected.signal_type != got
+                actionable += got != "HOLD"
+            sim.advance(1)
+
+        summary = engine.paper.summary()
+        engine.close()
+        return {"instances": len(engine.instances), "durations": np.array(durations), "calls": np.array(calls),
+                "startup": startup, "mismatches": mismatches, "actionable": actionable,
+                "decisions": dict(engine.decisions), "trades": int(summary['trades'].sum())}
+
+def live_run(symbols, days: int, capital: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, symbols, 0.0, days, capital=capital)
+        sim = ContextPool.configure(config).acquire('trade').broker
+        engine = TradingEngine(config, 'live')
+        engine.warm()
+        worst = 0.0
+        for _ in range(days):
+            sim.advance(3)
+            time.sleep(0.01)
+            engine.run_once()
+            for inst in engine.instances:
+                held, cost = engine._ledger(inst)
+                worst = max(worst, held * cost / capital)
+            sim.advance(1)
+        fills = sum(1 for o in sim.orders.values() if o.status == OrderStatus.Filled)
+
+        # 把已结束的订单改成 60 天前，压缩后重新加载日志，各实例持仓应与压缩前一致
+        before = {inst.name: engine._ledger(inst) for inst in engine.instances}
+        old = (pd.Timestamp.now() - pd.Timedelta(days=60)).isoformat(timespec='seconds')
+        for r in engine.orders.all_orders():
+            if not r.is_active:
+                r.created_at = r.updated_at = old
+        total = len(engine.orders.all_orders())
+        engine.orders.compact(keep_days=30)
+        engine.orders.close()
+        engine.orders = OrderManager(config)
+        after = {inst.name: engine._ledger(inst) for inst in engine.instances}
+        drift = max(abs(before[k][0] - after[k][0]) + abs(before[k][1] - after[k][1]) for k in before)
+        compacted = len(engine.orders.all_orders())
+        engine.close()
+        return {"instances": len(engine.instances), "fills": fills, "worst": worst,
+                "held": sum(q for q, _ in before.values()), "journal": (total, compacted), "drift": drift}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("symbols", nargs="?", type=int, default=50)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=5.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    ok = True
+
+    symbols = [f"S{k:03d}.US" for k in range(args.symbols)]
+    for push in (True, False):
+        r = paper_run(symbols, args.days, args.latency, push)
+        d = r["durations"] * 1000
+        print(f"paper, push {'on ' if push else 'off'}: {r['instances']} instances / {len(symbols)} symbols, "
+              f"startup {r['startup'] * 1000:.0f} ms, cycle p50 {np.median(d):.1f} ms, p99 {np.percentile(d, 99):.1f} ms, "
+              f"API calls/cycle {r['calls'].mean():.1f} (per-instance fetch: {r['instances']}), "
+              f"decisions {r['decisions']}")
+        print(f"    {r['actionable']} actionable signals, {r['trades']} paper fills, "
+              f"mismatches vs check_signal: {r['mismatches']}")
+        ok &= r["mismatches"] == 0 and r["actionable"] > 0 and r["calls"].mean() < r["instances"] / 10
+
+    r = live_run(symbols[:5], args.days, capital=5000.0)
+    print(f"live, shared account: {r['instances']} instances, {r['fills']} fills, "
+          f"max cost basis / capital {r['worst']:.3f}")
+    print(f"    journal compacted {r['journal'][0]} -> {r['journal'][1]} orders, "
+          f"{r['held']} shares held by instances, ledger drift after compact {r['drift']:.2e}")
+    ok &= r["fills"] > 0 and r["worst"] <= 1.01 and r["held"] > 0 and r["drift"] < 1e-3
+
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,129 @@
+"""
+开盘执行基准: 收盘后登记 + 开盘前复核 + 开盘热路径 vs 开盘时一次性 run_job
+
+每个交易日在模拟券商 (注入 API 延迟) 上:
+1. 一次性: 开盘时调用 run_job (取K线 -> 信号 -> 查资金/持仓 -> 下单)，统计开盘到任务完成的耗时
+2. 两阶段: 收盘后 decide() 登记订单 -> 开盘前 prepare_open() 复核 -> 开盘 execute_open()，
+   统计每笔订单开盘到券商受理的延迟 (open_to_submit)；推送行情 / 关闭推送 (一次批量报价) 两种情况
+   两种情况的成交数必须一致，每笔受理的订单都有延迟记录
+3. 满仓: 各标的 position_ratio 1.0，买单按执行器可能付出的最高价分配资金，高开时不会因现金不足被拒
+
+运行: python benchmarks/bench_open_execution.py [交易日数] [--symbols 10] [--latency 20]
+"""
+import sys
+import os
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from longport.openapi import OrderStatus as BrokerStatus
+from src.core.context_pool import ContextPool
+from src.core.engine import TradingEngine
+from src.core.order_manager import OrderStatus
+from src.cli import run_cmd
+
+def make_config(tmp: str, symbols, latency_ms: float, days: int, push: bool, ratio: float = None) -> dict:
+    start = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)[0]
+    return {
+        "symbol": symbols[0],
+        "strategies": [{"symbols": symbols, "short_ma_period": 5, "long_ma_period": 20,
+                        "position_ratio": ratio or 1 / len(symbols)}],
+        "trading": {"order_type": "Market"},
+        "order_execution": {"strategy": "market",
+                            # 模拟时钟与墙上时钟无关，不按日历判断信号是否过期
+                            "gap_protection": {"enabled": True, "max_gap_pct": 2.0, "action_on_gap": "cancel",
+                                               "max_signal_age_sessions": 0}},
+        "engine": {"quote_push": push, "open_quote_timeout_seconds": 1 if push else 0},
+        "data": {"cache_enabled": True, "refresh_seconds": 0},
+        "orders": {"journal_path": os.path.join(tmp, "journal.jsonl")},
+        "account": {"cache_ttl_seconds": 30, "background_refresh": False},
+        "notification": {"enabled": False},
+        "broker": {"mode": "sim", "sim": {"bars": 300, "seed": 9, "start": str(start.date()), "symbols": symbols,
+                                          "latency_ms": latency_ms, "push_latency_ms": 2,
+                                          "cache_dir": os.path.join(tmp, "bars")}},
+    }
+
+def one_shot(symbols, days: int, latency_ms: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, symbols, latency_ms, days, push=True)
+        sim = ContextPool.configure(config).acquire('trade').broker
+        ctx = SimpleNamespace(obj={"CONFIG": config})
+        durations = []
+        for _ in range(days):
+            if not sim.advance(4):
+                break
+            start = time.perf_counter()
+            run_cmd.run_job(ctx, 'live')
+            durations.append(time.perf_counter() - start)
+        return {"durations": np.array(durations)}
+
+async def two_phase(symbols, days: int, latency_ms: float, push: bool, ratio: float = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, symbols, latency_ms, days, push=push, ratio=ratio)
+        sim = ContextPool.configure(config).acquire('trade').broker
+        engine = TradingEngine(config, 'live')
+        await asyncio.to_thread(engine.warm)
+        calls_at_open, staged = [], 0
+        for _ in range(days):
+            sim.advance(3)
+            await asyncio.sleep(0.01)          # 收盘推送送达
+            staged += len(await asyncio.to_thread(engine.decide))
+            await asyncio.to_thread(engine.prepare_open)
+            if not sim.advance(1):              # 开盘 (模拟行情已到末尾时结束)
+                break
+            before = sum(sim.calls.values())
+            await engine.execute_open()
+            calls_at_open.append(sum(sim.calls.values()) - before)
+
+        records = [r for r in engine.orders.all_orders() if r.note == 'live']
+        latencies = np.array([r.submit_latency_ms for r in records if r.submit_latency_ms is not None])
+        gap = sum(r.state == OrderStatus.CANCELLED and r.gap_pct is not None for r in records)
+        pending = sum(r.state == OrderStatus.PENDING for r in records)
+        rejected = sum(r.state == OrderStatus.REJECTED for r in engine.orders.all_orders())
+        fills = sum(1 for o in sim.orders.values() if o.status == BrokerStatus.Filled)
+        engine.close()
+        return {"staged": staged, "latencies": latencies, "fills": fills, "gap_cancelled": gap, "rejected": rejected,
+                "parents": len(records), "missing": len(records) - gap - pending - len(latencies),
+                "calls": np.array(calls_at_open), "stats": engine.job_summary()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("days", nargs="?", type=int, default=80)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    ok = True
+    symbols = [f"O{k:02d}.US" for k in range(args.symbols)]
+
+    cold = one_shot(symbols, args.days, args.latency)
+    d = cold["durations"] * 1000
+    print(f"one-shot run_job at open : p50 {np.median(d):7.1f} ms, p99 {np.percentile(d, 99):7.1f} ms "
+          f"(open -> signal, sizing and all submits done)")
+
+    results = {}
+    for push in (True, False):
+        r = asyncio.run(two_phase(symbols, args.days, args.latency, push))
+        results[push] = r
+        lat = r["latencies"]
+        print(f"two-phase, push {'on ' if push else 'off'}   : p50 {np.median(lat):7.1f} ms, p99 {np.percentile(lat, 99):7.1f} ms "
+              f"open -> broker ack per order, {r['staged']} staged, {len(lat)} submitted, {r['gap_cancelled']} gap-cancelled, "
+              f"{r['fills']} fills, API calls at open {r['calls'].mean():.1f}/day")
+        ok &= r["missing"] == 0 and len(lat) > 0
+
+    ok &= results[True]["fills"] == results[False]["fills"]
+    ok &= np.median(results[True]["latencies"]) < np.median(cold["durations"] * 1000)
+
+    full = asyncio.run(two_phase(symbols, args.days, args.latency, True, ratio=1.0))
+    print(f"full cash, ratio 1.0     : {full['staged']} staged, {full['fills']} fills, "
+          f"{full['rejected']} rejected for cash")
+    ok &= full["rejected"] == 0 and full["fills"] > 0
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,206 @@
+"""
+订单执行器离线验证: OrderExecutor 对接本地 FakeTradeContext (不访问券商)
+
+FakeTradeContext 实现 Trader 用到的 TradeContext 接口，撮合线程按设定价格成交限价单并
+从独立线程推送订单状态，模拟 SDK 的推送回调。依次运行以下场景并校验结果:
+限价成交 / 超时撤单追市价 / 券商拒单不追市价 / 跳空取消 / 跳空等待回落 / TWAP 拆单 / 多标的并发执行。
+
+运行: python benchmarks/bench_order_executor.py [并发标的数]
+"""
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+import itertools
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+from longport.openapi import OrderStatus, OrderType, OrderSide
+from src.core.context_pool import ContextPool
+from src.core.trader import Trader
+from src.core.order_manager import OrderManager
+from src.core.executor import OrderExecutor
+
+class FakeTradeContext:
+    """
+    本地撮合的假 TradeContext: 市价单按当前价立即成交，限价单在价格触及时按每次最多 lot 股分批成交，
+    reject 中的标的限价单受理后即被拒 (如超出购买力 / 价格带)
+    """
+    def __init__(self, latency: float = 0.02, tick: float = 0.01, lot: int = 100):
+        self.latency = latency
+        self.tick = tick
+        self.lot = lot
+        self.prices = {}
+        self.reject = set()
+        self.orders = {}
+        self.callback = None
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._match_loop, daemon=True)
+        self.thread.start()
+
+    def set_on_order_changed(self, callback):
+        self.callback = callback
+
+    def subscribe(self, topics):
+        pass
+
+    def submit_order(self, symbol, order_type, side, submitted_quantity, time_in_force, submitted_price=None, **kwargs):
+        time.sleep(self.latency)
+        order_id = str(next(self.ids))
+        with self.lock:
+            self.orders[order_id] = SimpleNamespace(
+                order_id=order_id, symbol=symbol, side=side, order_type=order_type,
+                quantity=int(submitted_quantity), executed_quantity=0, notional=0.0,
+                price=float(submitted_price) if submitted_price else None, status=OrderStatus.New)
+            if symbol in self.reject and order_type == OrderType.LO:
+                self.orders[order_id].status = OrderStatus.Rejected
+        self._push(self.orders[order_id])
+        return order_id
+
+    def cancel_order(self, order_id):
+        time.sleep(self.latency)
+        with self.lock:
+            o = self.orders[order_id]
+            if o.status in (OrderStatus.Filled, OrderStatus.Canceled):
+                raise RuntimeError(f"order {order_id} already {o.status}")
+            o.status = OrderStatus.Canceled
+        self._push(o)
+
+    def today_orders(self, symbol=None):
+        return list(self.orders.values())
+
+    def _push(self, o):
+        if self.callback:
+            avg = o.notional / o.executed_quantity if o.executed_quantity else 0
+            self.callback(SimpleNamespace(order_id=o.order_id, symbol=o.symbol, status=o.status,
+                                          executed_quantity=o.executed_quantity, executed_price=avg))
+
+    def _match_loop(self):
+        while not self.stop_event.wait(self.tick):
+            changed = []
+            with self.lock:
+                for o in self.orders.values():
+                    if o.status not in (OrderStatus.New, OrderStatus.PartialFilled):
+                        continue
+                    price = self.prices[o.symbol]
+                    if o.order_type == OrderType.MO:
+                        qty = o.quantity - o.executed_quantity
+                    elif (price <= o.price) if o.side == OrderSide.Buy else (price >= o.price):
+                        qty = min(self.lot, o.quantity - o.executed_quantity)
+                        price = o.price if o.side == OrderSide.Buy and price > o.price else price
+                    else:
+                        continue
+                    o.executed_quantity += qty
+                    o.notional += qty * price
+                    o.status = OrderStatus.Filled if o.executed_quantity == o.quantity else OrderStatus.PartialFilled
+                    changed.append(o)
+            for o in changed:
+                self._push(o)
+
+    def close(self):
+        self.stop_event.set()
+
+def make_config(strategy: str = 'limit', action_on_gap: str = 'wait') -> dict:
+    return {
+        "order_execution": {
+            "strategy": strategy,
+            "limit_order": {"buy_slippage_pct": 0.3, "sell_slippage_pct": 0.3,
+                            "timeout_minutes": 0.01, "chase_on_timeout": True},
+            "twap": {"num_slices": 5, "duration_minutes": 0.02},
+            "gap_protection": {"enabled": True, "max_gap_pct": 2.0, "action_on_gap": action_on_gap,
+                               "wait_minutes": 0.02, "poll_seconds": 0.05},
+            "cancel_wait_seconds": 2,
+            "max_inflight": 16,
+        }
+    }
+
+async def scenario(name, fake, manager, config, quotes, symbol, side, qty, signal, during=None):
+    executor = OrderExecutor(Trader(config), config, manager, quote_fn=lambda s: dict(quotes[s]))
+    fake.prices[symbol] = quotes[symbol]['price']
+    start = time.perf_counter()
+    task = asyncio.create_task(executor.execute(symbol, side, qty, signal))
+    if during:
+        await during()
+    report = await task
+    r = report.record
+    print(f"{name:<12} {r.status:<10} {r.filled_quantity:>5}/{r.quantity:<5} "
+          f"avg {r.filled_price or 0:8.3f}  children {len(report.children)}  {time.perf_counter() - start:6.2f}s")
+    return report
+
+async def main(concurrency: int) -> bool:
+    fake = FakeTradeContext()
+    ContextPool._instance = ContextPool(factory=lambda kind: fake)
+    manager = OrderManager({}, journal_path=os.path.join(tempfile.mkdtemp(), "journal.jsonl"))
+    ok = True
+
+    # 1. 开盘价在限价内，直接成交
+    quotes = {"A.US": {"open": 100.0, "price": 100.0}}
+    r = await scenario("limit", fake, manager, make_config(), quotes, "A.US", "Buy", 300, 100.0)
+    ok &= r.status == "filled" and len(r.children) == 1
+
+    # 2. 提交后价格上行，限价单超时撤单，剩余部分追市价
+    quotes["B.US"] = {"open": 100.0, "price": 101.0}
+    r = await scenario("chase", fake, manager, make_config(), quotes, "B.US", "Buy", 300, 100.0)
+    ok &= r.status == "filled" and len(r.children) == 2 and r.record.slippage_pct > 0.9
+
+    # 3. 限价单被券商拒绝: 不能把剩余数量转成市价单
+    quotes["R.US"] = {"open": 100.0, "price": 100.0}
+    fake.reject.add("R.US")
+    r = await scenario("rejected", fake, manager, make_config(), quotes, "R.US", "Buy", 300, 100.0)
+    ok &= r.status == "cancelled" and len(r.children) == 1 and r.children[0].status == "rejected"
+
+    # 4. 不利跳空 3%，取消
+    quotes["C.US"] = {"open": 103.0, "price": 103.0}
+    r = await scenario("gap cancel", fake, manager, make_config(action_on_gap='cancel'), quotes, "C.US", "Buy", 100, 100.0)
+    ok &= r.status == "cancelled" and not r.children
+
+    # 5. 不利跳空后价格回落到容忍带内，继续执行
+    quotes["D.US"] = {"open": 103.0, "price": 103.0}
+
+    async def fall_back():
+        await asyncio.sleep(0.3)
+        quotes["D.US"]["price"] = fake.prices["D.US"] = 101.0
+
+    r = await scenario("gap wait", fake, manager, make_config(), quotes, "D.US", "Buy", 100, 100.0, fall_back)
+    ok &= r.status == "filled" and r.record.gap_pct == 3.0
+
+    # 6. TWAP: 5 份子单，每份限价单部分成交 (每 tick 最多 100 股)
+    quotes["E.US"] = {"open": 100.0, "price": 100.0}
+    r = await scenario("twap", fake, manager, make_config('twap'), quotes, "E.US", "Sell", 1000, 100.0)
+    ok &= r.status == "filled" and len(r.children) >= 5
+
+    # 7. 多标的并发执行: 总耗时应接近单笔，而不是逐笔累加
+    config = make_config()
+    executor = OrderExecutor(Trader(config), config, manager, quote_fn=lambda s: {"open": 50.0, "price": 50.0})
+    symbols = [f"S{i}.US" for i in range(concurrency)]
+    for s in symbols:
+        fake.prices[s] = 50.0
+    start = time.perf_counter()
+    reports = await asyncio.gather(*(executor.execute(s, "Buy", 200, 50.0) for s in symbols))
+    elapsed = time.perf_counter() - start
+    filled = sum(r.status == "filled" for r in reports)
+    print(f"concurrent   {filled}/{concurrency} filled in {elapsed:.2f}s "
+          f"(submit latency {fake.latency * 1000:.0f} ms, serial >= {concurrency * fake.latency * 2:.2f}s)")
+    ok &= filled == concurrency
+
+    # 8. 订单日志重放后状态一致
+    manager.close()
+    replayed = OrderManager({}, journal_path=str(manager.journal.path))
+    ok &= all(replayed.get(r.order_id).status == r.status for r in manager.all_orders())
+    print(f"journal      {len(replayed.all_orders())} orders replayed, {len(replayed.active_orders())} active")
+    replayed.close()
+
+    fake.close()
+    return ok
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    passed = asyncio.run(main(n))
+    print(f"all scenarios passed: {passed}")
+    sys.exit(0 if passed else 1)
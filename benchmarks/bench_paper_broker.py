@@ -0,0 +1,138 @@
+"""
+模拟盘基准: 多个策略变体在同一进程内并行影子交易 (PaperBroker)
+
+1. N 组均线参数各开一个模拟账户，逐日: 计算信号 -> 下单 (信号价为参考价) -> 下一根 K 线按 order_execution 撮合
+2. 校验账务恒等式: 权益 = 初始资金 + 已实现盈亏 + 浮动盈亏 - 手续费
+3. 重启 (重放账本) 与压缩账本后，各账户状态与内存中一致
+4. run_job --mode paper 在模拟券商行情上的完整流程 (不通过券商下单)
+
+运行: python benchmarks/bench_paper_broker.py [账户数] [--days 500]
+"""
+import sys
+import os
+import time
+import logging
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from src.core.paper_broker import PaperBroker
+from src.core.sim_broker import synthetic_bars
+from src.core.context_pool import ContextPool
+from src.cli import run_cmd
+
+SYMBOL = "SIM.US"
+
+def variants(n: int):
+    pairs = [(s, l) for s in range(3, 30, 2) for l in range(20, 120, 10) if s < l]
+    return pairs[:n]
+
+def shadow_trade(broker: PaperBroker, bars: pd.DataFrame, pairs, days: int) -> float:
+    close = bars['close']
+    # 各变体的持仓方向 (1 多 / 0 空)，逐日只需取一行
+    state = pd.DataFrame({f"ma{s}_{l}": (close.rolling(s).mean() > close.rolling(l).mean()).astype(int)
+                          for s, l in pairs})
+    cross = state.diff().fillna(0).to_numpy()
+    accounts = [broker.account(name) for name in state.columns]
+
+    start = time.perf_counter()
+    for i in range(len(bars) - days, len(bars)):
+        bar = bars.iloc[i]
+        broker.on_bar(SYMBOL, bar)
+        for account, c in zip(accounts, cross[i]):
+            if c > 0:
+                qty = int(account.cash / (bar['close'] * (1 + broker.commission_rate)))
+                if qty > 0:
+                    account.submit_order(SYMBOL, "Buy", qty, reference_price=bar['close'], after=bar['timestamp'])
+            elif c < 0:
+                pos = account.get_positions(SYMBOL)
+                if pos and pos[0]['available_quantity'] > 0:
+                    account.submit_order(SYMBOL, "Sell", pos[0]['available_quantity'],
+                                         reference_price=bar['close'], after=bar['timestamp'])
+    return time.perf_counter() - start
+
+def run_pipeline(tmp: str, days: int) -> dict:
+    start = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)[0]
+    config = {
+        "symbol": SYMBOL,
+        "strategy": {"short_ma_period": 5, "long_ma_period": 20},
+        "trading": {"position_ratio": 1.0},
+        "data": {"cache_enabled": True, "refresh_seconds": 0},
+        "orders": {"journal_path": os.path.join(tmp, "journal.jsonl")},
+        "paper": {"ledger_path": os.path.join(tmp, "pipeline.jsonl")},
+        "notification": {"enabled": False},
+        "broker": {"mode": "sim", "sim": {"bars": 600, "seed": 3, "start": str(start.date()),
+                                          "cache_dir": os.path.join(tmp, "bars")}},
+    }
+    sim = ContextPool.configure(config).acquire('trade').broker
+    ctx = SimpleNamespace(obj={"CONFIG": config})
+    for _ in range(days):
+        sim.advance(3)
+        run_cmd.run_job(ctx, 'paper')
+        sim.advance(1)
+    broker = PaperBroker(config)
+    summary = broker.account().summary()
+    broker.close()
+    return {"summary": summary, "broker_orders": len(sim.orders)}
+
+def balanced(s: dict, initial: float) -> bool:
+    return abs(s['equity'] - (initial + s['realized_pnl'] + s['unrealized_pnl'] - s['commission'])) < 1e-6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("accounts", nargs="?", type=int, default=48)
+    parser.add_argument("--days", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {"paper": {"ledger_path": os.path.join(tmp, "ledger.jsonl"), "commission_rate": 0.0005}}
+        bars = synthetic_bars(SYMBOL, args.days + 150, seed=11)
+        pairs = variants(args.accounts)
+
+        # 1. 并行影子交易
+        broker = PaperBroker(config)
+        elapsed = shadow_trade(broker, bars, pairs, args.days)
+        summary = broker.summary()
+        trades = int(summary['trades'].sum())
+        print(f"{len(pairs)} accounts x {args.days} bars: {elapsed:.2f}s "
+              f"({elapsed / args.days * 1000:.2f} ms/bar, {trades} fills, {os.path.getsize(config['paper']['ledger_path']) / 1024:.0f} KiB ledger)")
+        print(summary.sort_values('return_pct', ascending=False).head(3)[
+            ['account', 'equity', 'realized_pnl', 'unrealized_pnl', 'return_pct', 'trades']].to_string(index=False))
+
+        # 2. 账务恒等式
+        ok &= all(balanced(s, 100000) for s in summary.to_dict('records'))
+
+        # 3. 重放 / 压缩后一致
+        before = summary.set_index('account')
+        broker.close()
+        for label in ("replay", "compact"):
+            broker = PaperBroker(config)
+            broker.mark({SYMBOL: float(bars['close'].iloc[-1])})
+            if label == "compact":
+                broker.compact()
+                broker.close()
+                broker = PaperBroker(config)
+                broker.mark({SYMBOL: float(bars['close'].iloc[-1])})
+            after = broker.summary().set_index('account')
+            same = np.allclose(before.drop(columns=['open_orders']).to_numpy(float),
+                               after.loc[before.index].drop(columns=['open_orders']).to_numpy(float))
+            ok &= same
+            print(f"{label}: {len(after)} accounts restored, state {'matches' if same else 'DIFFERS'} "
+                  f"({os.path.getsize(config['paper']['ledger_path']) / 1024:.0f} KiB ledger)")
+            broker.close()
+
+        # 4. run_job paper 模式
+        result = run_pipeline(tmp, 250)
+        s = result['summary']
+        ok &= result['broker_orders'] == 0 and balanced(s, 100000) and s['trades'] > 0
+        print(f"run_job paper x 250 days: {s['trades']} fills, equity {s['equity']:,.2f}, "
+              f"realized {s['realized_pnl']:,.2f}, broker orders {result['broker_orders']}")
+
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,103 @@
+"""
+run 流水线吞吐测试: 以模拟券商 (broker.mode = sim) 驱动 run_job 完整流程
+
+每个交易日: 模拟时钟推进一根日 K -> run_job (取数 -> 信号 -> 查资金/持仓 -> 下单 -> 记录订单)。
+分别在不同的 API 注入延迟下统计单次任务耗时，并用 Backtester 在同一段 K 线上的交易次数
+校验模拟成交结果。
+
+运行: python benchmarks/bench_run_pipeline.py [交易日数] [--latency 0,5,20] [--mode live]
+"""
+import sys
+import os
+import time
+import argparse
+import logging
+import tempfile
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from longport.openapi import OrderStatus
+from src.core.context_pool import ContextPool
+from src.core.strategy import Strategy
+from src.cli import run_cmd
+
+SYMBOL = "SIM.US"
+
+def make_config(tmp: str, latency_ms: float, days: int) -> dict:
+    start = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)[0]
+    return {
+        "symbol": SYMBOL,
+        "strategy": {"short_ma_period": 5, "long_ma_period": 20},
+        "trading": {"order_type": "Market", "position_ratio": 1.0},
+        "data": {"cache_enabled": True, "refresh_seconds": 0},
+        "orders": {"journal_path": os.path.join(tmp, "journal.jsonl")},
+        "notification": {"enabled": False},
+        "broker": {
+            "mode": "sim",
+            "sim": {"source": "synthetic", "bars": 600, "seed": 3, "start": str(start.date()),
+                    "latency_ms": latency_ms, "cache_dir": os.path.join(tmp, "bars")},
+        },
+    }
+
+def run(days: int, latency_ms: float, mode: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, latency_ms, days)
+        broker = ContextPool.configure(config).acquire('trade').broker
+        ctx = SimpleNamespace(obj={"CONFIG": config})
+
+        durations = []
+        for _ in range(days):
+            # 当日收盘后运行 (与 16:05 的调度一致)
+            broker.advance(3)
+            start = time.perf_counter()
+            run_cmd.run_job(ctx, mode)
+            durations.append(time.perf_counter() - start)
+            broker.advance(1)
+
+        trades = sum(1 for o in broker.orders.values() if o.status == OrderStatus.Filled)
+        calls = sum(broker.calls.values())
+        equity = broker.account_balance()[0].net_assets
+        return {"durations": np.array(durations), "trades": trades, "calls": calls, "equity": equity,
+                "bars": broker.market.series[SYMBOL]}
+
+def expected_trades(bars: dict, days: int) -> int:
+    """Backtester 在同一段 K 线上的建仓 / 平仓次数 (从空仓开始)"""
+    df = pd.DataFrame({k: bars[k] for k in ("timestamp", "close")})
+    strategy = Strategy(5, 20)
+    df = strategy.calculate_indicators(df)
+    cross = (df['MA5'] > df['MA20']).astype(int).diff().fillna(0).to_numpy()[-days:]
+    # 从空仓开始: 首次死叉之前的卖出信号不会成交
+    held, count = False, 0
+    for c in cross:
+        if c > 0 and not held:
+            held, count = True, count + 1
+        elif c < 0 and held:
+            held, count = False, count + 1
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("days", nargs="?", type=int, default=250)
+    parser.add_argument("--latency", default="0,5,20", help="逗号分隔的注入延迟 (ms)")
+    parser.add_argument("--mode", choices=["paper", "live"], default="live")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    ok = True
+    for latency in [float(x) for x in args.latency.split(",")]:
+        result = run(args.days, latency, args.mode)
+        d = result["durations"] * 1000
+        line = (f"latency {latency:5.1f} ms: {args.days} jobs, mean {d.mean():7.2f} ms, p50 {np.median(d):7.2f} ms, "
+                f"p99 {np.percentile(d, 99):7.2f} ms, {len(d) / result['durations'].sum():7.1f} jobs/s, "
+                f"{result['calls']} API calls")
+        if args.mode == "live":
+            expected = expected_trades(result["bars"], args.days)
+            ok &= result["trades"] == expected
+            line += f", fills {result['trades']} (backtest {expected}), equity {result['equity']:.2f}"
+        print(line)
+
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,113 @@
+"""
+流式回测基准: StreamingBacktester (分块读取 BarStore) vs Backtester (整表入内存)
+
+在临时 BarStore 中生成分钟 K 线，两种引擎各在独立子进程中运行，比较峰值内存 (RSS)
+与耗时，并逐列校验结果完全一致。ru_maxrss 会跨 fork/exec 继承，因此数据生成也放在子进程中，
+父进程保持轻量。流式引擎的峰值内存超过 --cap-mb 时返回非零退出码。
+
+运行: python benchmarks/bench_streaming_backtest.py [K线数] [--cap-mb 150] [--chunk 100000]
+"""
+import sys
+import os
+import time
+import json
+import argparse
+import resource
+import subprocess
+import tempfile
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from src.core.bar_store import BarStore
+from src.core.strategy import Strategy
+from src.backtest.engine import Backtester
+from src.backtest.streaming import StreamingBacktester
+
+SYMBOL, PERIOD, ADJUST = "BENCH.US", "1m", "forward"
+
+def peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def generate(root: str, bars: int):
+    rng = np.random.default_rng(11)
+    close = np.round(100 * np.cumprod(1 + rng.normal(0, 0.0005, bars)), 2)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2000-01-03 09:30", periods=bars, freq="min"),
+        "open": close, "high": close, "low": close, "close": close,
+        "volume": np.full(bars, 100, dtype=np.int64),
+    })
+    BarStore(root).save(SYMBOL, PERIOD, ADJUST, df)
+
+def run_streaming(root: str, out: str, chunk: int) -> dict:
+    engine = StreamingBacktester(Strategy(30, 390))
+    start = time.perf_counter()
+    metrics = engine.run(BarStore(root).iter_chunks(SYMBOL, PERIOD, ADJUST, chunk, ['timestamp', 'close']), out)
+    return {"seconds": time.perf_counter() - start, "peak_mb": peak_rss_mb(), "metrics": metrics}
+
+def run_memory(root: str, out: str) -> dict:
+    start = time.perf_counter()
+    data = BarStore(root).load(SYMBOL, PERIOD, ADJUST)
+    engine = Backtester(Strategy(30, 390))
+    results = engine.run(data)
+    metrics = engine.get_performance_metrics()
+    seconds = time.perf_counter() - start
+    os.makedirs(out, exist_ok=True)
+    for name in StreamingBacktester.RESULT_COLUMNS:
+        np.save(os.path.join(out, f"{name}.npy"), results[name].to_numpy(dtype=StreamingBacktester.RESULT_COLUMNS[name]))
+    return {"seconds": seconds, "peak_mb": peak_rss_mb(), "metrics": metrics}
+
+def child(mode: str, root: str, out: str = "", chunk: int = 0, bars: int = 0) -> dict:
+    cmd = [sys.executable, __file__, str(bars), "--child", mode, "--root", root, "--out", out, "--chunk", str(chunk)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.getcwd())
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else f"exit {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("bars", nargs="?", type=int, default=3_000_000)
+    parser.add_argument("--cap-mb", type=float, default=150.0)
+    parser.add_argument("--chunk", type=int, default=100_000)
+    parser.add_argument("--skip-memory", action="store_true", help="不运行整表回测 (数据量超过内存时)")
+    parser.add_argument("--child")
+    parser.add_argument("--root")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child == "generate":
+            generate(args.root, args.bars)
+            result = {}
+        elif args.child == "streaming":
+            result = run_streaming(args.root, args.out, args.chunk)
+        else:
+            result = run_memory(args.root, args.out)
+        print(json.dumps(result, default=str))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "bars")
+        child("generate", root, bars=args.bars)
+        print(f"{args.bars} 1m bars, chunk={args.chunk}, cap={args.cap_mb:.0f} MB")
+
+        streaming = child("streaming", root, os.path.join(tmp, "streaming"), args.chunk)
+        print(f"streaming : {streaming.get('seconds', 0):7.2f}s  peak RSS {streaming.get('peak_mb', 0):8.1f} MB {streaming.get('error', '')}")
+
+        identical = None
+        if not args.skip_memory:
+            memory = child("memory", root, os.path.join(tmp, "memory"), args.chunk)
+            print(f"in-memory : {memory.get('seconds', 0):7.2f}s  peak RSS {memory.get('peak_mb', 0):8.1f} MB {memory.get('error', '')}")
+            if 'error' not in memory and 'error' not in streaming:
+                identical = all(
+                    np.array_equal(np.load(os.path.join(tmp, "streaming", f"{name}.npy")),
+                                   np.load(os.path.join(tmp, "memory", f"{name}.npy")))
+                    for name in StreamingBacktester.RESULT_COLUMNS
+                ) and streaming['metrics'] == memory['metrics']
+                print(f"identical : {identical}")
+
+        over_cap = streaming.get('peak_mb', float('inf')) > args.cap_mb
+        sys.exit(1 if over_cap or identical is False else 0)
@@ -0,0 +1,95 @@
+"""
+交易日历基准: 预计算的开收盘数组 + 二分查找
+
+1. 构建 1990-2060 的日历耗时；与公开的 NYSE 年度交易日数、半日市、夏令时切换的开盘时刻逐一核对
+2. 随机日期对上 bars_between 与 np.busday_count (逐次传入假日表) 的结果一致，对比单次查询耗时
+3. SessionTrigger (引擎调度) 在感恩节 / 圣诞周与夏令时切换周的触发时刻
+
+运行: python benchmarks/bench_trading_calendar.py [查询次数]
+"""
+import sys
+import os
+import time
+import logging
+import argparse
+from datetime import datetime
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+import numpy as np
+import pandas as pd
+from src.core.trading_calendar import TradingCalendar
+from src.core.engine import SessionTrigger
+
+# NYSE 公布的年度交易日数
+SESSIONS_PER_YEAR = {2019: 252, 2020: 253, 2021: 252, 2022: 251, 2023: 250, 2024: 252, 2025: 250, 2026: 251}
+EARLY_CLOSES = {2024: ["2024-07-03", "2024-11-29", "2024-12-24"],
+                2025: ["2025-07-03", "2025-11-28", "2025-12-24"],
+                2026: ["2026-11-27", "2026-12-24"]}
+OPENS_UTC = {"2026-03-06": "14:30", "2026-03-09": "13:30", "2026-10-30": "13:30", "2026-11-02": "14:30"}
+
+def per_call(func, args, n: int) -> float:
+    start = time.perf_counter()
+    for a in args[:n]:
+        func(*a)
+    return (time.perf_counter() - start) / n * 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("queries", nargs="?", type=int, default=20000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    ok = True
+
+    # 1. 构建与核对
+    start = time.perf_counter()
+    cal = TradingCalendar()
+    build = time.perf_counter() - start
+    years = pd.DatetimeIndex(cal.sessions).year
+    counts = {y: int((years == y).sum()) for y in SESSIONS_PER_YEAR}
+    early = {y: [str(d) for d in cal.early_closes if str(d).startswith(str(y))] for y in EARLY_CLOSES}
+    opens = {d: cal.session_open(d).tz_convert('UTC').strftime('%H:%M') for d in OPENS_UTC}
+    print(f"build 1990-2060: {build * 1000:.0f} ms, {len(cal.sessions)} sessions")
+    print(f"sessions/year: {counts} -> {'match' if counts == SESSIONS_PER_YEAR else 'DIFFER'}")
+    print(f"early closes: {'match' if early == EARLY_CLOSES else early}, DST opens (UTC): "
+          f"{'match' if opens == OPENS_UTC else opens}")
+    ok &= counts == SESSIONS_PER_YEAR and early == EARLY_CLOSES and opens == OPENS_UTC
+
+    # 2. 随机查询: 与逐次 busday_count 的结果一致
+    rng = np.random.default_rng(1)
+    lo = np.datetime64("2000-01-01") + rng.integers(0, 9000, args.queries)
+    hi = lo + rng.integers(0, 30, args.queries)
+    holidays = np.setdiff1d(np.arange(np.datetime64("1990-01-01"), np.datetime64("2061-01-01"))[
+        np.is_busday(np.arange(np.datetime64("1990-01-01"), np.datetime64("2061-01-01")))], cal.sessions)
+    pairs = list(zip(lo, hi))
+    got = np.array([cal.bars_between(a, b) for a, b in pairs])
+    expected = np.busday_count(lo + 1, hi + 1, holidays=holidays)
+    mismatches = int((got != expected).sum())
+    ok &= mismatches == 0
+
+    n = min(args.queries, 5000)
+    stamps = [(pd.Timestamp(d) + pd.Timedelta(hours=int(h)),) for d, h in zip(lo, rng.integers(0, 24, args.queries))]
+    print(f"{args.queries} bars_between queries: {mismatches} mismatches vs busday_count")
+    print(f"per query: bars_between {per_call(cal.bars_between, pairs, n):.1f} us "
+          f"(busday_count with holiday table {per_call(lambda a, b: np.busday_count(a + 1, b + 1, holidays=holidays), pairs, n):.1f} us), "
+          f"is_session {per_call(cal.is_session, stamps, n):.1f} us, next_open {per_call(cal.next_open, stamps, n):.1f} us, "
+          f"is_open {per_call(cal.is_open, stamps, n):.1f} us")
+
+    # 3. 调度触发时刻
+    tz = cal.tz_info
+    for anchor, offset, since, expect in (
+        ("close", 5, datetime(2025, 11, 25, 17, tzinfo=tz),
+         ["2025-11-26 16:05", "2025-11-28 13:05", "2025-12-01 16:05"]),
+        ("open", 0, datetime(2026, 3, 5, 17, tzinfo=tz),
+         ["2026-03-06 09:30", "2026-03-09 09:30", "2026-03-10 09:30"]),
+    ):
+        trigger = SessionTrigger(cal, anchor, offset)
+        fires, prev = [], None
+        for _ in range(len(expect)):
+            prev = trigger.get_next_fire_time(prev, since)
+            fires.append(prev.strftime('%Y-%m-%d %H:%M'))
+        print(f"{trigger}: {', '.join(fires)} ({'match' if fires == expect else 'DIFFER'})")
+        ok &= fires == expect
+
+    sys.exit(0 if ok else 1)
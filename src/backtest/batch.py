@@ -0,0 +1,124 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Any, Tuple
+from src.core.strategy import Strategy
+from src.backtest.engine import Backtester
+from src.utils.logger import get_logger
+
+# 工作进程内挂载的共享内存: {symbol: (SharedMemory, timestamps, close)}
+_WORKER_ARRAYS: Dict[str, Tuple[Any, np.ndarray, np.ndarray]] = {}
+
+class SharedPriceArrays:
+    """
+    将各标的的 timestamp / close 放入共享内存，工作进程按名称挂载为只读视图，
+    避免每个任务都 pickle 一份 DataFrame
+    """
+    def __init__(self, data: Dict[str, pd.DataFrame]):
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        # {symbol: (共享内存名称, K线数)}，可安全传给工作进程
+        self.descriptors: Dict[str, Tuple[str, int]] = {}
+
+        for symbol, df in data.items():
+            df = df.sort_values('timestamp')
+            n = len(df)
+            shm = shared_memory.SharedMemory(create=True, size=max(n * 16, 1))
+            ts, close = _views(shm, n)
+            ts[:] = df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+            close[:] = df['close'].to_numpy(dtype=np.float64)
+            self.blocks[symbol] = shm
+            self.descriptors[symbol] = (shm.name, n)
+
+    def close(self):
+        for shm in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _views(shm: shared_memory.SharedMemory, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """共享内存布局: [timestamp int64 × n][close float64 × n]"""
+    ts = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=0)
+    close = np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=n * 8)
+    return ts, close
+
+def _attach(descriptors: Dict[str, Tuple[str, int]]):
+    """工作进程初始化: 挂载全部共享内存块"""
+    import multiprocessing
+    from multiprocessing import resource_tracker
+    for symbol, (name, n) in descriptors.items():
+        try:
+            # Python 3.13+: 不向资源跟踪器登记，由父进程负责 unlink
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            if multiprocessing.get_start_method() != 'fork':
+                # spawn 模式下工作进程有独立的资源跟踪器，退出时会提前回收共享内存
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        ts, close = _views(shm, n)
+        ts.flags.writeable = False
+        close.flags.writeable = False
+        _WORKER_ARRAYS[symbol] = (shm, ts, close)
+
+def _run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """单个回测任务 (在工作进程中执行)"""
+    _, ts, close = _WORKER_ARRAYS[job['symbol']]
+    data = pd.DataFrame({"timestamp": ts.view('datetime64[ns]'), "close": close}, copy=False)
+
+    strategy = Strategy(job['short_window'], job['long_window'])
+    engine = Backtester(strategy, initial_capital=job['initial_capital'], commission_rate=job['commission_rate'])
+    engine.run(data)
+    metrics = engine.get_performance_metrics()
+    return {"Symbol": job['symbol'], "MA": f"{job['short_window']}/{job['long_window']}", **metrics}
+
+class BatchBacktester:
+    """
+    多标的 × 多参数的并行回测：任务分发到进程池，价格数组经共享内存传递，
+    每个任务的 get_performance_metrics 汇总为一张结果表
+    """
+    def __init__(self, initial_capital: float = 100000.0, commission_rate: float = 0.001, max_workers: int = None):
+        self.logger = get_logger("batch_backtest")
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def run(self, data: Dict[str, pd.DataFrame], strategy_configs: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Args:
+            data: {symbol: 含 timestamp / close 的 DataFrame}
+            strategy_configs: 策略参数列表，格式同 config.yaml 的 strategy 段
+                              (e.g., [{'short_ma_period': 5, 'long_ma_period': 20}, ...])
+
+        Returns:
+            pd.DataFrame: 每个 (标的, 参数) 一行绩效指标
+        """
+        data = {s: df for s, df in data.items() if not df.empty}
+        jobs = [
+            {
+                "symbol": symbol,
+                "short_window": conf.get('short_ma_period', 5),
+                "long_window": conf.get('long_ma_period', 20),
+                "initial_capital": self.initial_capital,
+                "commission_rate": self.commission_rate,
+            }
+            for symbol in data
+            for conf in strategy_configs
+        ]
+        if not jobs:
+            return pd.DataFrame()
+
+        self.logger.info(f"Running {len(jobs)} backtests on {self.max_workers} workers...")
+        with SharedPriceArrays(data) as shared:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_attach,
+                                     initargs=(shared.descriptors,)) as executor:
+                chunksize = max(len(jobs) // (self.max_workers * 4), 1)
+                rows = list(executor.map(_run_job, jobs, chunksize=chunksize))
+
+        return pd.DataFrame(rows)
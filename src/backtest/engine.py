@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
+from collections.abc import Sequence
 from typing import Dict, List, Any
 from src.core.strategy import Strategy
+from src.core.bar_store import BarView
+from src.core import trading_calendar
+
+TRADE_COLUMNS = ["type", "date", "price", "pnl", "pnl_pct"]
 
 class Backtester:
     def __init__(self, strategy: Strategy, initial_capital: float = 100000.0, commission_rate: float = 0.001):
@@ -17,7 +22,12 @@ class Backtester:
     def run(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         运行回测
+
+        Args:
+            data: K线 DataFrame，或 BarStore.open 返回的内存映射视图
         """
+        if isinstance(data, BarView):
+            data = data.to_frame()
         if data.empty:
             return pd.DataFrame()
 
@@ -89,10 +99,11 @@ class Backtester:
         drawdown = (df['equity_curve'] - rolling_max) / rolling_max
         max_drawdown = drawdown.min()
         
-        # 夏普比率 (Sharpe Ratio) - 假设无风险利率为 0
+        # 夏普比率 (Sharpe Ratio) - 假设无风险利率为 0，按回测区间内每年的交易日数年化
         daily_returns = df['strategy_return']
         if daily_returns.std() != 0:
-            sharpe_ratio = (daily_returns.mean() / daily_returns.std()) * np.sqrt(252)
+            ann = trading_calendar.periods_per_year(df['timestamp'].iloc[0], df['timestamp'].iloc[-1])
+            sharpe_ratio = (daily_returns.mean() / daily_returns.std()) * np.sqrt(ann)
         else:
             sharpe_ratio = 0
             
@@ -113,57 +124,86 @@ class Backtester:
             "Total Trades": int(total_trades)
         }
 
-    def get_trade_log(self) -> List[Dict]:
+    def get_trade_frame(self) -> pd.DataFrame:
         """
-        生成详细的交易记录
+        以列式 DataFrame 生成交易记录 (type, date, price, pnl, pnl_pct)
+
+        position_signal 由 0 变 1 的那天 Close 买入，由 1 变 0 的那天 Close 卖出，
+        买卖点由信号的边沿一次性求出，卖出的盈亏与前一笔买入配对计算。
         """
-        if self.results is None:
-            return []
-            
-        trades = []
-        in_position = False
-        entry_price = 0
-        entry_date = None
-        
-        # position 表示在该日期的“持仓状态”
-        # 当 position 从 0 变 1 -> 实际上是在前一日收盘或当日开盘买入
-        # 为了简化日志展示，我们认为：
-        # signal 变 1 的那天 Close 买入
-        # signal 变 0 的那天 Close 卖出
-        
-        # 重新遍历 signal 可能会更直观
-        # position_signal 是基于当日 MA 计算出来的
+        if self.results is None or self.results.empty:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+
         df = self.results
-        
-        for index, row in df.iterrows():
-            current_signal = row['position_signal']
-            price = row['close']
-            date = row['timestamp']
-            
-            if current_signal == 1 and not in_position:
-                # Buy
-                in_position = True
-                entry_price = price
-                entry_date = date
-                trades.append({
-                    "type": "BUY",
-                    "date": date,
-                    "price": price,
-                    "pnl": 0.0,
-                    "pnl_pct": 0.0
-                })
-            
-            elif current_signal == 0 and in_position:
-                # Sell
-                in_position = False
-                pnl = price - entry_price
-                pnl_pct = (price - entry_price) / entry_price
-                trades.append({
-                    "type": "SELL",
-                    "date": date,
-                    "price": price,
-                    "pnl": pnl,
-                    "pnl_pct": pnl_pct
-                })
-                
-        return trades
+        signal = df['position_signal'].to_numpy()
+        prev = np.empty_like(signal)
+        prev[0] = 0
+        prev[1:] = signal[:-1]
+
+        is_buy = (signal == 1) & (prev != 1)
+        is_sell = (signal == 0) & (prev == 1)
+        idx = np.flatnonzero(is_buy | is_sell)
+
+        prices = df['close'].to_numpy(dtype=np.float64)[idx]
+        # 买卖严格交替且以买入开始: 偶数位为买入，奇数位为卖出
+        pnl = np.zeros(len(idx))
+        pnl_pct = np.zeros(len(idx))
+        buys = prices[0::2]
+        sells = prices[1::2]
+        pnl[1::2] = sells - buys[:len(sells)]
+        pnl_pct[1::2] = pnl[1::2] / buys[:len(sells)]
+
+        return pd.DataFrame({
+            "type": np.where(is_buy[idx], "BUY", "SELL"),
+            "date": df['timestamp'].to_numpy()[idx],
+            "price": prices,
+            "pnl": pnl,
+            "pnl_pct": pnl_pct,
+        }, columns=TRADE_COLUMNS)
+
+    def get_trade_log(self) -> 'TradeLog':
+        """
+        生成详细的交易记录 (按需转换为 dict 的只读列表视图)
+        """
+        if self.results is None:
+            return TradeLog(pd.DataFrame(columns=TRADE_COLUMNS))
+        return TradeLog(self.get_trade_frame())
+
+class TradeLog(Sequence):
+    """
+    交易记录的列表适配器：底层为列式 DataFrame，访问到的元素才转换为
+    {"type", "date", "price", "pnl", "pnl_pct"} 字典
+    """
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self._columns = None
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        if self._columns is None:
+            self._columns = {
+                "type": self.frame['type'].to_numpy(),
+                "date": pd.DatetimeIndex(self.frame['date']),
+                "price": self.frame['price'].to_numpy(),
+                "pnl": self.frame['pnl'].to_numpy(),
+                "pnl_pct": self.frame['pnl_pct'].to_numpy(),
+            }
+        c = self._columns
+        return {
+            "type": str(c['type'][i]),
+            "date": c['date'][i],
+            "price": float(c['price'][i]),
+            "pnl": float(c['pnl'][i]),
+            "pnl_pct": float(c['pnl_pct'][i]),
+        }
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("trade log index out of range")
+        return self._row(i)
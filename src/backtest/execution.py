@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+# limit_price / gap_pct 与成交状态定义在 core，这里一并导出保持原有导入路径
+from src.core.execution_policy import (ExecutionPolicy, limit_price, gap_pct,
+                                       FILLED, CHASED, GAP_CANCELLED, UNFILLED, EXPIRED)
+from src.core.trading_calendar import get_calendar
+
+class ExecutionSimulator(ExecutionPolicy):
+    """
+    按 config.yaml 的 order_execution 段模拟 T+1 开盘执行 (规则见 ExecutionPolicy，与实盘执行器一致)
+
+    - 跳空保护: 不利方向 (买入高开 / 卖出低开) 超过 max_gap_pct 时 cancel，或在 wait_minutes 内等待回到容忍带
+    - 限价单: 以开盘价 (跳空等待后为回到容忍带时的价格) ± 滑点为限价，timeout_minutes 内未成交则按 chase_on_timeout 追市价
+    - 市价单: 在提交时刻的价格成交
+    - 信号日到执行日超过 max_signal_age_sessions 个交易日 (数据缺口) 的订单作废
+
+    全部按订单维度向量化计算，可直接嵌入参数扫描。执行日有分钟 K 线时按分钟精确回放，
+    否则用当日 OHLC 近似 (ExecutionPolicy.simulate_daily)。
+    """
+    def __init__(self, config: Dict[str, Any] = None):
+        super().__init__(config)
+        self.config = config or {}
+
+    def simulate_intraday(self, side: np.ndarray, signal_price: np.ndarray, minutes: np.ndarray,
+                          open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        用执行日的分钟 K 线精确模拟
+
+        Args:
+            minutes / open_ / high / low / close: (订单数, 当日K线数) 矩阵，minutes 为距开盘的分钟数，
+                                                   半日市等较短交易日以 NaN 填充
+
+        Returns:
+            {"fill_price", "status", "fill_minute"}
+        """
+        side = np.asarray(side)
+        n_orders, n_bars = open_.shape
+        rows = np.arange(n_orders)
+        cols = np.arange(n_bars)[None, :]
+        valid = ~np.isnan(open_)
+
+        fill = np.full(n_orders, np.nan)
+        fill_minute = np.full(n_orders, np.nan)
+        status = np.full(n_orders, UNFILLED, dtype=object)
+
+        # 1. 跳空保护: 决定每笔订单从哪根 K 线开始下单，以及限价的参考价
+        blocked = self.gap_blocked(side, signal_price, open_[:, 0])
+        start = np.zeros(n_orders, dtype=int)
+        active = np.ones(n_orders, dtype=bool)
+        reference = open_[:, 0].copy()
+        if blocked.any():
+            if self.action_on_gap == 'cancel':
+                active &= ~blocked
+                status[blocked] = GAP_CANCELLED
+            else:
+                # 等待某根 K 线收盘回到容忍带内 (不晚于 wait_minutes)，以该收盘价为参考价从下一根 K 线开始下单
+                band = self.gap_band(side, signal_price)
+                back = valid & np.where(side[:, None] > 0, close <= band[:, None], close >= band[:, None])
+                has_back = back.any(axis=1)
+                back_bar = np.argmax(back, axis=1)
+                first_back = back_bar + 1
+                wait = blocked & has_back & (first_back < n_bars) & (minutes[rows, back_bar] < self.wait_minutes)
+                start[wait] = first_back[wait]
+                reference[wait] = close[rows, back_bar][wait]
+                active &= ~blocked | wait
+
+        start_minute = minutes[rows, start]
+        elapsed = minutes - start_minute[:, None]
+        after_start = valid & (cols >= start[:, None])
+
+        if self.strategy == 'market':
+            ok = active & ~np.isnan(open_[rows, start])
+            fill[ok] = open_[rows, start][ok]
+            fill_minute[ok] = start_minute[ok]
+            status[ok] = FILLED
+            return {"fill_price": fill, "status": status, "fill_minute": fill_minute}
+
+        # 2. 限价单: 超时窗口内首根触及限价的 K 线成交 (开盘价更优时按开盘价)
+        limit = self.limit_for(reference, side)
+        window = after_start & (elapsed < self.timeout_minutes)
+        touched = window & np.where(side[:, None] > 0, low <= limit[:, None], high >= limit[:, None])
+        has_fill = active & touched.any(axis=1)
+        j = np.argmax(touched, axis=1)
+        bar_open = open_[rows, j]
+        price = np.where(side > 0, np.minimum(bar_open, limit), np.maximum(bar_open, limit))
+        fill[has_fill] = price[has_fill]
+        fill_minute[has_fill] = minutes[rows, j][has_fill]
+        status[has_fill] = FILLED
+
+        # 3. 超时追单: 超时后的第一根 K 线开盘价市价成交
+        if self.chase_on_timeout:
+            after_timeout = after_start & (elapsed >= self.timeout_minutes)
+            can_chase = active & ~has_fill & after_timeout.any(axis=1)
+            k = np.argmax(after_timeout, axis=1)
+            fill[can_chase] = open_[rows, k][can_chase]
+            fill_minute[can_chase] = minutes[rows, k][can_chase]
+            status[can_chase] = CHASED
+
+        return {"fill_price": fill, "status": status, "fill_minute": fill_minute}
+
+    def simulate_trades(self, daily: pd.DataFrame, trades: pd.DataFrame,
+                        intraday: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        对回测交易记录 (Backtester.get_trade_frame) 模拟次日开盘执行
+
+        Args:
+            daily: 含 timestamp / open / high / low / close 的日线
+            trades: 含 type / date / price 的信号记录，price 为信号日收盘价
+            intraday: 可选的分钟 K 线 (timestamp / open / high / low / close)
+
+        Returns:
+            pd.DataFrame: 每笔订单的执行日、开盘价、跳空、成交价、状态与滑点
+        """
+        columns = ["type", "signal_date", "signal_price", "execution_date", "open_price",
+                   "gap_pct", "fill_price", "status", "slippage_pct", "slippage_vs_open_pct"]
+        if trades.empty or daily.empty:
+            return pd.DataFrame(columns=columns)
+
+        daily = daily.sort_values('timestamp').reset_index(drop=True)
+        dates = daily['timestamp'].to_numpy(dtype='datetime64[ns]')
+        signal_idx = np.searchsorted(dates, trades['date'].to_numpy(dtype='datetime64[ns]'))
+        exec_idx = signal_idx + 1
+        # 最后一天产生的信号还没有执行日
+        has_next = exec_idx < len(daily)
+        trades = trades[has_next]
+        exec_idx = exec_idx[has_next]
+
+        side = np.where(trades['type'].to_numpy() == 'BUY', 1, -1)
+        signal_price = trades['price'].to_numpy(dtype=np.float64)
+        o = daily['open'].to_numpy(dtype=np.float64)[exec_idx]
+        exec_dates = daily['timestamp'].iloc[exec_idx].to_numpy()
+
+        def by_daily(rows) -> Dict[str, np.ndarray]:
+            idx = exec_idx[rows]
+            return self.simulate_daily(
+                side[rows], signal_price[rows], o[rows],
+                daily['high'].to_numpy(dtype=np.float64)[idx],
+                daily['low'].to_numpy(dtype=np.float64)[idx],
+                daily['close'].to_numpy(dtype=np.float64)[idx],
+            )
+
+        if intraday is not None and not intraday.empty:
+            minutes, mo, mh, ml, mc = session_matrices(intraday, exec_dates)
+            result = self.simulate_intraday(side, signal_price, minutes, mo, mh, ml, mc)
+            # 分钟数据通常比日线短，执行日没有分钟 K 线的订单改用日线近似
+            missing = np.isnan(mo[:, 0])
+            if missing.any():
+                fallback = by_daily(missing)
+                result['fill_price'][missing] = fallback['fill_price']
+                result['status'][missing] = fallback['status']
+            o = np.where(missing, o, mo[:, 0])
+        else:
+            result = by_daily(slice(None))
+
+        if self.max_signal_age:
+            # 信号日与执行日之间隔了多个交易日 (数据缺口) 时跳空比较失去意义，与实盘一样作废
+            sessions = get_calendar(self.config).sessions
+            age = (np.searchsorted(sessions, exec_dates.astype('datetime64[D]'), side='right')
+                   - np.searchsorted(sessions, trades['date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]'),
+                                     side='right'))
+            expired = age > self.max_signal_age
+            result['fill_price'][expired] = np.nan
+            result['status'][expired] = EXPIRED
+
+        fill = result['fill_price']
+        return pd.DataFrame({
+            "type": trades['type'].to_numpy(),
+            "signal_date": trades['date'].to_numpy(),
+            "signal_price": signal_price,
+            "execution_date": exec_dates,
+            "open_price": o,
+            "gap_pct": gap_pct(signal_price, o),
+            "fill_price": fill,
+            "status": result['status'],
+            # 正值代表成本 (买贵 / 卖便宜)
+            "slippage_pct": side * (fill - signal_price) / signal_price * 100,
+            "slippage_vs_open_pct": side * (fill - o) / o * 100,
+        }, columns=columns)
+
+    @staticmethod
+    def slippage_report(fills: pd.DataFrame) -> Dict[str, Any]:
+        """成交率与相对信号价滑点的分布统计"""
+        if fills.empty:
+            return {}
+        filled = fills.dropna(subset=['fill_price'])
+        slip = filled['slippage_pct']
+        report = {
+            "Orders": len(fills),
+            "Filled": int((fills['status'] == FILLED).sum()),
+            "Chased": int((fills['status'] == CHASED).sum()),
+            "Gap Cancelled": int((fills['status'] == GAP_CANCELLED).sum()),
+            "Unfilled": int((fills['status'] == UNFILLED).sum()),
+            "Expired": int((fills['status'] == EXPIRED).sum()),
+        }
+        if not slip.empty:
+            report.update({
+                "Mean Slippage": f"{slip.mean():.3f}%",
+                "Std Slippage": f"{slip.std():.3f}%" if len(slip) > 1 else "-",
+                "P5 / P50 / P95": " / ".join(f"{slip.quantile(q):.3f}%" for q in (0.05, 0.5, 0.95)),
+                "Worst Slippage": f"{slip.max():.3f}%",
+            })
+        return report
+
+def session_matrices(intraday: pd.DataFrame, session_dates: np.ndarray):
+    """
+    将分钟 K 线按交易日展开为 (交易日数, 当日最大K线数) 矩阵，缺失位置填 NaN
+
+    Args:
+        session_dates: 需要的交易日 (按订单顺序，可重复)
+
+    Returns:
+        (minutes, open, high, low, close)，minutes 为距当日首根 K 线的分钟数
+    """
+    bars = intraday.sort_values('timestamp')
+    ts = bars['timestamp'].to_numpy(dtype='datetime64[ns]')
+    day = ts.astype('datetime64[D]')
+    wanted = np.asarray(session_dates, dtype='datetime64[ns]').astype('datetime64[D]')
+
+    uniq_days, day_start = np.unique(day, return_index=True)
+    pos = np.arange(len(ts)) - np.repeat(day_start, np.diff(np.append(day_start, len(ts))))
+    width = int(pos.max()) + 1 if len(pos) else 1
+    day_row = np.searchsorted(uniq_days, day)
+
+    first_ts = ts[day_start][day_row]
+    minutes_flat = (ts - first_ts).astype('timedelta64[m]').astype(np.float64)
+
+    def matrix(values: np.ndarray) -> np.ndarray:
+        m = np.full((len(uniq_days), width), np.nan)
+        m[day_row, pos] = values
+        return m
+
+    mats = [matrix(minutes_flat)] + [matrix(bars[c].to_numpy(dtype=np.float64)) for c in ('open', 'high', 'low', 'close')]
+
+    # 按订单取对应交易日，没有分钟数据的交易日整行为 NaN
+    idx = np.searchsorted(uniq_days, wanted)
+    idx_clipped = np.minimum(idx, len(uniq_days) - 1)
+    found = (idx < len(uniq_days)) & (uniq_days[idx_clipped] == wanted)
+    out = []
+    for m in mats:
+        picked = m[idx_clipped]
+        picked[~found] = np.nan
+        out.append(picked)
+    return tuple(out)
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Tuple
+from src.core.strategy import Strategy
+from src.core import trading_calendar
+
+ALLOCATIONS = ('equal', 'active')
+REBALANCES = ('signal', 'daily')
+
+def align_closes(data: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    将各标的 K 线对齐为 (时间 × 标的) 收盘价矩阵
+
+    时间轴取所有标的时间戳的并集；上市前为 NaN，之后的缺失 K 线 (停牌) 沿用上一收盘价。
+
+    Returns:
+        (timestamps, symbols, close): close 形状为 (时间数, 标的数)
+    """
+    frames = {s: df.drop_duplicates('timestamp', keep='last').set_index('timestamp')['close']
+              for s, df in data.items() if not df.empty}
+    if not frames:
+        return np.array([], dtype='datetime64[ns]'), [], np.empty((0, 0))
+    wide = pd.DataFrame(frames).sort_index().ffill()
+    return wide.index.to_numpy(dtype='datetime64[ns]'), list(wide.columns), wide.to_numpy(dtype=np.float64)
+
+def sma_matrix(close: np.ndarray, window: int) -> np.ndarray:
+    """
+    按列计算简单移动平均 (同 rolling(window).mean())，窗口内含 NaN 的位置为 NaN
+    """
+    valid = ~np.isnan(close)
+    zeros = np.zeros((1, close.shape[1]))
+    csum = np.concatenate([zeros, np.cumsum(np.where(valid, close, 0.0), axis=0)])
+    ccount = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    sma = np.full(close.shape, np.nan)
+    if window <= len(close):
+        full = (ccount[window:] - ccount[:-window]) == window
+        sma[window - 1:] = np.where(full, (csum[window:] - csum[:-window]) / window, np.nan)
+    return sma
+
+class PortfolioBacktester:
+    """
+    多标的组合回测: 所有标的共用一份资金，按双均线信号在持仓标的之间分配仓位
+
+    - allocation='equal':  每个已上市标的固定占 position_ratio / N 的额度，空仓部分留作现金
+    - allocation='active': position_ratio 的资金在当前持仓的标的之间平均分配
+    - rebalance='signal':  仅在目标权重变化时把全部仓位调回目标权重，其余时间随价格漂移
+    - rebalance='daily':   每根 K 线都调回目标权重
+
+    与 Backtester 相同，T 日收盘的信号决定 T+1 的持仓，调仓换手按 commission_rate 计费。
+    全部计算为 (时间 × 标的) 矩阵运算，没有逐 K 线的 Python 循环。
+    """
+    def __init__(self, strategy: Strategy, initial_capital: float = 100000.0, commission_rate: float = 0.001,
+                 position_ratio: float = 1.0, allocation: str = 'equal', rebalance: str = 'signal'):
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"Unsupported allocation: {allocation}")
+        if rebalance not in REBALANCES:
+            raise ValueError(f"Unsupported rebalance: {rebalance}")
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.position_ratio = position_ratio
+        self.allocation = allocation
+        self.rebalance = rebalance
+        self.results = None
+        self.attribution = None
+
+    def target_weights(self, close: np.ndarray) -> np.ndarray:
+        """由收盘价矩阵求每根 K 线持有期间的目标权重 (时间 × 标的)"""
+        available = ~np.isnan(close)
+        short_ma = sma_matrix(close, self.strategy.short_window)
+        long_ma = sma_matrix(close, self.strategy.long_window)
+
+        signal = (short_ma > long_ma) & available
+        position = np.zeros(close.shape)
+        position[1:] = signal[:-1]
+        # 当根 K 线不可交易 (未上市) 的标的不持仓
+        position *= available
+
+        if self.allocation == 'active':
+            slots = position.sum(axis=1, keepdims=True)
+        else:
+            slots = np.zeros((len(close), 1))
+            slots[1:] = available[:-1].sum(axis=1, keepdims=True)
+        return np.divide(position * self.position_ratio, slots, out=np.zeros(close.shape), where=slots > 0)
+
+    def run(self, data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Args:
+            data: {symbol: 含 timestamp / close 的 DataFrame}
+
+        Returns:
+            pd.DataFrame: timestamp / strategy_return / exposure / turnover / equity_curve / benchmark_curve
+        """
+        timestamps, symbols, close = align_closes(data)
+        if not symbols:
+            self.results = pd.DataFrame()
+            return self.results
+
+        t_count, n = close.shape
+        pct = np.zeros(close.shape)
+        pct[1:] = close[1:] / close[:-1] - 1
+        pct = np.nan_to_num(pct)
+
+        weights = self.target_weights(close)
+
+        # 1. 调仓点与所属区间起点
+        rebalance = np.ones(t_count, dtype=bool)
+        if self.rebalance == 'signal':
+            rebalance[1:] = (weights[1:] != weights[:-1]).any(axis=1)
+        seg_start = np.maximum.accumulate(np.where(rebalance, np.arange(t_count), 0))
+
+        # 2. 区间内权重随价格漂移: 各仓位相对区间起点组合净值的价值
+        log_growth = np.concatenate([np.zeros((1, n)), np.cumsum(np.log1p(pct), axis=0)])
+        seg_weights = weights[seg_start]
+        base = log_growth[seg_start]
+        value_end = seg_weights * np.exp(log_growth[1:] - base)
+        value_begin = seg_weights * np.exp(log_growth[:-1] - base)
+        cash = 1 - seg_weights.sum(axis=1)
+        nav_begin = cash + value_begin.sum(axis=1)
+        nav_end = cash + value_end.sum(axis=1)
+
+        contribution = (value_end - value_begin) / nav_begin[:, None]
+        gross_return = nav_end / nav_begin - 1
+
+        # 3. 调仓换手: 新目标权重 vs 上一根 K 线收盘时漂移后的权重
+        drifted = np.zeros((t_count, n))
+        drifted[1:] = value_end[:-1] / nav_end[:-1, None]
+        trade_weight = np.where(rebalance[:, None], np.abs(weights - drifted), 0.0)
+        cost = trade_weight * self.commission_rate
+
+        strategy_return = gross_return - cost.sum(axis=1)
+        available = ~np.isnan(close)
+        held = np.zeros(close.shape, dtype=bool)
+        held[1:] = available[:-1]
+        benchmark_return = np.divide((pct * held).sum(axis=1), held.sum(axis=1),
+                                     out=np.zeros(t_count), where=held.any(axis=1))
+
+        self.results = pd.DataFrame({
+            "timestamp": timestamps,
+            "strategy_return": strategy_return,
+            "exposure": 1 - cash / nav_begin,
+            "turnover": trade_weight.sum(axis=1),
+            "equity_curve": np.cumprod(1 + strategy_return) * self.initial_capital,
+            "benchmark_curve": np.cumprod(1 + benchmark_return) * self.initial_capital,
+        })
+
+        # 4. 分标的归因 (日贡献的算术累加，合计等于组合各日收益之和)
+        own_return = np.where(available[-1], close[-1] / close[np.argmax(available, axis=0), np.arange(n)] - 1, np.nan)
+        self.attribution = pd.DataFrame({
+            "Symbol": symbols,
+            "Contribution": contribution.sum(axis=0) - cost.sum(axis=0),
+            "Cost": cost.sum(axis=0),
+            "Avg Weight": (value_begin / nav_begin[:, None]).mean(axis=0),
+            "Exposure": (weights > 0).mean(axis=0),
+            "Trades": (np.diff(weights > 0, axis=0, prepend=False)).sum(axis=0),
+            "Buy & Hold": own_return,
+        }).sort_values("Contribution", ascending=False).reset_index(drop=True)
+
+        return self.results
+
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """计算组合绩效指标 (口径同 Backtester.get_performance_metrics)"""
+        if self.results is None or self.results.empty:
+            return {}
+
+        df = self.results
+        final = df['equity_curve'].iloc[-1]
+        total_return = final / self.initial_capital - 1
+        benchmark_return = df['benchmark_curve'].iloc[-1] / self.initial_capital - 1
+
+        days = (df['timestamp'].iloc[-1] - df['timestamp'].iloc[0]).days
+        years = days / 365.25 if days > 0 else 0
+        cagr = (final / self.initial_capital) ** (1 / years) - 1 if years > 0 else 0
+
+        rolling_max = df['equity_curve'].cummax()
+        max_drawdown = ((df['equity_curve'] - rolling_max) / rolling_max).min()
+
+        daily_returns = df['strategy_return']
+        ann = trading_calendar.periods_per_year(df['timestamp'].iloc[0], df['timestamp'].iloc[-1])
+        sharpe_ratio = daily_returns.mean() / daily_returns.std() * np.sqrt(ann) if daily_returns.std() != 0 else 0
+
+        return {
+            "Start Date": df['timestamp'].iloc[0].strftime('%Y-%m-%d'),
+            "End Date": df['timestamp'].iloc[-1].strftime('%Y-%m-%d'),
+            "Duration (Days)": days,
+            "Symbols": len(self.attribution),
+            "Initial Capital": self.initial_capital,
+            "Final Equity": final,
+            "Total Return": f"{total_return:.2%}",
+            "Benchmark Return": f"{benchmark_return:.2%}",
+            "CAGR": f"{cagr:.2%}",
+            "Max Drawdown": f"{max_drawdown:.2%}",
+            "Sharpe Ratio": f"{sharpe_ratio:.2f}",
+            "Avg Exposure": f"{df['exposure'].mean():.2%}",
+            "Total Turnover": f"{df['turnover'].sum():.2f}",
+        }
@@ -0,0 +1,306 @@
+import os
+import json
+import math
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+from src.core.strategy import Strategy
+from src.core import trading_calendar
+from src.utils.logger import get_logger
+
+class ColumnWriter:
+    """
+    逐块追加写入结果列，结束时生成与 BarStore 相同布局的 .npy 文件 + meta.json
+
+    数据先顺序写入 .part 临时文件，close() 时补上 .npy 文件头并原子替换，
+    写入过程中只占用一个块的内存。
+    """
+    def __init__(self, output_dir: str, dtypes: Dict[str, str]):
+        self.dir = Path(output_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in dtypes.items()}
+        self.rows = 0
+        self._parts = {name: open(self.dir / f"{name}.npy.part", 'wb') for name in self.dtypes}
+
+    def append(self, columns: Dict[str, np.ndarray]):
+        n = None
+        for name, f in self._parts.items():
+            arr = np.ascontiguousarray(columns[name], dtype=self.dtypes[name])
+            n = len(arr) if n is None else n
+            f.write(arr.tobytes())
+        self.rows += n or 0
+
+    def close(self, meta: Dict[str, Any] = None):
+        for name, f in self._parts.items():
+            f.close()
+            part = self.dir / f"{name}.npy.part"
+            tmp = self.dir / f"{name}.npy.tmp"
+            header = {"descr": np.lib.format.dtype_to_descr(self.dtypes[name]), "fortran_order": False, "shape": (self.rows,)}
+            with open(tmp, 'wb') as out, open(part, 'rb') as src:
+                np.lib.format.write_array_header_1_0(out, header)
+                shutil.copyfileobj(src, out, length=1 << 20)
+            os.replace(tmp, self.dir / f"{name}.npy")
+            part.unlink()
+        self._parts = {}
+
+        tmp_meta = self.dir / "meta.json.tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({"rows": self.rows, **(meta or {})}, f, default=str)
+        os.replace(tmp_meta, self.dir / "meta.json")
+
+class StreamingRollingMean:
+    """
+    可跨块续算的简单移动平均，逐位复现 pandas rolling(window).mean() 的结果
+
+    pandas 的滚动均值带 Kahan 补偿的增减累加，数值依赖从序列起点开始的全部历史，
+    截取尾部重新 rolling 会在均线相等附近产生末位差异并改变信号。这里保存同样的
+    累加状态逐根推进，使分块结果与整列计算完全一致。
+    """
+    def __init__(self, window: int):
+        self.window = window
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._nobs = 0
+        self._neg = 0
+        self._same = 0
+        self._prev = math.nan
+        self._tail = []
+
+    def update(self, values: np.ndarray) -> np.ndarray:
+        window = self.window
+        sum_x, comp_add, comp_remove = self._sum, self._comp_add, self._comp_remove
+        nobs, neg, same, prev = self._nobs, self._neg, self._same, self._prev
+        history = self._tail + values.tolist()
+        offset = len(self._tail)
+        out = np.empty(len(values))
+
+        for i in range(offset, len(history)):
+            # 先移出窗口外的值，再加入新值 (与 pandas 的顺序一致)
+            if nobs >= window:
+                old = history[i - window]
+                nobs -= 1
+                y = -old - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    neg -= 1
+
+            val = history[i]
+            nobs += 1
+            y = val - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, val) < 0:
+                neg += 1
+            same = same + 1 if val == prev else 1
+            prev = val
+
+            if nobs >= window:
+                result = sum_x / nobs
+                if same >= nobs:
+                    result = prev
+                elif neg == 0 and result < 0:
+                    result = 0.0
+                elif neg == nobs and result > 0:
+                    result = 0.0
+                out[i - offset] = result
+            else:
+                out[i - offset] = math.nan
+
+        self._sum, self._comp_add, self._comp_remove = sum_x, comp_add, comp_remove
+        self._nobs, self._neg, self._same, self._prev = nobs, neg, same, prev
+        self._tail = history[-window:]
+        return out
+
+class StreamingBacktester:
+    """
+    分块流式回测: 逐块消费 K 线，跨块保留均线窗口尾部、持仓与资金曲线状态，
+    结果逐块写盘，内存占用只与块大小有关
+
+    规则与 Backtester.run 完全一致 (丢弃均线预热期、信号滞后一期、按换手扣费)，
+    写出的结果列与整列计算逐位相同；绩效指标口径同 Backtester.get_performance_metrics。
+    """
+    RESULT_COLUMNS = {
+        'timestamp': 'datetime64[ns]',
+        'close': 'float64',
+        'position_signal': 'int64',
+        'position': 'float64',
+        'pct_change': 'float64',
+        'strategy_return': 'float64',
+        'trade_action': 'float64',
+        'equity_curve': 'float64',
+        'benchmark_curve': 'float64',
+    }
+
+    def __init__(self, strategy: Strategy, initial_capital: float = 100000.0, commission_rate: float = 0.001):
+        self.logger = get_logger("streaming_backtest")
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.reset()
+
+    def reset(self):
+        self._short_ma = StreamingRollingMean(self.strategy.short_window)
+        self._long_ma = StreamingRollingMean(self.strategy.long_window)
+        self._prev_close = None
+        self._prev_signal = 0
+        self._prev_position = 0.0
+        self._equity = 1.0
+        self._benchmark = 1.0
+        self._peak = -np.inf
+        # 绩效统计 (Welford 合并均值 / 方差)
+        self.rows = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._trades = 0.0
+        self._max_drawdown = 0.0
+        self._first_ts = None
+        self._last_ts = None
+
+    def process_chunk(self, chunk: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        处理一块按时间升序的 K 线 (需含 timestamp / close)，返回本块产生的结果列
+        """
+        close = chunk['close'].to_numpy(dtype=np.float64)
+        timestamps = chunk['timestamp'].to_numpy(dtype='datetime64[ns]')
+        short_ma = self._short_ma.update(close)
+        long_ma = self._long_ma.update(close)
+        valid = ~(np.isnan(short_ma) | np.isnan(long_ma))
+        if not valid.any():
+            return {}
+
+        close, timestamps = close[valid], timestamps[valid]
+        signal = (short_ma[valid] > long_ma[valid]).astype(np.int64)
+
+        # 与上一块衔接: 首行的前值取自上一块的末行 (全局首行则按 Backtester 填 0)
+        position = np.empty(len(signal))
+        position[0] = self._prev_signal
+        position[1:] = signal[:-1]
+
+        prev_close = np.empty(len(close))
+        prev_close[0] = close[0] if self._prev_close is None else self._prev_close
+        prev_close[1:] = close[:-1]
+        pct_change = close / prev_close - 1
+
+        prev_position = np.empty(len(position))
+        prev_position[0] = self._prev_position
+        prev_position[1:] = position[:-1]
+        trade_action = np.abs(position - prev_position)
+
+        strategy_return = position * pct_change - trade_action * self.commission_rate
+
+        # 累乘从上一块的末值续接，与整列 cumprod 的运算顺序一致
+        growth = 1 + strategy_return
+        growth[0] *= self._equity
+        equity = np.cumprod(growth)
+        bench = 1 + pct_change
+        bench[0] *= self._benchmark
+        benchmark = np.cumprod(bench)
+
+        self._prev_signal = int(signal[-1])
+        self._prev_position = float(position[-1])
+        self._prev_close = float(close[-1])
+        self._equity = float(equity[-1])
+        self._benchmark = float(benchmark[-1])
+
+        equity_curve = equity * self.initial_capital
+        benchmark_curve = benchmark * self.initial_capital
+        self._update_stats(timestamps, strategy_return, trade_action, equity_curve)
+
+        return {
+            'timestamp': timestamps,
+            'close': close,
+            'position_signal': signal,
+            'position': position,
+            'pct_change': pct_change,
+            'strategy_return': strategy_return,
+            'trade_action': trade_action,
+            'equity_curve': equity_curve,
+            'benchmark_curve': benchmark_curve,
+        }
+
+    def _update_stats(self, timestamps, strategy_return, trade_action, equity_curve):
+        n = len(strategy_return)
+        mean = strategy_return.mean()
+        m2 = ((strategy_return - mean) ** 2).sum()
+        total = self.rows + n
+        delta = mean - self._mean
+        self._mean += delta * n / total
+        self._m2 += m2 + delta * delta * self.rows * n / total
+        self.rows = total
+
+        self._trades += trade_action.sum()
+        running_max = np.maximum.accumulate(np.maximum(equity_curve, self._peak))
+        self._peak = float(running_max[-1])
+        self._max_drawdown = min(self._max_drawdown, float(((equity_curve - running_max) / running_max).min()))
+
+        if self._first_ts is None:
+            self._first_ts = pd.Timestamp(timestamps[0])
+        self._last_ts = pd.Timestamp(timestamps[-1])
+
+    def run(self, chunks: Iterable[pd.DataFrame], output_dir: Optional[str] = None,
+            meta: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        消费全部 K 线块并返回绩效指标；指定 output_dir 时结果列逐块写入该目录
+
+        Args:
+            chunks: 按时间升序的 K 线块 (e.g., BarStore.iter_chunks(...))
+        """
+        self.reset()
+        writer = ColumnWriter(output_dir, self.RESULT_COLUMNS) if output_dir else None
+        try:
+            for chunk in chunks:
+                result = self.process_chunk(chunk)
+                if writer and result:
+                    writer.append(result)
+        except BaseException:
+            if writer:
+                writer.close({"error": "incomplete"})
+            raise
+
+        metrics = self.get_performance_metrics()
+        if writer:
+            writer.close({
+                "short_window": self.strategy.short_window,
+                "long_window": self.strategy.long_window,
+                **(meta or {}),
+                "metrics": metrics,
+            })
+            self.logger.info(f"Wrote {writer.rows} result rows to {output_dir}")
+        return metrics
+
+    def get_performance_metrics(self) -> Dict[str, Any]:
+        """计算回测绩效指标 (口径同 Backtester.get_performance_metrics)"""
+        if self.rows == 0:
+            return {}
+
+        final_equity = self._equity * self.initial_capital
+        total_return = final_equity / self.initial_capital - 1
+        benchmark_return = (self._benchmark * self.initial_capital) / self.initial_capital - 1
+
+        days = (self._last_ts - self._first_ts).days
+        years = days / 365.25 if days > 0 else 0
+        cagr = (final_equity / self.initial_capital) ** (1 / years) - 1 if years > 0 else 0
+
+        std = np.sqrt(self._m2 / (self.rows - 1)) if self.rows > 1 else 0
+        ann = trading_calendar.periods_per_year(self._first_ts, self._last_ts)
+        sharpe_ratio = (self._mean / std) * np.sqrt(ann) if std != 0 else 0
+
+        return {
+            "Start Date": self._first_ts.strftime('%Y-%m-%d'),
+            "End Date": self._last_ts.strftime('%Y-%m-%d'),
+            "Duration (Days)": days,
+            "Initial Capital": self.initial_capital,
+            "Final Equity": final_equity,
+            "Total Return": f"{total_return:.2%}",
+            "Benchmark Return": f"{benchmark_return:.2%}",
+            "CAGR": f"{cagr:.2%}",
+            "Max Drawdown": f"{self._max_drawdown:.2%}",
+            "Sharpe Ratio": f"{sharpe_ratio:.2f}",
+            "Total Trades": int(self._trades)
+        }
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+from src.core import trading_calendar
+
+# 单批处理的 (参数组合 × K 线) 元素上限，控制二维中间数组的内存
+MAX_CHUNK_ELEMENTS = 4_000_000
+
+def sma_table(close: np.ndarray, windows: Iterable[int]) -> Dict[int, np.ndarray]:
+    """
+    基于同一条累加和数组计算多个窗口的简单移动平均
+
+    前 window - 1 个值为 NaN，与 pandas rolling(window).mean() 对齐。
+    累加前减去首个价格以降低大数累加的舍入误差。
+    """
+    close = np.asarray(close, dtype=np.float64)
+    base = close[0] if len(close) else 0.0
+    csum = np.concatenate(([0.0], np.cumsum(close - base)))
+    table = {}
+    for w in sorted(set(windows)):
+        sma = np.full(len(close), np.nan)
+        if w <= len(close):
+            sma[w - 1:] = (csum[w:] - csum[:-w]) / w + base
+        table[w] = sma
+    return table
+
+def parameter_grid(short_windows: Iterable[int], long_windows: Iterable[int]) -> List[Tuple[int, int]]:
+    """所有 short < long 的组合"""
+    return [(s, l) for s in sorted(set(short_windows)) for l in sorted(set(long_windows)) if s < l]
+
+def simulate_positions(close: np.ndarray, short_ma: np.ndarray, long_ma: np.ndarray,
+                       commission_rate: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    对一批参数组合同时计算持仓与策略收益 (与 Backtester.run 的规则一致)
+
+    Args:
+        short_ma / long_ma: (组合数, K线数) 的均线矩阵
+
+    Returns:
+        (strategy_return, trade_action): 均为 (组合数, K线数)
+    """
+    pct = np.zeros(len(close))
+    pct[1:] = close[1:] / close[:-1] - 1
+
+    # 短均线 > 长均线 持有，NaN 比较为 False 即空仓
+    signal = (short_ma > long_ma).astype(np.float64)
+    position = np.zeros_like(signal)
+    position[:, 1:] = signal[:, :-1]
+
+    trade_action = np.zeros_like(position)
+    trade_action[:, 1:] = np.abs(np.diff(position, axis=1))
+
+    strategy_return = position * pct - trade_action * commission_rate
+    return strategy_return, trade_action
+
+def run_sweep(data: pd.DataFrame, short_windows: Iterable[int], long_windows: Iterable[int],
+              initial_capital: float = 100000.0, commission_rate: float = 0.001,
+              periods_per_year: float = None) -> pd.DataFrame:
+    """
+    向量化参数扫描：一次计算所有窗口的均线，按批评估整张参数网格
+
+    每个组合的统计区间从其长均线首个有效值开始，与单独运行 Backtester 的结果一致。
+    data 也可以是 BarStore.open 返回的内存映射视图 (已按时间排序，直接读取列数组)。
+    periods_per_year 为夏普的年化系数，默认按交易日历取数据区间内每年的交易日数。
+
+    Returns:
+        pd.DataFrame: 每个 (short, long) 一行，含 CAGR / Sharpe / Max Drawdown / Total Return / Trades
+    """
+    pairs = parameter_grid(short_windows, long_windows)
+    if data.empty or not pairs:
+        return pd.DataFrame()
+
+    df = data.sort_values('timestamp') if isinstance(data, pd.DataFrame) and 'timestamp' in data.columns else data
+    close = np.asarray(df['close'], dtype=np.float64)
+    timestamps = np.asarray(df['timestamp'], dtype='datetime64[ns]')
+    n = len(close)
+    if periods_per_year is None:
+        periods_per_year = trading_calendar.periods_per_year(timestamps[0], timestamps[-1])
+
+    smas = sma_table(close, [w for p in pairs for w in p])
+    chunk = max(MAX_CHUNK_ELEMENTS // max(n, 1), 1)
+    rows = []
+
+    for i in range(0, len(pairs), chunk):
+        batch = pairs[i:i + chunk]
+        short_ma = np.stack([smas[s] for s, _ in batch])
+        long_ma = np.stack([smas[l] for _, l in batch])
+        strategy_return, trade_action = simulate_positions(close, short_ma, long_ma, commission_rate)
+
+        equity = np.cumprod(1 + strategy_return, axis=1) * initial_capital
+        running_max = np.maximum.accumulate(equity, axis=1)
+        max_drawdown = ((equity - running_max) / running_max).min(axis=1)
+
+        # 统计区间: [long - 1, n)，之前的收益恒为 0
+        start = np.array([l - 1 for _, l in batch])
+        valid = np.arange(n)[None, :] >= start[:, None]
+        count = valid.sum(axis=1)
+        mean = strategy_return.sum(axis=1) / np.maximum(count, 1)
+        centered = np.where(valid, strategy_return - mean[:, None], 0.0)
+        std = np.sqrt((centered ** 2).sum(axis=1) / np.maximum(count - 1, 1))
+        sharpe = np.divide(mean, std, out=np.zeros_like(mean), where=std > 0) * np.sqrt(periods_per_year)
+
+        for j, (s, l) in enumerate(batch):
+            if count[j] <= 0:
+                continue
+            days = (timestamps[-1] - timestamps[start[j]]).astype('timedelta64[D]').astype(int)
+            years = days / 365.25 if days > 0 else 0
+            final = equity[j, -1]
+            rows.append({
+                "short": s,
+                "long": l,
+                "CAGR": (final / initial_capital) ** (1 / years) - 1 if years > 0 else 0.0,
+                "Sharpe": sharpe[j],
+                "Max Drawdown": max_drawdown[j],
+                "Total Return": final / initial_capital - 1,
+                "Trades": int(trade_action[j].sum()),
+            })
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,143 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Tuple
+from src.backtest.sweep import sma_table, parameter_grid, simulate_positions, MAX_CHUNK_ELEMENTS
+from src.core import trading_calendar
+
+SELECTION_METRICS = ('Sharpe', 'Total Return')
+
+def plan_folds(n: int, train_bars: int, test_bars: int, start: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    滚动窗口切分: 每折为 (训练起点, 训练终点/测试起点, 测试终点)，左闭右开
+    测试窗口首尾相接，最后一折的测试窗口可以不足 test_bars
+    """
+    folds = []
+    train_start = start
+    while train_start + train_bars < n:
+        test_start = train_start + train_bars
+        folds.append((train_start, test_start, min(test_start + test_bars, n)))
+        train_start += test_bars
+    return folds
+
+def _score_chunk(close: np.ndarray, smas: Dict[int, np.ndarray], pairs: List[Tuple[int, int]],
+                 folds: np.ndarray, metric: str, commission_rate: float, periods_per_year: int) -> np.ndarray:
+    """
+    计算一批参数组合在每一折训练窗口上的评分，返回 (组合数, 折数)
+
+    整段历史的收益只算一次，各折窗口的统计量由前缀和相减得到，
+    因此折数再多也不会重复回测。
+    """
+    short_ma = np.stack([smas[s] for s, _ in pairs])
+    long_ma = np.stack([smas[l] for _, l in pairs])
+    ret, _ = simulate_positions(close, short_ma, long_ma, commission_rate)
+
+    zeros = np.zeros((len(pairs), 1))
+    s, e = folds[:, 0], folds[:, 1]
+    count = (e - s).astype(np.float64)
+
+    if metric == 'Total Return':
+        c_log = np.concatenate([zeros, np.cumsum(np.log1p(ret), axis=1)], axis=1)
+        return np.expm1(c_log[:, e] - c_log[:, s])
+
+    c1 = np.concatenate([zeros, np.cumsum(ret, axis=1)], axis=1)
+    c2 = np.concatenate([zeros, np.cumsum(ret * ret, axis=1)], axis=1)
+    total = c1[:, e] - c1[:, s]
+    mean = total / count
+    var = np.maximum((c2[:, e] - c2[:, s]) - count * mean * mean, 0) / np.maximum(count - 1, 1)
+    std = np.sqrt(var)
+    return np.divide(mean, std, out=np.full_like(mean, -np.inf), where=std > 1e-12) * np.sqrt(periods_per_year)
+
+def run_walkforward(data: pd.DataFrame, short_windows: Iterable[int], long_windows: Iterable[int],
+                    train_bars: int = 504, test_bars: int = 126, metric: str = 'Sharpe',
+                    initial_capital: float = 100000.0, commission_rate: float = 0.001,
+                    periods_per_year: float = None, max_workers: int = None) -> Dict[str, Any]:
+    """
+    滚动前推优化: 每个训练窗口选出最优均线组合，在紧随其后的测试窗口中执行，
+    各测试窗口的持仓首尾相连得到样本外资金曲线 (换参时的调仓成本也计入)
+
+    所有窗口的均线只计算一次；参数组合按批分给线程池并行评分
+    (NumPy 运算期间释放 GIL)，每批内所有折一次性向量化完成。
+
+    Returns:
+        {"folds": 每折所选参数与样本内外表现 DataFrame,
+         "equity": 样本外 timestamp / equity_curve / benchmark_curve DataFrame}
+    """
+    if metric not in SELECTION_METRICS:
+        raise ValueError(f"Unsupported selection metric: {metric}")
+
+    pairs = parameter_grid(short_windows, long_windows)
+    if data.empty or not pairs:
+        return {"folds": pd.DataFrame(), "equity": pd.DataFrame()}
+
+    df = data.sort_values('timestamp').reset_index(drop=True) if isinstance(data, pd.DataFrame) else data.to_frame()
+    close = np.asarray(df['close'], dtype=np.float64)
+    n = len(close)
+    if periods_per_year is None:
+        periods_per_year = trading_calendar.periods_per_year(df['timestamp'].iloc[0], df['timestamp'].iloc[-1])
+
+    # 第一折训练窗口从所有组合的均线都有效之后开始，避免预热期偏差
+    warmup = max(l for _, l in pairs)
+    fold_list = plan_folds(n, train_bars, test_bars, start=warmup)
+    if not fold_list:
+        return {"folds": pd.DataFrame(), "equity": pd.DataFrame()}
+    folds = np.array(fold_list)
+
+    smas = sma_table(close, [w for p in pairs for w in p])
+
+    # 1. 并行评分: 每批 (组合数 × K线数) 控制在内存上限内
+    chunk = max(MAX_CHUNK_ELEMENTS // max(n, 1), 1)
+    batches = [pairs[i:i + chunk] for i in range(0, len(pairs), chunk)]
+    workers = max_workers or min(len(batches), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scores = list(executor.map(
+            lambda b: _score_chunk(close, smas, b, folds, metric, commission_rate, periods_per_year),
+            batches
+        ))
+    scores = np.concatenate(scores, axis=0)
+    best = np.argmax(scores, axis=0)
+
+    # 2. 拼接样本外持仓: 每个测试窗口使用该折选出的组合
+    pct = np.zeros(n)
+    pct[1:] = close[1:] / close[:-1] - 1
+    position = np.zeros(n)
+    for (_, test_start, test_end), p in zip(fold_list, best):
+        s, l = pairs[p]
+        signal = (smas[s] > smas[l]).astype(np.float64)
+        position[test_start:test_end] = signal[test_start - 1:test_end - 1]
+
+    oos_start, oos_end = folds[0, 1], folds[-1, 2]
+    pos = position[oos_start:oos_end]
+    trade_action = np.abs(np.diff(pos, prepend=0.0))
+    oos_return = pos * pct[oos_start:oos_end] - trade_action * commission_rate
+    # 样本外首日的涨跌由此前持仓决定，与基准一样从 0 开始
+    oos_pct = pct[oos_start:oos_end].copy()
+    oos_pct[0] = 0.0
+    oos_return[0] = -trade_action[0] * commission_rate
+
+    equity = pd.DataFrame({
+        "timestamp": df['timestamp'].iloc[oos_start:oos_end].to_numpy(),
+        "strategy_return": oos_return,
+        "equity_curve": np.cumprod(1 + oos_return) * initial_capital,
+        "benchmark_curve": np.cumprod(1 + oos_pct) * initial_capital,
+    })
+
+    rows = []
+    ts = df['timestamp']
+    for k, ((train_start, test_start, test_end), p) in enumerate(zip(fold_list, best)):
+        r = oos_return[test_start - oos_start:test_end - oos_start]
+        std = r.std(ddof=1) if len(r) > 1 else 0.0
+        rows.append({
+            "fold": k + 1,
+            "train_start": ts.iloc[train_start],
+            "test_start": ts.iloc[test_start],
+            "test_end": ts.iloc[test_end - 1],
+            "short": pairs[p][0],
+            "long": pairs[p][1],
+            f"IS {metric}": scores[p, k],
+            "OOS Return": np.prod(1 + r) - 1,
+            "OOS Sharpe": r.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0,
+        })
+
+    return {"folds": pd.DataFrame(rows), "equity": equity}
@@ -87,3 +87,46 @@ def positions(symbol):
         console.print(table)
     except Exception as e:
         console.print(f"[red]查询持仓失败:[/red] {e}")
+
+@account_cmd.command()
+@click.option('--account', 'name', help='显示指定模拟账户的持仓')
+@click.option('--compact', is_flag=True, help='压缩账本 (每个账户保留一条快照)')
+@click.pass_context
+def paper(ctx, name, compact):
+    """查看模拟盘账户 (本地账本，无需访问 API)"""
+    from src.core.paper_broker import PaperBroker
+
+    broker = PaperBroker((ctx.obj or {}).get('CONFIG') or {})
+    try:
+        if compact:
+            broker.compact()
+        if name:
+            account = next((a for a in broker.accounts() if a.name == name), None)
+            if account is None:
+                console.print(f"[yellow]模拟账户 {name} 不存在[/yellow]")
+                return
+            table = Table(title=f"模拟账户 {name} 持仓")
+            for col in ("Symbol", "Qty", "Avg Cost", "Last", "Mkt Value", "Unrealized P/L"):
+                table.add_column(col, justify="left" if col == "Symbol" else "right")
+            for p in account.get_positions():
+                color = "green" if p['profit_loss'] >= 0 else "red"
+                table.add_row(p['symbol'], str(p['quantity']), f"{p['cost_price']:.2f}", f"{p['current_price']:.2f}",
+                              f"{p['market_value']:,.2f}", f"[{color}]{p['profit_loss']:,.2f}[/{color}]")
+            console.print(table)
+            return
+
+        accounts = broker.accounts()
+        if not accounts:
+            console.print("[yellow]暂无模拟账户 (run --mode paper 运行后自动开户)[/yellow]")
+            return
+        table = Table(title="模拟盘账户")
+        for col in ("Account", "Equity", "Cash", "Realized", "Unrealized", "Return %", "Trades", "Open"):
+            table.add_column(col, justify="left" if col == "Account" else "right")
+        for s in (a.summary() for a in accounts):
+            color = "green" if s['return_pct'] >= 0 else "red"
+            table.add_row(s['account'], f"{s['equity']:,.2f}", f"{s['cash']:,.2f}", f"{s['realized_pnl']:,.2f}",
+                          f"{s['unrealized_pnl']:,.2f}", f"[{color}]{s['return_pct']:.2f}[/{color}]",
+                          str(s['trades']), str(s['open_orders']))
+        console.print(table)
+    finally:
+        broker.close()
@@ -1,14 +1,46 @@
 import click
+import numpy as np
+import pandas as pd
 import plotext as plt
 from rich.console import Console
 from rich.table import Table
 from src.core.data_fetcher import DataFetcher
 from src.core.strategy import Strategy
 from src.backtest.engine import Backtester
+from src.backtest.sweep import run_sweep
+from src.backtest.batch import BatchBacktester
+from src.backtest.walkforward import run_walkforward
+from src.backtest.montecarlo import MonteCarloAnalyzer, path_metrics
+from src.backtest.portfolio import PortfolioBacktester
+from src.backtest.streaming import StreamingBacktester
+from src.core.bar_store import BarStore
+from src.backtest.execution import ExecutionSimulator
+from src.core import trading_calendar
 
 console = Console()
 
-@click.command(name='backtest')
+def _fetch_backtest_data(config, symbol, days, long_window):
+    """获取回测所需的日线数据 (为计算初始 MA 多取一段)"""
+    fetcher = DataFetcher(config)
+    fetch_count = days + long_window + 10
+    
+    with console.status("[green]正在获取历史数据...[/green]"):
+        return fetcher.get_historical_klines(symbol, period='day', count=fetch_count)
+
+def _load_backtest_data(config, symbol, days, long_window, local=False, start=None, end=None):
+    """
+    获取回测数据: 默认经 DataFetcher 拉取；local 时以内存映射方式打开本地缓存 (零拷贝)，
+    指定 start / end 时按日期二分切片，并向前多留 long_window 根K线用于计算初始 MA
+    """
+    if not local:
+        return _fetch_backtest_data(config, symbol, days, long_window)
+
+    view = DataFetcher(config).open_local(symbol, 'day', end=end)
+    if start is None:
+        return view.tail(days + long_window + 10)
+    return view.iloc(max(view.locate(start) - long_window, 0))
+
+@click.group(name='backtest', invoke_without_command=True)
 @click.option('--symbol', '-s', help='回测标的代码')
 @click.option(
     '--days', '-d', 
@@ -17,13 +49,22 @@ console = Console()
 )
 @click.option('--capital', default=100000.0, help='初始资金')
 @click.option('--plot/--no-plot', default=True, help='是否显示资金曲线图')
+@click.option('--execution', is_flag=True, help='按 order_execution 配置模拟次日开盘执行并统计滑点')
+@click.option('--intraday', type=click.Choice(['1m', '5m', '15m', '30m']), default=None, help='执行模拟使用的分钟K线周期 (默认仅用日线近似)')
+@click.option('--local', is_flag=True, help='直接读取本地K线缓存 (内存映射，不访问 API)')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='本地回测起始日期 (配合 --local)')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='本地回测结束日期 (配合 --local)')
 @click.pass_context
-def backtest_cmd(ctx, symbol, days, capital, plot):
+def backtest_cmd(ctx, symbol, days, capital, plot, execution, intraday, local, start, end):
     """
     运行策略回测
     
     分析指定标的在 SPY 双均线策略下的历史表现。
     """
+    if ctx.invoked_subcommand is None:
+        _run_backtest(ctx, symbol, days, capital, plot, execution, intraday, local, start, end)
+
+def _run_backtest(ctx, symbol, days, capital, plot, execution=False, intraday=None, local=False, start=None, end=None):
     config = ctx.obj.get('CONFIG') or {}
     
     # 参数优先级：命令行 > 配置文件 > 默认 SPY.US
@@ -33,15 +74,13 @@ def backtest_cmd(ctx, symbol, days, capital, plot):
     
     console.print(f"[bold blue]开始回测:[/bold blue] {target_symbol}")
     console.print(f"策略参数: MA{short_window} vs MA{long_window}")
-    console.print(f"时间范围: 最近 {days} 天")
+    if local and (start or end):
+        console.print(f"时间范围: {start.date() if start else '最早'} ~ {end.date() if end else '最新'} (本地缓存)")
+    else:
+        console.print(f"时间范围: 最近 {days} 天")
     
     # 1. 获取数据
-    fetcher = DataFetcher(config)
-    # 为计算初始 MA，多取一点数据
-    fetch_count = days + long_window + 10
-    
-    with console.status("[green]正在获取历史数据...[/green]"):
-        df = fetcher.get_historical_klines(target_symbol, period='day', count=fetch_count)
+    df = _load_backtest_data(config, target_symbol, days, long_window, local, start, end)
     
     if df.empty:
         console.print("[red]获取数据失败，回测终止[/red]")
@@ -104,3 +143,423 @@ def backtest_cmd(ctx, symbol, days, capital, plot):
                 f"[{pnl_color}]{pnl_str}[/{pnl_color}]"
             )
         console.print(log_table)
+
+    # 3.4 执行模拟
+    if execution:
+        _show_execution_report(config, target_symbol, engine, days, intraday)
+
+def _show_execution_report(config, symbol, engine, days, intraday):
+    """按 order_execution 配置模拟交易记录的次日执行，输出滑点分布"""
+    intraday_df = None
+    if intraday:
+        bars_per_day = {'1m': 390, '5m': 78, '15m': 26, '30m': 13}[intraday]
+        with console.status(f"[green]正在获取 {intraday} K线...[/green]"):
+            intraday_df = DataFetcher(config).get_historical_klines(symbol, period=intraday, count=days * bars_per_day * 252 // 365)
+        if intraday_df.empty:
+            console.print(f"[yellow]未获取到 {intraday} K线，改用日线近似[/yellow]")
+
+    simulator = ExecutionSimulator(config)
+    fills = simulator.simulate_trades(engine.results, engine.get_trade_frame(), intraday_df)
+    report = simulator.slippage_report(fills)
+    if not report:
+        console.print("[yellow]没有可模拟执行的交易[/yellow]")
+        return
+
+    mode = f"{intraday} K线" if intraday_df is not None and not intraday_df.empty else "日线近似"
+    table = Table(title=f"执行模拟 ({simulator.strategy}, {mode})")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="bold yellow")
+    for k, v in report.items():
+        table.add_row(k, str(v))
+    console.print(table)
+
+def _parse_range(text: str) -> list:
+    """解析窗口范围: '5:30' / '5:30:5' (含终点) 或 '5,10,20'"""
+    if ':' in text:
+        parts = [int(x) for x in text.split(':')]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + 1, step))
+    return [int(x) for x in text.split(',') if x.strip()]
+
+def _heat_color(value: float, lo: float, hi: float) -> str:
+    if hi <= lo:
+        return "white"
+    ratio = (value - lo) / (hi - lo)
+    if ratio >= 0.8:
+        return "bold green"
+    if ratio >= 0.6:
+        return "green"
+    if ratio >= 0.4:
+        return "yellow"
+    if ratio >= 0.2:
+        return "red"
+    return "bold red"
+
+@backtest_cmd.command()
+@click.option('--symbol', '-s', help='回测标的代码')
+@click.option('--days', '-d', default=365*5, help='回测天数 (默认 5 年)')
+@click.option('--capital', default=100000.0, help='初始资金')
+@click.option('--short', 'short_range', default='3:30', help='短均线窗口范围 (start:stop[:step] 或逗号分隔)')
+@click.option('--long', 'long_range', default='10:200:5', help='长均线窗口范围 (start:stop[:step] 或逗号分隔)')
+@click.option('--metric', type=click.Choice(['Sharpe', 'CAGR', 'Max Drawdown', 'Total Return']), default='Sharpe', help='热力图与排序指标')
+@click.option('--top', default=10, help='显示排名前 N 的参数组合')
+@click.option('--local', is_flag=True, help='直接读取本地K线缓存 (内存映射，不访问 API)')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='本地数据起始日期 (配合 --local)')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='本地数据结束日期 (配合 --local)')
+@click.pass_context
+def sweep(ctx, symbol, days, capital, short_range, long_range, metric, top, local, start, end):
+    """双均线参数网格扫描 (向量化)"""
+    config = ctx.obj.get('CONFIG') or {}
+    target_symbol = symbol if symbol else config.get('symbol', 'SPY.US')
+    short_windows = _parse_range(short_range)
+    long_windows = _parse_range(long_range)
+
+    console.print(f"[bold blue]参数扫描:[/bold blue] {target_symbol}  短均线 {short_range}  长均线 {long_range}", emoji=False)
+    df = _load_backtest_data(config, target_symbol, days, max(long_windows), local, start, end)
+    if df.empty:
+        console.print("[red]获取数据失败，扫描终止[/red]")
+        return
+
+    with console.status("[green]正在计算参数网格...[/green]"):
+        result = run_sweep(df, short_windows, long_windows, initial_capital=capital)
+
+    if result.empty:
+        console.print("[yellow]没有有效的参数组合 (需要 short < long 且数据足够)[/yellow]")
+        return
+
+    # 1. 热力图: 行为短均线，列为长均线
+    grid = result.pivot(index='short', columns='long', values=metric)
+    values = grid.to_numpy()
+    lo, hi = np.nanmin(values), np.nanmax(values)
+    pct_metric = metric != 'Sharpe'
+
+    heatmap = Table(title=f"{metric} 热力图 ({target_symbol})", show_lines=False)
+    heatmap.add_column("S\\L", style="cyan", justify="right")
+    for l in grid.columns:
+        heatmap.add_column(str(l), justify="right")
+    for s_win, row in grid.iterrows():
+        cells = []
+        for v in row:
+            if pd.isna(v):
+                cells.append("")
+            else:
+                text = f"{v * 100:.0f}" if pct_metric else f"{v:.2f}"
+                cells.append(f"[{_heat_color(v, lo, hi)}]{text}[/]")
+        heatmap.add_row(str(s_win), *cells)
+    console.print(heatmap)
+    if pct_metric:
+        console.print("[dim]单位: %[/dim]")
+
+    # 2. 排名表
+    ranked = result.sort_values(metric, ascending=False).head(top)
+    table = Table(title=f"按 {metric} 排名前 {len(ranked)} 的参数组合")
+    for col in ("MA", "CAGR", "Sharpe", "Max Drawdown", "Total Return", "Trades"):
+        table.add_column(col, justify="right")
+    for _, r in ranked.iterrows():
+        table.add_row(
+            f"{int(r['short'])}/{int(r['long'])}",
+            f"{r['CAGR']:.2%}",
+            f"{r['Sharpe']:.2f}",
+            f"{r['Max Drawdown']:.2%}",
+            f"{r['Total Return']:.2%}",
+            str(int(r['Trades']))
+        )
+    console.print(table)
+
+@backtest_cmd.command()
+@click.option('--symbols', '-s', help='标的列表，逗号分隔 (默认使用配置中的 symbol)')
+@click.option('--pairs', '-p', help='均线参数列表 short/long，逗号分隔 (e.g., 5/20,10/50)')
+@click.option('--days', '-d', default=365*2, help='回测天数 (默认 730天 / 2年)')
+@click.option('--capital', default=100000.0, help='初始资金')
+@click.option('--workers', '-w', type=int, default=None, help='并行进程数 (默认 CPU 核数)')
+@click.pass_context
+def batch(ctx, symbols, pairs, days, capital, workers):
+    """多标的 × 多参数并行回测"""
+    config = ctx.obj.get('CONFIG') or {}
+    symbol_list = [x.strip() for x in symbols.split(',')] if symbols else [config.get('symbol', 'SPY.US')]
+
+    if pairs:
+        strategy_configs = []
+        for item in pairs.split(','):
+            short_w, long_w = (int(x) for x in item.split('/'))
+            strategy_configs.append({'short_ma_period': short_w, 'long_ma_period': long_w})
+    else:
+        strategy_configs = [config.get('strategy', {})]
+
+    max_long = max(c.get('long_ma_period', 20) for c in strategy_configs)
+    data = {}
+    for sym in symbol_list:
+        df = _fetch_backtest_data(config, sym, days, max_long)
+        if df.empty:
+            console.print(f"[yellow]{sym} 获取数据失败，已跳过[/yellow]")
+            continue
+        data[sym] = df
+
+    if not data:
+        console.print("[red]没有可回测的数据[/red]")
+        return
+
+    runner = BatchBacktester(initial_capital=capital, max_workers=workers)
+    with console.status(f"[green]正在并行回测 {len(data) * len(strategy_configs)} 个任务...[/green]"):
+        result = runner.run(data, strategy_configs)
+
+    if result.empty:
+        console.print("[yellow]没有足够的数据产生回测结果[/yellow]")
+        return
+
+    columns = ["Symbol", "MA", "Total Return", "Benchmark Return", "CAGR", "Max Drawdown", "Sharpe Ratio", "Total Trades"]
+    table = Table(title=f"批量回测结果 ({runner.max_workers} 进程)")
+    for col in columns:
+        table.add_column(col, justify="right" if col not in ("Symbol", "MA") else "left")
+    for _, r in result.iterrows():
+        table.add_row(*[str(r.get(col, '')) for col in columns])
+    console.print(table)
+
+@backtest_cmd.command()
+@click.option('--symbol', '-s', help='回测标的代码')
+@click.option('--days', '-d', default=365*10, help='回测天数 (默认 10 年)')
+@click.option('--capital', default=100000.0, help='初始资金')
+@click.option('--short', 'short_range', default='3:30', help='短均线窗口范围 (start:stop[:step] 或逗号分隔)')
+@click.option('--long', 'long_range', default='10:200:5', help='长均线窗口范围 (start:stop[:step] 或逗号分隔)')
+@click.option('--train', 'train_bars', default=504, help='样本内窗口 K 线数 (默认 504 / 约 2 年)')
+@click.option('--test', 'test_bars', default=126, help='样本外窗口 K 线数 (默认 126 / 约半年)')
+@click.option('--metric', type=click.Choice(['Sharpe', 'Total Return']), default='Sharpe', help='样本内选参指标')
+@click.option('--workers', '-w', type=int, default=None, help='并行线程数 (默认 CPU 核数)')
+@click.option('--plot/--no-plot', default=True, help='是否显示样本外资金曲线图')
+@click.option('--local', is_flag=True, help='直接读取本地K线缓存 (内存映射，不访问 API)')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='本地数据起始日期 (配合 --local)')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='本地数据结束日期 (配合 --local)')
+@click.pass_context
+def walkforward(ctx, symbol, days, capital, short_range, long_range, train_bars, test_bars, metric, workers, plot, local, start, end):
+    """滚动前推优化 (样本内选参，样本外拼接资金曲线)"""
+    config = ctx.obj.get('CONFIG') or {}
+    target_symbol = symbol if symbol else config.get('symbol', 'SPY.US')
+    short_windows = _parse_range(short_range)
+    long_windows = _parse_range(long_range)
+
+    console.print(f"[bold blue]滚动前推:[/bold blue] {target_symbol}  样本内 {train_bars} / 样本外 {test_bars} 根K线", emoji=False)
+    df = _load_backtest_data(config, target_symbol, days, max(long_windows), local, start, end)
+    if df.empty:
+        console.print("[red]获取数据失败，滚动前推终止[/red]")
+        return
+
+    with console.status("[green]正在逐折选参...[/green]"):
+        result = run_walkforward(df, short_windows, long_windows, train_bars=train_bars, test_bars=test_bars,
+                                 metric=metric, initial_capital=capital, max_workers=workers)
+
+    folds, equity = result['folds'], result['equity']
+    if folds.empty:
+        console.print("[yellow]数据不足以切分出一折 (需要 长均线预热 + 样本内 + 样本外)[/yellow]")
+        return
+
+    # 1. 每折选参与样本内外表现
+    is_col = f"IS {metric}"
+    table = Table(title=f"滚动前推 ({target_symbol}, {len(folds)} 折)")
+    for col in ("Fold", "Train From", "Test From", "Test To", "MA", is_col, "OOS Return", "OOS Sharpe"):
+        table.add_column(col, justify="right")
+    for _, r in folds.iterrows():
+        oos_color = "green" if r['OOS Return'] > 0 else "red"
+        table.add_row(
+            str(r['fold']),
+            r['train_start'].strftime('%Y-%m-%d'),
+            r['test_start'].strftime('%Y-%m-%d'),
+            r['test_end'].strftime('%Y-%m-%d'),
+            f"{int(r['short'])}/{int(r['long'])}",
+            f"{r[is_col]:.2f}" if metric == 'Sharpe' else f"{r[is_col]:.2%}",
+            f"[{oos_color}]{r['OOS Return']:.2%}[/{oos_color}]",
+            f"{r['OOS Sharpe']:.2f}"
+        )
+    console.print(table)
+
+    # 2. 样本外整体表现
+    final = equity['equity_curve'].iloc[-1]
+    running_max = equity['equity_curve'].cummax()
+    returns = equity['strategy_return']
+    ann = trading_calendar.periods_per_year(equity['timestamp'].iloc[0], equity['timestamp'].iloc[-1])
+    sharpe = returns.mean() / returns.std() * np.sqrt(ann) if returns.std() > 0 else 0.0
+    summary = Table(title="样本外汇总")
+    summary.add_column("Metric", style="cyan")
+    summary.add_column("Value", style="bold yellow")
+    summary.add_row("OOS Total Return", f"{final / capital - 1:.2%}")
+    summary.add_row("Benchmark Return", f"{equity['benchmark_curve'].iloc[-1] / capital - 1:.2%}")
+    summary.add_row("Max Drawdown", f"{((equity['equity_curve'] - running_max) / running_max).min():.2%}")
+    summary.add_row("Sharpe Ratio", f"{sharpe:.2f}")
+    summary.add_row("Parameter Changes", str(int((folds[['short', 'long']].diff().abs().sum(axis=1) > 0).sum())))
+    console.print(summary)
+
+    if plot:
+        console.print("\n[bold]样本外资金曲线 vs 基准 (Buy & Hold)[/bold]")
+        plt.clear_figure()
+        plt.theme('dark')
+        plt.title("Walk-Forward Equity")
+        plt.plot(equity['equity_curve'].tolist(), label='Walk-Forward', color='green')
+        plt.plot(equity['benchmark_curve'].tolist(), label='Benchmark', color='gray')
+        plt.show()
+
+@backtest_cmd.command()
+@click.option('--symbol', '-s', help='回测标的代码')
+@click.option('--days', '-d', default=365*5, help='回测天数 (默认 5 年)')
+@click.option('--paths', '-n', default=10000, help='模拟路径数')
+@click.option('--method', type=click.Choice(['block', 'trade']), default='block', help='block: 块自助抽样 / trade: 交易重排')
+@click.option('--block-size', default=20, help='块自助抽样的块长度 (K线数)')
+@click.option('--confidence', default=0.95, help='置信水平')
+@click.option('--seed', type=int, default=None, help='随机种子 (便于复现)')
+@click.option('--workers', '-w', type=int, default=1, help='并行进程数 (默认单进程)')
+@click.pass_context
+def montecarlo(ctx, symbol, days, paths, method, block_size, confidence, seed, workers):
+    """蒙特卡洛稳健性分析 (CAGR / Sharpe / 最大回撤置信区间)"""
+    config = ctx.obj.get('CONFIG') or {}
+    target_symbol = symbol if symbol else config.get('symbol', 'SPY.US')
+    short_window = config.get('strategy', {}).get('short_ma_period', 5)
+    long_window = config.get('strategy', {}).get('long_ma_period', 20)
+
+    console.print(f"[bold blue]稳健性分析:[/bold blue] {target_symbol}  MA{short_window} vs MA{long_window}  {paths} 条 {method} 路径")
+    df = _fetch_backtest_data(config, target_symbol, days, long_window)
+    if df.empty:
+        console.print("[red]获取数据失败，分析终止[/red]")
+        return
+
+    engine = Backtester(Strategy(short_window, long_window))
+    results = engine.run(df)
+    if results.empty:
+        console.print("[yellow]没有足够的数据产生回测结果[/yellow]")
+        return
+
+    analyzer = MonteCarloAnalyzer(n_paths=paths, method=method, block_size=block_size, seed=seed, max_workers=workers)
+    with console.status(f"[green]正在模拟 {paths} 条路径...[/green]"):
+        samples = analyzer.run(results)
+
+    days_span = (results['timestamp'].iloc[-1] - results['timestamp'].iloc[0]).days
+    ann = trading_calendar.periods_per_year(results['timestamp'].iloc[0], results['timestamp'].iloc[-1])
+    observed = {k: v[0] for k, v in path_metrics(results['strategy_return'].to_numpy()[None, :], days_span / 365.25, ann).items()}
+    summary = MonteCarloAnalyzer.confidence_intervals(samples, observed, confidence)
+
+    table = Table(title=f"{confidence:.0%} 置信区间 ({target_symbol}, {method})")
+    for col in ("Metric", "Observed", "Lower", "Median", "Upper"):
+        table.add_column(col, justify="right" if col != "Metric" else "left")
+    for _, r in summary.iterrows():
+        fmt = "{:.2f}" if r['Metric'] == 'Sharpe' else "{:.2%}"
+        table.add_row(r['Metric'], *[fmt.format(r[c]) for c in ("Observed", "Lower", "Median", "Upper")])
+    console.print(table)
+
+    loss = (samples['CAGR'] < 0).mean()
+    console.print(f"亏损路径占比: [bold]{loss:.1%}[/bold]")
+    if method == 'trade':
+        console.print("[dim]交易重排不改变收益集合，CAGR / Sharpe 区间退化为观测值，重点关注最大回撤分布[/dim]")
+
+@backtest_cmd.command()
+@click.option('--symbols', '-s', required=True, help='组合标的列表，逗号分隔 (e.g., SPY.US,QQQ.US,IWM.US)')
+@click.option('--days', '-d', default=365*2, help='回测天数 (默认 730天 / 2年)')
+@click.option('--capital', default=100000.0, help='初始资金')
+@click.option('--allocation', type=click.Choice(['equal', 'active']), default='equal', help='equal: 每个标的固定额度 / active: 在持仓标的间平分')
+@click.option('--rebalance', type=click.Choice(['signal', 'daily']), default='signal', help='signal: 仅信号变化时调仓 / daily: 每日调回目标权重')
+@click.option('--top', default=10, help='归因表显示的标的数')
+@click.option('--plot/--no-plot', default=True, help='是否显示资金曲线图')
+@click.pass_context
+def portfolio(ctx, symbols, days, capital, allocation, rebalance, top, plot):
+    """多标的组合回测 (共享资金 + 分标的归因)"""
+    config = ctx.obj.get('CONFIG') or {}
+    symbol_list = [x.strip() for x in symbols.split(',') if x.strip()]
+    short_window = config.get('strategy', {}).get('short_ma_period', 5)
+    long_window = config.get('strategy', {}).get('long_ma_period', 20)
+    position_ratio = config.get('trading', {}).get('position_ratio', 1.0)
+
+    console.print(f"[bold blue]组合回测:[/bold blue] {len(symbol_list)} 个标的  MA{short_window} vs MA{long_window}  仓位比例 {position_ratio:.0%}")
+    data = {}
+    for sym in symbol_list:
+        df = _fetch_backtest_data(config, sym, days, long_window)
+        if df.empty:
+            console.print(f"[yellow]{sym} 获取数据失败，已跳过[/yellow]")
+            continue
+        data[sym] = df
+
+    if not data:
+        console.print("[red]没有可回测的数据[/red]")
+        return
+
+    engine = PortfolioBacktester(Strategy(short_window, long_window), initial_capital=capital,
+                                 position_ratio=position_ratio, allocation=allocation, rebalance=rebalance)
+    result_df = engine.run(data)
+    metrics = engine.get_performance_metrics()
+    if not metrics:
+        console.print("[yellow]没有足够的数据产生回测结果[/yellow]")
+        return
+
+    table = Table(title=f"组合回测报告 ({allocation} / {rebalance})")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="bold yellow")
+    for k, v in metrics.items():
+        table.add_row(k, str(v))
+    console.print(table)
+
+    attribution = engine.attribution.head(top)
+    attr_table = Table(title=f"收益归因 (前 {len(attribution)} 个标的)")
+    for col in ("Symbol", "Contribution", "Cost", "Avg Weight", "Exposure", "Trades", "Buy & Hold"):
+        attr_table.add_column(col, justify="right" if col != "Symbol" else "left")
+    for _, r in attribution.iterrows():
+        color = "green" if r['Contribution'] > 0 else "red"
+        attr_table.add_row(
+            r['Symbol'],
+            f"[{color}]{r['Contribution']:.2%}[/{color}]",
+            f"{r['Cost']:.2%}",
+            f"{r['Avg Weight']:.2%}",
+            f"{r['Exposure']:.1%}",
+            str(int(r['Trades'])),
+            f"{r['Buy & Hold']:.2%}"
+        )
+    console.print(attr_table)
+
+    if plot:
+        console.print("\n[bold]组合资金曲线 vs 等权基准[/bold]")
+        plt.clear_figure()
+        plt.theme('dark')
+        plt.title("Portfolio Equity Curve")
+        plt.plot(result_df['equity_curve'].tolist(), label='Portfolio', color='green')
+        plt.plot(result_df['benchmark_curve'].tolist(), label='Equal Weight', color='gray')
+        plt.show()
+
+@backtest_cmd.command()
+@click.option('--symbol', '-s', help='回测标的代码')
+@click.option('--period', '-p', default='1m', help='K线周期 (需先用 quote history 下载到本地缓存)')
+@click.option('--adjust', type=click.Choice(['forward', 'none']), default='forward', help='复权方式')
+@click.option('--chunk', default=100_000, help='每块读取的K线数')
+@click.option('--capital', default=100000.0, help='初始资金')
+@click.option('--output', '-o', default=None, help='结果输出目录 (默认 data/backtests/<标的>_<周期>_<短>_<长>)')
+@click.pass_context
+def stream(ctx, symbol, period, adjust, chunk, capital, output):
+    """分块流式回测本地缓存的K线 (适用于超出内存的分钟K线)"""
+    config = ctx.obj.get('CONFIG') or {}
+    target_symbol = symbol if symbol else config.get('symbol', 'SPY.US')
+    short_window = config.get('strategy', {}).get('short_ma_period', 5)
+    long_window = config.get('strategy', {}).get('long_ma_period', 20)
+    data_conf = config.get('data', {}) or {}
+    store = BarStore(data_conf.get('cache_dir', 'data/bars'))
+
+    rows = store.meta(target_symbol, period, adjust).get('rows', 0)
+    if not rows:
+        console.print(f"[red]本地没有 {target_symbol} {period} K线缓存，请先运行: quote history {target_symbol} --period {period}[/red]")
+        return
+
+    output = output or f"data/backtests/{target_symbol}_{period}_{short_window}_{long_window}"
+    console.print(f"[bold blue]流式回测:[/bold blue] {target_symbol} {period}  {rows:,} 根K线  MA{short_window} vs MA{long_window}")
+
+    engine = StreamingBacktester(Strategy(short_window, long_window), initial_capital=capital)
+    with console.status("[green]正在分块回测...[/green]"):
+        metrics = engine.run(
+            store.iter_chunks(target_symbol, period, adjust, chunk, ['timestamp', 'close']),
+            output_dir=output,
+            meta={"symbol": target_symbol, "period": period, "adjust": adjust}
+        )
+
+    if not metrics:
+        console.print("[yellow]没有足够的数据产生回测结果[/yellow]")
+        return
+
+    table = Table(title=f"流式回测报告 ({target_symbol} {period})")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="bold yellow")
+    for k, v in metrics.items():
+        table.add_row(k, str(v))
+    console.print(table)
+    console.print(f"[dim]逐K线结果已写入 {output}[/dim]")
@@ -10,6 +10,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 from rich.console import Console
 from src.utils.config_loader import load_config
 from src.utils.logger import setup_logger
+from src.core.context_pool import ContextPool
 
 # 导入所有子命令
 from src.cli.config_cmd import config_cmd
@@ -53,6 +54,10 @@ def cli(ctx, config, verbose):
         if verbose:
             console.print(f"[yellow]配置文件加载警告:[/yellow] {e}")
         ctx.obj['CONFIG'] = None
+
+    # 选择券商连接 (broker.mode: live | sim)
+    if ((ctx.obj['CONFIG'] or {}).get('broker') or {}).get('mode', 'live') != 'live':
+        ContextPool.configure(ctx.obj['CONFIG'])
     
     # 如果没有子命令，自动进入 Shell
     if ctx.invoked_subcommand is None:
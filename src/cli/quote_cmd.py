@@ -1,7 +1,13 @@
 import click
+import time
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
+from datetime import datetime, date, timedelta
+from rich.progress import Progress
 from src.core.data_fetcher import DataFetcher
+from src.core.bar_store import BarStore
+from src.core.quote_stream import QuoteBook, LongportQuoteFeed, ReplayQuoteFeed
 
 console = Console()
 
@@ -10,14 +16,57 @@ def quote_cmd():
     """行情数据查询"""
     pass
 
+def _quote_table(title: str) -> Table:
+    table = Table(title=title)
+    table.add_column("Symbol", style="cyan")
+    table.add_column("Price", style="bold")
+    table.add_column("Change", justify="right")
+    table.add_column("High", justify="right")
+    table.add_column("Low", justify="right")
+    table.add_column("Prev Close", justify="right")
+    table.add_column("Vol", justify="right")
+    return table
+
+def _quote_cells(symbol: str, quote: dict) -> tuple:
+    """格式化一行行情"""
+    price = quote['price']
+    prev_close = quote.get('prev_close', 0)
+    
+    # 避免除以零
+    if prev_close > 0:
+        change = price - prev_close
+        change_pct = (change / prev_close) * 100
+        color = "green" if change >= 0 else "red"
+        change_str = f"[{color}]{change:+.2f} ({change_pct:+.2f}%)[/{color}]"
+    else:
+        change_str = "-"
+    
+    return (
+        symbol,
+        f"{price:.2f}",
+        change_str,
+        f"{quote['high']:.2f}",
+        f"{quote['low']:.2f}",
+        f"{prev_close:.2f}" if prev_close else "-",
+        f"{quote['volume']:,}"
+    )
+
 @quote_cmd.command()
 @click.argument('symbols', nargs=-1)
-def price(symbols):
+@click.option('--watch', '-w', is_flag=True, help='订阅推送，持续刷新行情')
+@click.option('--fps', default=4.0, help='--watch 模式最大刷新帧率')
+@click.option('--replay', type=click.Path(exists=True, dir_okay=False), help='--watch 模式使用本地 JSONL 文件回放行情')
+@click.option('--speed', default=1.0, help='回放速度倍数 (0 表示不等待)')
+def price(symbols, watch, fps, replay, speed):
     """获取实时价格 (支持多个: SPY.US AAPL.US)"""
     if not symbols:
         console.print("[yellow]请提供至少一个标的代码 (例如: SPY.US)[/yellow]")
         return
 
+    if watch:
+        _watch_prices(list(symbols), fps, replay, speed)
+        return
+
     try:
         fetcher = DataFetcher()
         data = fetcher.get_realtime_quote(list(symbols))
@@ -26,43 +75,58 @@ def price(symbols):
             console.print("[red]获取数据失败或无数据返回。请检查网络或 API Key。[/red]")
             return
 
-        table = Table(title="实时行情")
-        table.add_column("Symbol", style="cyan")
-        table.add_column("Price", style="bold")
-        table.add_column("Change", justify="right")
-        table.add_column("High", justify="right")
-        table.add_column("Low", justify="right")
-        table.add_column("Prev Close", justify="right")
-        table.add_column("Vol", justify="right")
-
+        table = _quote_table("实时行情")
         for symbol, quote in data.items():
-            price = quote['price']
-            prev_close = quote['prev_close']
-            
-            # 避免除以零
-            if prev_close > 0:
-                change = price - prev_close
-                change_pct = (change / prev_close) * 100
-                color = "green" if change >= 0 else "red"
-                change_str = f"[{color}]{change:+.2f} ({change_pct:+.2f}%)[/{color}]"
-            else:
-                change_str = "-"
-            
-            table.add_row(
-                symbol,
-                f"{price:.2f}",
-                change_str,
-                f"{quote['high']:.2f}",
-                f"{quote['low']:.2f}",
-                f"{prev_close:.2f}",
-                f"{quote['volume']:,}"
-            )
+            table.add_row(*_quote_cells(symbol, quote))
         
         console.print(table)
         
     except Exception as e:
         console.print(f"[bold red]发生错误:[/bold red] {e}")
 
+def _watch_prices(symbols: list, fps: float, replay: str = None, speed: float = 1.0):
+    """
+    推送模式: 行情写入 QuoteBook，按不超过 fps 的帧率原地重绘，
+    只重新格式化有变化的行
+    """
+    book = QuoteBook()
+    rows = {}
+
+    try:
+        if replay:
+            feed = ReplayQuoteFeed(replay, speed)
+        else:
+            fetcher = DataFetcher()
+            # 推送中不含昨收，先取一次快照作为初始值
+            for symbol, quote in fetcher.get_realtime_quote(symbols).items():
+                book.update(symbol, quote)
+            feed = LongportQuoteFeed(fetcher.ctx)
+
+        feed.start(symbols, book.update)
+    except Exception as e:
+        console.print(f"[bold red]订阅行情失败:[/bold red] {e}")
+        return
+
+    interval = 1.0 / fps if fps > 0 else 0.25
+    try:
+        with Live(_quote_table("实时行情 (推送)"), console=console, auto_refresh=False) as live:
+            while True:
+                changed = book.drain_dirty()
+                if changed:
+                    for symbol, quote in changed.items():
+                        if 'price' in quote:
+                            rows[symbol] = _quote_cells(symbol, quote)
+                    table = _quote_table(f"实时行情 (推送) {datetime.now().strftime('%H:%M:%S')}")
+                    for symbol in symbols:
+                        if symbol in rows:
+                            table.add_row(*rows[symbol])
+                    live.update(table, refresh=True)
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        console.print("[yellow]Stopped.[/yellow]")
+    finally:
+        feed.stop()
+
 @quote_cmd.command()
 @click.argument('symbol')
 @click.option('--period', '-p', default='day', help='K线周期 (day, week, 5m, 60m...)')
@@ -102,3 +166,63 @@ def kline(symbol, period, count):
     
     except Exception as e:
         console.print(f"[bold red]发生错误:[/bold red] {e}")
+
+@quote_cmd.command()
+@click.argument('symbol')
+@click.option('--period', '-p', default='day', help='K线周期 (day, 1m, 5m, 60m...)')
+@click.option('--days', '-d', default=365 * 10, help='回溯天数 (默认 10 年)')
+@click.pass_context
+def history(ctx, symbol, period, days):
+    """分页下载深度历史K线到本地缓存"""
+    config = ctx.obj.get('CONFIG') or {}
+    try:
+        fetcher = DataFetcher(config)
+        start = date.today() - timedelta(days=days)
+
+        with Progress(console=console) as progress:
+            task = progress.add_task(f"[green]下载 {symbol} {period} K线[/green]", total=None)
+
+            def on_page(done, total, rows):
+                progress.update(task, completed=done, total=total,
+                                description=f"[green]下载 {symbol} {period} K线[/green] ({rows:,} 根)")
+
+            df = fetcher.load_history(symbol, period, start, on_page=on_page)
+
+        if df.empty:
+            console.print(f"[red]未获取到 {symbol} 的历史数据[/red]")
+            return
+        console.print(f"[green]已缓存 {len(df):,} 根K线: {df['timestamp'].iloc[0]} ~ {df['timestamp'].iloc[-1]}[/green]")
+
+    except Exception as e:
+        console.print(f"[bold red]发生错误:[/bold red] {e}")
+
+@quote_cmd.command()
+@click.pass_context
+def cache(ctx):
+    """查看本地K线缓存"""
+    config = ctx.obj.get('CONFIG') or {}
+    data_conf = config.get('data', {}) or {}
+    store = BarStore(data_conf.get('cache_dir', 'data/bars'))
+
+    keys = store.list_keys()
+    if not keys:
+        console.print("[yellow]本地暂无K线缓存[/yellow]")
+        return
+
+    table = Table(title=f"K线缓存 ({store.root})")
+    table.add_column("Symbol", style="cyan")
+    table.add_column("Period")
+    table.add_column("Adjust")
+    table.add_column("Rows", justify="right")
+    table.add_column("Updated", style="dim")
+
+    for meta in keys:
+        table.add_row(
+            meta['symbol'],
+            meta['period'],
+            meta['adjust'],
+            f"{meta['rows']:,}",
+            datetime.fromtimestamp(meta['fetched_at']).strftime('%Y-%m-%d %H:%M:%S')
+        )
+
+    console.print(table)
@@ -102,8 +102,9 @@ def signal(ctx):
 
 @strategy_cmd.command()
 @click.option('--days', default=60, help='显示最近多少天的数据')
+@click.option('--local', is_flag=True, help='直接读取本地K线缓存 (内存映射，不访问 API)')
 @click.pass_context
-def chart(ctx, days):
+def chart(ctx, days, local):
     """终端显示均线图表"""
     symbol, fetcher, strategy = get_strategy_context(ctx)
     if not symbol: return
@@ -113,7 +114,11 @@ def chart(ctx, days):
     
     try:
         with console.status(f"[bold green]正在获取数据并绘制图表...[/bold green]"):
-            df = fetcher.get_historical_klines(symbol, period='day', count=count)
+            if local:
+                # 只映射需要的末尾 count 根，未访问的页不会载入内存
+                df = fetcher.open_local(symbol, 'day').tail(count).to_frame()
+            else:
+                df = fetcher.get_historical_klines(symbol, period='day', count=count)
         
         if df.empty:
             console.print("[red]无数据[/red]")
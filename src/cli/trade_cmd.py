@@ -108,16 +108,64 @@ def sell(symbol, quantity, price, sell_all, force):
         console.print(f"[bold red]下单失败:[/bold red] {e}")
 
 @trade_cmd.command()
-@click.argument('order_id')
-def cancel(order_id):
-    """撤销订单"""
+@click.argument('order_ids', nargs=-1, required=True)
+def cancel(order_ids):
+    """撤销订单 (可一次指定多个订单号，并发撤单)"""
     try:
         trader = Trader()
-        trader.cancel_order(order_id)
-        console.print(f"[green]已发送撤单请求: {order_id}[/green]")
+        if len(order_ids) == 1:
+            trader.cancel_order(order_ids[0])
+            console.print(f"[green]已发送撤单请求: {order_ids[0]}[/green]")
+            return
+        for r in trader.cancel_orders(list(order_ids)):
+            if r.ok:
+                console.print(f"[green]已发送撤单请求: {r.target}[/green]")
+            else:
+                console.print(f"[red]撤单失败 {r.target}:[/red] {r.error}")
     except Exception as e:
         console.print(f"[red]撤单失败:[/red] {e}")
 
+@trade_cmd.command()
+@click.option('--symbols', '-s', default=None, help='只平这些标的 (逗号分隔)，默认全部持仓')
+@click.option('--force', is_flag=True, help='跳过确认直接执行')
+@click.pass_context
+def flatten(ctx, symbols, force):
+    """一键清仓: 撤销全部未完成订单后，市价卖出全部持仓 (批量并发)"""
+    config = (ctx.obj or {}).get('CONFIG') or {}
+    wanted = {s.strip() for s in symbols.split(',')} if symbols else None
+    try:
+        trader = Trader(config)
+        open_status = {"NotReported", "New", "WaitToNew", "PartialFilled", "PendingReplace", "Replaced"}
+        open_orders = [o.order_id for o in trader.get_orders()
+                       if str(o.status).rsplit('.', 1)[-1] in open_status and (not wanted or o.symbol in wanted)]
+        if open_orders and (force or click.confirm(f"撤销 {len(open_orders)} 笔未完成订单?")):
+            for r in trader.cancel_orders(open_orders):
+                if not r.ok:
+                    console.print(f"[red]撤单失败 {r.target}:[/red] {r.error}")
+
+        positions = [p for p in trader.get_positions(force=True)
+                     if (not wanted or p['symbol'] in wanted) and p['available_quantity'] > 0]
+        if not positions:
+            console.print("[yellow]没有可卖出的持仓[/yellow]")
+            return
+
+        for p in positions:
+            console.print(f"[bold red]SELL {p['available_quantity']} {p['symbol']} @ Market[/bold red]")
+        if not force and not click.confirm(f"确认卖出以上 {len(positions)} 个持仓?"):
+            console.print("取消操作")
+            return
+
+        results = trader.submit_orders([
+            {"symbol": p['symbol'], "side": "Sell", "quantity": p['available_quantity']} for p in positions
+        ])
+        for r in results:
+            if r.ok:
+                console.print(f"[green]{r.target.symbol}: 下单成功 Order ID: {r.order_id}[/green]")
+            else:
+                console.print(f"[red]{r.target.symbol}: 下单失败 ({r.attempts} 次尝试):[/red] {r.error}")
+    except Exception as e:
+        console.print(f"[bold red]清仓失败:[/bold red] {e}")
+
 @trade_cmd.command()
 def orders():
     """查看今日订单列表"""
@@ -156,3 +204,101 @@ def orders():
             
     except Exception as e:
         console.print(f"[red]查询订单失败:[/red] {e}")
+
+@trade_cmd.command()
+@click.argument('symbol')
+@click.option('--side', type=click.Choice(['buy', 'sell'], case_sensitive=False), required=True, help='方向')
+@click.option('--quantity', '-q', type=int, required=True, help='数量')
+@click.option('--signal-price', type=float, required=True, help='信号价 (T 日收盘价)，用于跳空保护与滑点统计')
+@click.option('--strategy', type=click.Choice(['market', 'limit', 'twap']), default=None, help='覆盖 order_execution.strategy')
+@click.option('--force', is_flag=True, help='跳过确认直接执行')
+@click.pass_context
+def execute(ctx, symbol, side, quantity, signal_price, strategy, force):
+    """按 order_execution 配置执行订单 (限价追单 / TWAP / 跳空保护)"""
+    import asyncio
+    from src.core.executor import OrderExecutor
+
+    config = dict((ctx.obj or {}).get('CONFIG') or {})
+    if strategy:
+        config['order_execution'] = {**(config.get('order_execution') or {}), 'strategy': strategy}
+    exec_strategy = (config.get('order_execution') or {}).get('strategy', 'limit')
+
+    side = side.capitalize()
+    console.print(f"准备执行: [bold]{side.upper()} {quantity} {symbol}[/bold] (策略: {exec_strategy}, 信号价: {signal_price})")
+    if not force and not click.confirm("确认执行?"):
+        console.print("取消操作")
+        return
+
+    try:
+        executor = OrderExecutor(Trader(config), config)
+        report = asyncio.run(executor.execute(symbol, side, quantity, signal_price))
+        executor.orders.close()
+        r = report.record
+        color = "green" if r.status == "filled" else "yellow"
+        console.print(f"[{color}]{r.order_id}: {r.status} {r.filled_quantity}/{r.quantity}[/{color}]"
+                      + (f" 均价 {r.filled_price:.2f} 滑点 {r.slippage_pct:+.2f}%" if r.filled_quantity else "")
+                      + f" (子订单 {len(report.children)} 笔)")
+    except Exception as e:
+        console.print(f"[bold red]执行失败:[/bold red] {e}")
+
+@trade_cmd.command()
+@click.option('--symbol', '-s', default=None, help='只显示该标的')
+@click.option('--active', is_flag=True, help='只显示未结束的订单')
+@click.option('--sync', 'sync', is_flag=True, help='先用今日订单 (API) 对账更新本地状态')
+@click.option('--limit', '-n', type=int, default=20, help='显示最近 N 笔')
+@click.pass_context
+def journal(ctx, symbol, active, sync, limit):
+    """查看本地订单日志 (策略订单的完整生命周期，无需访问 API)"""
+    from src.core.order_manager import OrderManager
+
+    config = (ctx.obj or {}).get('CONFIG') or {}
+    manager = OrderManager(config)
+    try:
+        if sync:
+            changed = manager.sync_from_broker(Trader(config).get_orders())
+            console.print(f"[dim]对账完成，{changed} 笔订单状态有更新[/dim]")
+
+        if symbol:
+            records = manager.orders_for(symbol, active_only=active)
+        else:
+            records = manager.active_orders() if active else manager.all_orders()
+        records = sorted(records, key=lambda r: r.created_at)[-limit:]
+
+        if not records:
+            console.print("[yellow]订单日志为空[/yellow]")
+            return
+
+        table = Table(title="订单日志")
+        table.add_column("ID", style="dim")
+        table.add_column("Broker ID", style="dim")
+        table.add_column("Symbol", style="cyan")
+        table.add_column("Side")
+        table.add_column("Status")
+        table.add_column("Qty/Filled")
+        table.add_column("Signal Px")
+        table.add_column("Filled Px")
+        table.add_column("Slippage")
+        table.add_column("Created")
+
+        for r in records:
+            side_color = "green" if r.side.lower() == "buy" else "red"
+            status_color = "green" if r.status == "filled" else ("yellow" if r.is_active else "dim")
+            table.add_row(
+                r.order_id,
+                r.broker_order_id or "-",
+                r.symbol,
+                f"[{side_color}]{r.side}[/{side_color}]",
+                f"[{status_color}]{r.status}[/{status_color}]",
+                f"{r.quantity}/{r.filled_quantity}",
+                f"{r.signal_price:.2f}" if r.signal_price else "-",
+                f"{r.filled_price:.2f}" if r.filled_price else "-",
+                f"{r.slippage_pct:+.2f}%" if r.slippage_pct is not None else "-",
+                r.created_at
+            )
+
+        console.print(table)
+
+    except Exception as e:
+        console.print(f"[red]读取订单日志失败:[/red] {e}")
+    finally:
+        manager.close()
@@ -0,0 +1,152 @@
+import time
+import threading
+from typing import Dict, Any, List, Callable, Optional
+from src.utils.logger import get_logger
+
+# 推送中会改变资金 / 持仓的订单状态
+FILL_STATUSES = {"Filled", "PartialFilled"}
+
+class AccountState:
+    """
+    账户资金与持仓的内存缓存
+
+    - 读取时数据未超过 ttl 秒直接返回内存副本，否则同步拉取一次
+    - 后台线程每 ttl 秒刷新一次，使下单路径上的读取通常不需要访问券商
+    - 订单成交推送到达时立即按成交增量更新现金与持仓，并唤醒后台线程尽快与券商对账
+    - force=True 的读取总是同步拉取最新数据
+    """
+    def __init__(self, fetch_balance: Callable[[str], Dict[str, Any]],
+                 fetch_positions: Callable[[], List[Dict[str, Any]]],
+                 ttl: float = 30.0, background: bool = True):
+        self.logger = get_logger("account_state")
+        self.fetch_balance = fetch_balance
+        self.fetch_positions = fetch_positions
+        self.ttl = ttl
+        self.background = background
+
+        self.lock = threading.Lock()
+        self._balances: Dict[str, Dict[str, Any]] = {}
+        self._balance_at: Dict[str, float] = {}
+        self._positions: Optional[Dict[str, Dict[str, Any]]] = None
+        self._positions_at = 0.0
+        # 每笔订单已计入缓存的成交数量与金额 (推送为累计值)
+        self._applied: Dict[str, tuple] = {}
+        self.stats = {"hits": 0, "refreshes": 0, "pushes": 0}
+
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- 读取 ----------
+
+    def balance(self, currency: str = "USD", force: bool = False) -> Dict[str, Any]:
+        self._ensure_background()
+        with self.lock:
+            cached = self._balances.get(currency)
+            if cached is not None and not force and time.monotonic() - self._balance_at[currency] < self.ttl:
+                self.stats['hits'] += 1
+                return dict(cached)
+        return dict(self.refresh_balance(currency))
+
+    def positions(self, symbol: str = None, force: bool = False) -> List[Dict[str, Any]]:
+        self._ensure_background()
+        with self.lock:
+            fresh = self._positions is not None and time.monotonic() - self._positions_at < self.ttl
+            if fresh and not force:
+                self.stats['hits'] += 1
+                return self._select(symbol)
+        self.refresh_positions()
+        with self.lock:
+            return self._select(symbol)
+
+    def _select(self, symbol: Optional[str]) -> List[Dict[str, Any]]:
+        return [dict(p) for s, p in self._positions.items() if p['quantity'] != 0 and (not symbol or s == symbol)]
+
+    def age_seconds(self) -> Optional[float]:
+        """持仓缓存的时长，未加载时返回 None"""
+        return time.monotonic() - self._positions_at if self._positions is not None else None
+
+    # ---------- 刷新 ----------
+
+    def refresh_balance(self, currency: str = "USD") -> Dict[str, Any]:
+        balance = self.fetch_balance(currency)
+        with self.lock:
+            self._balances[currency] = balance
+            self._balance_at[currency] = time.monotonic()
+            self.stats['refreshes'] += 1
+        return balance
+
+    def refresh_positions(self) -> List[Dict[str, Any]]:
+        positions = self.fetch_positions()
+        with self.lock:
+            self._positions = {p['symbol']: p for p in positions}
+            self._positions_at = time.monotonic()
+            self.stats['refreshes'] += 1
+        return positions
+
+    def invalidate(self):
+        """作废缓存，下次读取时同步拉取"""
+        with self.lock:
+            self._balance_at = {c: 0.0 for c in self._balances}
+            self._positions_at = 0.0
+
+    def _ensure_background(self):
+        if not self.background or self.ttl <= 0 or self._thread is not None:
+            return
+        with self.lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refresh_loop, name="account-refresh", daemon=True)
+                self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            self._wake.wait(self.ttl)
+            self._wake.clear()
+            try:
+                for currency in list(self._balances) or ["USD"]:
+                    self.refresh_balance(currency)
+                self.refresh_positions()
+            except Exception as e:
+                self.logger.warning(f"Background account refresh failed: {e}")
+
+    # ---------- 推送 ----------
+
+    def on_order_changed(self, event):
+        """
+        订单推送回调: 按累计成交的增量更新现金与持仓，并唤醒后台对账
+        """
+        status = str(event.status).rsplit('.', 1)[-1]
+        if status not in FILL_STATUSES:
+            return
+        order_id = str(event.order_id)
+        qty = int(event.executed_quantity or 0)
+        notional = qty * float(event.executed_price or 0)
+
+        with self.lock:
+            prev_qty, prev_notional = self._applied.get(order_id, (0, 0.0))
+            delta_qty, delta_notional = qty - prev_qty, notional - prev_notional
+            if delta_qty <= 0:
+                return
+            self._applied[order_id] = (qty, notional)
+            self.stats['pushes'] += 1
+
+            sign = 1 if str(event.side).rsplit('.', 1)[-1] == "Buy" else -1
+            for balance in self._balances.values():
+                balance['cash'] = balance.get('cash', 0.0) - sign * delta_notional
+                balance['market_value'] = balance.get('market_value', 0.0) + sign * delta_notional
+
+            if self._positions is not None:
+                pos = self._positions.setdefault(event.symbol, {
+                    "symbol": event.symbol, "quantity": 0, "available_quantity": 0, "cost_price": 0.0,
+                    "current_price": 0.0, "market_value": 0.0, "profit_loss": 0.0
+                })
+                held = pos['quantity']
+                if sign > 0:
+                    pos['cost_price'] = (pos['cost_price'] * held + delta_notional) / (held + delta_qty)
+                pos['quantity'] = held + sign * delta_qty
+                pos['available_quantity'] = max(0, pos['available_quantity'] + sign * delta_qty) if sign > 0 \
+                    else min(pos['available_quantity'], pos['quantity'])
+                pos['current_price'] = delta_notional / delta_qty
+                pos['market_value'] = pos['quantity'] * pos['current_price']
+
+        self.logger.debug(f"Applied fill push {order_id}: {sign * delta_qty:+d} {event.symbol}")
+        self._wake.set()
@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+from src.utils.logger import get_logger
+
+# 本地 K 线存储的列定义 (列名 -> 落盘 dtype)
+BAR_COLUMNS = {
+    'timestamp': 'datetime64[ns]',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'int64',
+}
+
+def _read_npy_header(f, rows: int) -> np.dtype:
+    """读取 .npy 文件头并校验行数，文件指针停在数据起点"""
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    if shape != (rows,):
+        raise ValueError(f"{f.name} has shape {shape}, expected ({rows},)")
+    return dtype
+
+class BarView:
+    """
+    BarStore 中一段 K 线的只读列视图
+
+    各列为 np.load(mmap_mode='r') 得到的内存映射数组 (或其切片)，打开时不读取数据，
+    访问到的页才会载入内存。按时间切片在 timestamp 列上二分查找，结果仍是零拷贝视图。
+    """
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self._columns = columns
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def locate(self, ts) -> int:
+        """第一根时间 >= ts 的 K 线下标 (二分查找)"""
+        return int(np.searchsorted(self._columns['timestamp'], np.datetime64(pd.Timestamp(ts), 'ns'), side='left'))
+
+    def iloc(self, start: int = None, stop: int = None) -> 'BarView':
+        """按下标切片"""
+        return BarView({name: arr[start:stop] for name, arr in self._columns.items()})
+
+    def between(self, start=None, end=None) -> 'BarView':
+        """按时间切片 [start, end]，两端均可省略"""
+        lo = self.locate(start) if start is not None else 0
+        if end is None:
+            hi = len(self)
+        else:
+            ts = self._columns['timestamp']
+            hi = int(np.searchsorted(ts, np.datetime64(pd.Timestamp(end), 'ns'), side='right'))
+        return self.iloc(lo, hi)
+
+    def tail(self, n: int) -> 'BarView':
+        return self.iloc(max(len(self) - n, 0), None)
+
+    def to_frame(self) -> pd.DataFrame:
+        """包装为 DataFrame (不复制列数据)"""
+        return pd.DataFrame(self._columns, copy=False)
+
+class BarStore:
+    """
+    本地 OHLCV K线存储
+
+    按 (symbol, period, adjust) 分目录保存，每一列一个 .npy 文件，另附 meta.json
+    记录最近一次从 API 补齐的时间。DataFetcher 通过它只拉取最新缺失的 K 线。
+    """
+    def __init__(self, root: str = "data/bars"):
+        self.logger = get_logger("bar_store")
+        self.root = Path(root)
+        # 进程内缓存命中统计
+        self.stats = {"hits": 0, "topups": 0, "misses": 0, "bars_fetched": 0}
+
+    def _key_dir(self, symbol: str, period: str, adjust: str) -> Path:
+        return self.root / symbol.upper() / f"{period.lower()}_{adjust.lower()}"
+
+    def record(self, kind: str, bars_fetched: int = 0):
+        """记录一次缓存访问结果 (hits / topups / misses)"""
+        self.stats[kind] += 1
+        self.stats['bars_fetched'] += bars_fetched
+
+    def load(self, symbol: str, period: str, adjust: str = "forward") -> pd.DataFrame:
+        """
+        读取本地缓存的全部 K 线，不存在或文件不完整时返回空 DataFrame
+        """
+        key_dir = self._key_dir(symbol, period, adjust)
+        if not (key_dir / "meta.json").exists():
+            return pd.DataFrame(columns=list(BAR_COLUMNS))
+
+        try:
+            columns = {name: np.load(key_dir / f"{name}.npy") for name in BAR_COLUMNS}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Bar cache for {symbol} {period} is unreadable, ignoring: {e}")
+            return pd.DataFrame(columns=list(BAR_COLUMNS))
+
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) != 1:
+            # 写入中断导致列长度不一致，视为未缓存
+            self.logger.warning(f"Bar cache for {symbol} {period} is inconsistent, ignoring")
+            return pd.DataFrame(columns=list(BAR_COLUMNS))
+
+        return pd.DataFrame(columns)
+
+    def open(self, symbol: str, period: str, adjust: str = "forward", start=None, end=None,
+             columns: Optional[List[str]] = None) -> BarView:
+        """
+        以内存映射方式打开缓存的 K 线 (零拷贝)，可选按时间范围切片
+
+        不存在或文件不完整时返回空视图。
+        """
+        columns = columns or list(BAR_COLUMNS)
+        if 'timestamp' not in columns:
+            columns = ['timestamp'] + list(columns)
+        key_dir = self._key_dir(symbol, period, adjust)
+        empty = BarView({name: np.empty(0, dtype=BAR_COLUMNS[name]) for name in columns})
+        if not (key_dir / "meta.json").exists():
+            return empty
+
+        try:
+            arrays = {name: np.load(key_dir / f"{name}.npy", mmap_mode='r') for name in columns}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Bar cache for {symbol} {period} is unreadable, ignoring: {e}")
+            return empty
+
+        if len({len(v) for v in arrays.values()}) != 1:
+            self.logger.warning(f"Bar cache for {symbol} {period} is inconsistent, ignoring")
+            return empty
+
+        view = BarView(arrays)
+        if start is not None or end is not None:
+            view = view.between(start, end)
+        return view
+
+    def iter_chunks(self, symbol: str, period: str, adjust: str = "forward", chunk_rows: int = 100_000,
+                    columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        按块顺序读取缓存的 K 线，每次只把 chunk_rows 行读入内存
+
+        直接按偏移量从 .npy 文件读取，不做内存映射，常驻内存不随文件大小增长。
+        """
+        key_dir = self._key_dir(symbol, period, adjust)
+        rows = self.meta(symbol, period, adjust).get('rows', 0)
+        columns = columns or list(BAR_COLUMNS)
+
+        handles = []
+        try:
+            readers = {}
+            for name in columns:
+                f = open(key_dir / f"{name}.npy", 'rb')
+                handles.append(f)
+                readers[name] = (f, _read_npy_header(f, rows))
+
+            for start in range(0, rows, chunk_rows):
+                count = min(chunk_rows, rows - start)
+                yield pd.DataFrame({name: np.fromfile(f, dtype=dtype, count=count)
+                                    for name, (f, dtype) in readers.items()})
+        finally:
+            for f in handles:
+                f.close()
+
+    def save(self, symbol: str, period: str, adjust: str, df: pd.DataFrame):
+        """
+        覆盖写入缓存。每列先写临时文件再原子替换，最后更新 meta.json
+        """
+        key_dir = self._key_dir(symbol, period, adjust)
+        key_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, dtype in BAR_COLUMNS.items():
+            arr = df[name].to_numpy(dtype=dtype)
+            tmp_path = key_dir / f"{name}.npy.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, arr)
+            os.replace(tmp_path, key_dir / f"{name}.npy")
+
+        meta = {
+            "symbol": symbol.upper(),
+            "period": period.lower(),
+            "adjust": adjust.lower(),
+            "rows": int(len(df)),
+            "fetched_at": time.time(),
+        }
+        tmp_meta = key_dir / "meta.json.tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, key_dir / "meta.json")
+
+    def merge(self, symbol: str, period: str, adjust: str, new_df: pd.DataFrame,
+              base: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        将新拉取的 K 线合并进缓存 (按 timestamp 去重，新数据覆盖旧数据) 并落盘
+
+        Args:
+            base: 已加载的缓存数据，避免重复读盘；为 None 时从磁盘读取
+        """
+        if base is None:
+            base = self.load(symbol, period, adjust)
+
+        if base.empty:
+            merged = new_df
+        elif new_df.empty:
+            merged = base
+        else:
+            merged = pd.concat([base, new_df], ignore_index=True)
+
+        merged = (merged.drop_duplicates(subset='timestamp', keep='last')
+                        .sort_values('timestamp')
+                        .reset_index(drop=True))
+        self.save(symbol, period, adjust, merged)
+        return merged
+
+    def meta(self, symbol: str, period: str, adjust: str = "forward") -> Dict[str, Any]:
+        meta_path = self._key_dir(symbol, period, adjust) / "meta.json"
+        if not meta_path.exists():
+            return {}
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def age_seconds(self, symbol: str, period: str, adjust: str = "forward") -> Optional[float]:
+        """距离最近一次从 API 补齐经过的秒数，未缓存时返回 None"""
+        fetched_at = self.meta(symbol, period, adjust).get('fetched_at')
+        if fetched_at is None:
+            return None
+        return time.time() - fetched_at
+
+    def list_keys(self) -> list:
+        """列出所有已缓存的 (symbol, period, adjust) 元信息"""
+        if not self.root.exists():
+            return []
+        return [json.loads(p.read_text(encoding='utf-8')) for p in sorted(self.root.glob("*/*/meta.json"))]
@@ -0,0 +1,207 @@
+import time
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+from longport.openapi import QuoteContext, TradeContext, OpenApiException, ErrorKind
+from src.utils.logger import get_logger
+
+# 这些调用重复发送会产生副作用 (重复下单/撤单)，断线重连后不自动重试
+NON_IDEMPOTENT_METHODS = {'submit_order', 'cancel_order', 'replace_order'}
+
+# 这些调用需要在重连后的新连接上重放，以恢复推送订阅
+SUBSCRIPTION_METHODS = {'subscribe', 'unsubscribe', 'subscribe_candlesticks', 'unsubscribe_candlesticks'}
+
+def is_connection_error(e: Exception) -> bool:
+    """
+    判断异常是否为连接层错误 (需要重建连接)，业务错误 (如无效代码) 不重连
+    """
+    if isinstance(e, OpenApiException):
+        return getattr(e, 'kind', None) != ErrorKind.OpenApi
+    return isinstance(e, (ConnectionError, TimeoutError))
+
+def _default_factory(kind: str):
+    from src.core.lp_config import get_hardcoded_lp_config
+    lp_config = get_hardcoded_lp_config()
+    if kind == 'quote':
+        return QuoteContext(lp_config)
+    return TradeContext(lp_config)
+
+class PooledContext:
+    """
+    Longport 上下文代理：每次调用取池中当前连接，连接错误时透明重连并重试
+    """
+    def __init__(self, pool: 'ContextPool', kind: str):
+        self._pool = pool
+        self._kind = kind
+
+    def __getattr__(self, name: str):
+        def call(*args, **kwargs):
+            ctx = self._pool.acquire(self._kind)
+            try:
+                result = getattr(ctx, name)(*args, **kwargs)
+            except Exception as e:
+                if not is_connection_error(e):
+                    raise
+                self._pool.logger.warning(f"{self._kind} context call {name} failed on connection error: {e}")
+                self._pool.reconnect(self._kind, stale=ctx)
+                if name in NON_IDEMPOTENT_METHODS:
+                    # 无法确认上一次请求是否已到达服务端，交给调用方处理
+                    raise
+                result = getattr(self._pool.acquire(self._kind), name)(*args, **kwargs)
+            if name.startswith('set_on_') or name in SUBSCRIPTION_METHODS:
+                # 调用成功后才记录，重连时只重放当前生效的回调与订阅
+                self._pool.remember(self._kind, name, args, kwargs)
+            return result
+        return call
+
+class ContextPool:
+    """
+    进程级 QuoteContext / TradeContext 池
+
+    每种上下文在首次使用时创建一次，之后所有命令和定时任务共用同一条已认证连接，
+    断线后自动重建并重放推送订阅。
+    """
+    _instance: Optional['ContextPool'] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, factory: Callable[[str], Any] = None):
+        self.logger = get_logger("context_pool")
+        self.factory = factory or _default_factory
+        self.lock = threading.Lock()
+        self.contexts: Dict[str, Any] = {}
+        # 重连后需要恢复的状态: 各回调的最后一次设置，以及当前订阅中的标的
+        # subscriptions[kind][(类别, 订阅类型)] = (订阅类型, {str(标的): 标的})
+        self.callbacks: Dict[str, Dict[str, Tuple[tuple, dict]]] = {'quote': {}, 'trade': {}}
+        self.subscriptions: Dict[str, Dict[Tuple[str, str], Tuple[Any, Dict[str, Any]]]] = {'quote': {}, 'trade': {}}
+        self.stats_data: Dict[str, Dict[str, Any]] = {
+            kind: {"created_at": None, "reuses": 0, "reconnects": 0} for kind in ('quote', 'trade')
+        }
+
+    @classmethod
+    def instance(cls) -> 'ContextPool':
+        """获取进程级单例"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def configure(cls, config: Dict[str, Any] = None) -> 'ContextPool':
+        """
+        按配置 broker.mode 选择连接工厂并重建进程级单例 (需在首次取连接前调用)
+
+        - live: 连接 Longport (默认)
+        - sim:  进程内模拟券商 (src/core/sim_broker.py)，行情与交易共用一个撮合引擎
+        """
+        mode = ((config or {}).get('broker', {}) or {}).get('mode', 'live')
+        factory = None
+        if mode == 'sim':
+            from src.core.sim_broker import sim_factory
+            factory = sim_factory(config)
+        with cls._instance_lock:
+            cls._instance = cls(factory)
+        return cls._instance
+
+    def quote(self) -> PooledContext:
+        """获取共享 QuoteContext (首次调用时建立连接，失败时抛出异常)"""
+        self.acquire('quote', count=False)
+        return PooledContext(self, 'quote')
+
+    def trade(self) -> PooledContext:
+        """获取共享 TradeContext (首次调用时建立连接，失败时抛出异常)"""
+        self.acquire('trade', count=False)
+        return PooledContext(self, 'trade')
+
+    def acquire(self, kind: str, count: bool = True):
+        """返回当前连接，不存在时创建"""
+        ctx = self.contexts.get(kind)
+        if ctx is None:
+            with self.lock:
+                ctx = self.contexts.get(kind)
+                if ctx is None:
+                    ctx = self._connect(kind)
+        elif count:
+            self.stats_data[kind]['reuses'] += 1
+        return ctx
+
+    def _connect(self, kind: str):
+        """建立新连接并重放订阅 (调用方需持有 self.lock)"""
+        start = time.perf_counter()
+        ctx = self.factory(kind)
+        for name, (args, kwargs) in self.callbacks[kind].items():
+            getattr(ctx, name)(*args, **kwargs)
+        for (family, _), (sub_type, members) in self.subscriptions[kind].items():
+            items = list(members.values())
+            if family == 'candlesticks':
+                for symbol in items:
+                    ctx.subscribe_candlesticks(symbol, sub_type)
+            elif family == 'quote':
+                ctx.subscribe(items, [sub_type])
+            else:
+                ctx.subscribe(items)
+        self.contexts[kind] = ctx
+        self.stats_data[kind]['created_at'] = time.time()
+        self.logger.debug(f"Longport {kind} context connected in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return ctx
+
+    def reconnect(self, kind: str, stale=None):
+        """
+        重建连接。stale 为调用方手中失效的连接，若已被其他线程替换则不重复重建
+        """
+        with self.lock:
+            if stale is not None and self.contexts.get(kind) is not stale:
+                return
+            self.contexts.pop(kind, None)
+            self.stats_data[kind]['reconnects'] += 1
+            self.logger.info(f"Reconnecting Longport {kind} context...")
+            self._connect(kind)
+
+    def remember(self, kind: str, name: str, args: tuple, kwargs: dict):
+        """
+        记录已成功的回调设置与订阅变更: 回调只保留最后一次设置，订阅按类别与订阅类型维护当前标的集合，
+        退订后移除，重连时只重放仍生效的订阅
+        """
+        with self.lock:
+            if name.startswith('set_on_'):
+                self.callbacks[kind][name] = (args, kwargs)
+                return
+
+            def arg(i: int, key: str, default=None):
+                return kwargs.get(key, args[i] if len(args) > i else default)
+
+            if name.endswith('candlesticks'):
+                # subscribe_candlesticks(symbol, period)
+                period = arg(1, 'period')
+                targets = [(('candlesticks', str(period)), period, [arg(0, 'symbol')])]
+            elif kind == 'quote':
+                # subscribe(symbols, sub_types)
+                symbols = arg(0, 'symbols', [])
+                targets = [(('quote', str(t)), t, symbols) for t in arg(1, 'sub_types', [])]
+            else:
+                # TradeContext.subscribe(topics)
+                targets = [(('topics', ''), None, arg(0, 'topics', []))]
+
+            subs = self.subscriptions[kind]
+            for key, sub_type, items in targets:
+                members = subs.setdefault(key, (sub_type, {}))[1]
+                for item in items:
+                    if name.startswith('un'):
+                        members.pop(str(item), None)
+                    else:
+                        members[str(item)] = item
+                if not members:
+                    subs.pop(key)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """连接状态: 是否已连接、连接时长 (秒)、复用次数、重连次数"""
+        now = time.time()
+        result = {}
+        for kind, data in self.stats_data.items():
+            created_at = data['created_at']
+            result[kind] = {
+                "connected": kind in self.contexts,
+                "age_seconds": now - created_at if created_at else 0.0,
+                "reuses": data['reuses'],
+                "reconnects": data['reconnects'],
+            }
+        return result
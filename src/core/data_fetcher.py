@@ -1,83 +1,242 @@
+import math
+import numpy as np
 import pandas as pd
-from typing import List, Union, Dict, Any
-from longport.openapi import QuoteContext, Config, Period, AdjustType
+from datetime import date, timedelta
+from operator import attrgetter
+from typing import List, Union, Dict, Any, Callable, Optional
+from longport.openapi import Period, AdjustType
+from src.core.bar_store import BarStore, BarView
+from src.core.context_pool import ContextPool
 from src.utils.logger import get_logger
 
+PERIOD_MAP = {
+    'day': Period.Day,
+    'week': Period.Week,
+    'month': Period.Month,
+    'year': Period.Year,
+    '1m': Period.Min_1,
+    '5m': Period.Min_5,
+    '15m': Period.Min_15,
+    '30m': Period.Min_30,
+    '60m': Period.Min_60,
+}
+
+ADJUST_MAP = {
+    'forward': AdjustType.ForwardAdjust,
+    'none': AdjustType.NoAdjust,
+}
+
+# 单次 candlesticks 请求最多返回的 K 线数量，超出时改用分页加载
+MAX_BARS_PER_REQUEST = 1000
+
+# 每个交易日的 K 线数量 (美股常规时段)，用于由 count 估算起始日期
+BARS_PER_DAY = {
+    'day': 1,
+    'week': 1 / 5,
+    'month': 1 / 21,
+    'year': 1 / 252,
+    '1m': 390,
+    '5m': 78,
+    '15m': 26,
+    '30m': 13,
+    '60m': 7,
+}
+
+KLINE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+def candlesticks_to_frame(candlesticks) -> pd.DataFrame:
+    """
+    将 SDK 返回的 Candlestick 列表按列转换为 DataFrame
+
+    每列预分配一个 NumPy 数组并一次性填充 (Decimal -> float64, volume -> int64)，
+    避免为每根 K 线构造 dict 再由 pandas 逐行推断类型。
+    """
+    n = len(candlesticks)
+    # pandas 对 datetime 列表的解析走 C 实现，比逐个写入 datetime64 数组快得多
+    timestamps = pd.to_datetime(list(map(attrgetter("timestamp"), candlesticks)))
+    columns = {"timestamp": np.asarray(timestamps, dtype="datetime64[ns]")}
+    for name in ("open", "high", "low", "close"):
+        columns[name] = np.fromiter(map(float, map(attrgetter(name), candlesticks)), dtype=np.float64, count=n)
+    columns["volume"] = np.fromiter(map(attrgetter("volume"), candlesticks), dtype=np.int64, count=n)
+
+    # 不设置 index，保留 timestamp 列，方便查看
+    return pd.DataFrame(columns, columns=KLINE_COLUMNS)
+
 class DataFetcher:
     def __init__(self, config: Dict[str, Any] = None):
         self.logger = get_logger("data_fetcher")
         
-        # 初始化 Longport Config
+        # 使用进程级共享的 QuoteContext，首次使用时建立连接
         try:
-            from src.core.lp_config import get_hardcoded_lp_config
-            self.lp_config = get_hardcoded_lp_config()
-            self.ctx = QuoteContext(self.lp_config)
+            self.ctx = ContextPool.instance().quote()
             self.logger.debug("Longport QuoteContext initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize Longport QuoteContext: {e}")
             # 这里不抛出异常，允许在没有配置的情况下实例化，但在调用方法时会报错
             self.ctx = None
 
+        # 本地 K 线缓存 (config.data 段，可关闭)
+        data_conf = (config or {}).get('data', {}) or {}
+        self.refresh_seconds = data_conf.get('refresh_seconds', 60)
+        self.history_conf = data_conf.get('history', {}) or {}
+        self.cache_dir = data_conf.get('cache_dir', 'data/bars')
+        broker_conf = (config or {}).get('broker', {}) or {}
+        if broker_conf.get('mode') == 'sim':
+            # 模拟行情不能写进真实行情缓存
+            self.cache_dir = (broker_conf.get('sim', {}) or {}).get('cache_dir', 'data/sim/bars')
+        if data_conf.get('cache_enabled', True):
+            self.store = BarStore(self.cache_dir)
+        else:
+            self.store = None
+
     def _check_connection(self):
         if self.ctx is None:
             raise RuntimeError("Longport QuoteContext not initialized. Check your .env configuration.")
 
-    def get_historical_klines(self, symbol: str, period: str = 'day', count: int = 30) -> pd.DataFrame:
+    def open_local(self, symbol: str, period: str = 'day', adjust: str = 'forward',
+                   start=None, end=None) -> BarView:
+        """
+        以内存映射方式打开本地缓存的 K 线 (零拷贝，不访问 API)
+
+        Args:
+            start / end: 时间范围，在 timestamp 列上二分查找切片
+        """
+        store = self.store or BarStore(self.cache_dir)
+        return store.open(symbol, period.lower(), adjust.lower(), start=start, end=end)
+
+    def get_historical_klines(self, symbol: str, period: str = 'day', count: int = 30,
+                              adjust: str = 'forward', refresh: bool = False) -> pd.DataFrame:
         """
         获取历史K线数据
+
+        优先读取本地缓存，只向 API 补齐最后一根缓存 K 线之后的数据。
         
         Args:
             symbol: 股票代码 (e.g., 'SPY.US')
             period: 周期 ('day', 'week', 'month', 'year', '1m', '5m', '15m', '30m', '60m')
             count: 获取数量
+            adjust: 复权方式 ('forward' 前复权, 'none' 不复权)
+            refresh: 忽略缓存新鲜度，强制向 API 补齐最新数据
             
         Returns:
             pd.DataFrame: 包含 OHLCV 数据的 DataFrame
         """
         self._check_connection()
         
-        period_map = {
-            'day': Period.Day,
-            'week': Period.Week,
-            'month': Period.Month,
-            'year': Period.Year,
-            '1m': Period.Min_1,
-            '5m': Period.Min_5,
-            '15m': Period.Min_15,
-            '30m': Period.Min_30,
-            '60m': Period.Min_60,
-        }
-        
-        lp_period = period_map.get(period.lower(), Period.Day)
+        period = period.lower()
+        adjust = adjust.lower()
+        lp_period = PERIOD_MAP.get(period, Period.Day)
+        lp_adjust = ADJUST_MAP.get(adjust, AdjustType.ForwardAdjust)
         
         try:
-            self.logger.info(f"Fetching {count} {period} klines for {symbol}...")
-            # 使用前复权 (Forward) 适合策略回测
-            candlesticks = self.ctx.candlesticks(symbol, lp_period, count, adjust_type=AdjustType.ForwardAdjust)
-            
-            data = []
-            for k in candlesticks:
-                data.append({
-                    "timestamp": k.timestamp, 
-                    "open": float(k.open),
-                    "high": float(k.high),
-                    "low": float(k.low),
-                    "close": float(k.close),
-                    "volume": int(k.volume)
-                })
-            
-            df = pd.DataFrame(data)
-            if not df.empty:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                # 不设置 index，保留 timestamp 列，方便查看
-            
-            self.logger.debug(f"Successfully fetched {len(df)} records")
-            return df
+            if self.store is None:
+                self.logger.info(f"Fetching {count} {period} klines for {symbol}...")
+                df = self._fetch_latest(symbol, lp_period, lp_adjust, count)
+                self.logger.debug(f"Successfully fetched {len(df)} records")
+                return df
+
+            cached = self.store.load(symbol, period, adjust)
+
+            if len(cached) < count and count > MAX_BARS_PER_REQUEST:
+                # 超出单次请求上限，按日期分页回溯加载
+                trading_days = math.ceil(count / BARS_PER_DAY.get(period, 1))
+                start = date.today() - timedelta(days=int(trading_days * 365 / 252 * 1.05) + 10)
+                merged = self.load_history(symbol, period, start, adjust=adjust)
+                return merged.tail(count).reset_index(drop=True)
+
+            if len(cached) < count:
+                # 缓存不足以覆盖请求窗口，整段拉取后合并
+                self.logger.info(f"Fetching {count} {period} klines for {symbol}...")
+                fresh = self._fetch_latest(symbol, lp_period, lp_adjust, count)
+                self.store.record('misses', len(fresh))
+                if fresh.empty:
+                    return fresh
+                # 复权数据在除权后会整体变化，整段拉取时直接以新数据为准
+                merged = self.store.merge(symbol, period, adjust, fresh, base=fresh.iloc[:0])
+                return merged.tail(count).reset_index(drop=True)
+
+            age = self.store.age_seconds(symbol, period, adjust)
+            if not refresh and age is not None and age < self.refresh_seconds:
+                self.store.record('hits')
+                self.logger.debug(f"Serving {count} {period} klines for {symbol} from cache ({age:.0f}s old)")
+                return cached.tail(count).reset_index(drop=True)
+
+            # 增量补齐: 从倒数第二根 K 线所在日期开始拉取，
+            # 倒数第二根用于校验复权是否变化，最后一根可能是未收盘的 K 线，需要覆盖
+            anchor = cached.iloc[-2] if len(cached) >= 2 else cached.iloc[-1]
+            self.logger.info(f"Topping up {period} klines for {symbol} since {anchor['timestamp']}...")
+            candlesticks = self.ctx.history_candlesticks_by_date(
+                symbol, lp_period, lp_adjust, anchor['timestamp'].date(), date.today()
+            )
+            fresh = self._to_frame(candlesticks)
+
+            overlap = fresh[fresh['timestamp'] == anchor['timestamp']]
+            if not overlap.empty and abs(overlap['close'].iloc[0] - anchor['close']) > 1e-9 * abs(anchor['close']):
+                # 除权除息导致历史复权价变化，缓存作废
+                if len(cached) > count:
+                    # 缓存比本次请求更深 (如 load_history 加载的长历史)，按原范围分页重新加载，不能截断为 count 根
+                    self.logger.info(f"Adjusted prices changed for {symbol}, reloading {len(cached)} cached {period} klines...")
+                    merged = self.load_history(symbol, period, cached['timestamp'].iloc[0].date(),
+                                               adjust=adjust, replace=True)
+                    return merged.tail(count).reset_index(drop=True)
+                self.logger.info(f"Adjusted prices changed for {symbol}, refetching {count} {period} klines...")
+                fresh = self._fetch_latest(symbol, lp_period, lp_adjust, count)
+                self.store.record('misses', len(fresh))
+                merged = self.store.merge(symbol, period, adjust, fresh, base=fresh.iloc[:0])
+                return merged.tail(count).reset_index(drop=True)
+
+            self.store.record('topups', len(fresh))
+            merged = self.store.merge(symbol, period, adjust, fresh, base=cached)
+            self.logger.debug(f"Cache stats: {self.store.stats}")
+            return merged.tail(count).reset_index(drop=True)
             
         except Exception as e:
             self.logger.error(f"Error fetching historical klines for {symbol}: {e}")
             return pd.DataFrame()
 
+    def load_history(self, symbol: str, period: str, start: date, end: Optional[date] = None,
+                     adjust: str = 'forward', on_page: Optional[Callable[[int, int, int], None]] = None,
+                     replace: bool = False) -> pd.DataFrame:
+        """
+        分页回溯加载 [start, end] 区间的历史 K 线到本地缓存
+
+        Args:
+            on_page: 进度回调 (已完成页数, 总页数, 已获取 K 线数)
+            replace: 丢弃原有缓存，以本次加载的数据为准 (复权价整体变化时使用)
+
+        Returns:
+            pd.DataFrame: 本地缓存中该标的的全部 K 线
+        """
+        self._check_connection()
+        if self.store is None:
+            raise RuntimeError("History loading requires the local bar cache (data.cache_enabled).")
+
+        from src.core.history_loader import HistoryLoader
+        loader = HistoryLoader(
+            self.ctx, self.store,
+            max_workers=self.history_conf.get('max_workers', 4),
+            requests_per_second=self.history_conf.get('requests_per_second', 8.0)
+        )
+        period = period.lower()
+        return loader.load(
+            symbol, period,
+            PERIOD_MAP.get(period, Period.Day), ADJUST_MAP.get(adjust, AdjustType.ForwardAdjust), adjust,
+            start, end, on_page=on_page, replace=replace
+        )
+
+    def _fetch_latest(self, symbol: str, lp_period, lp_adjust, count: int) -> pd.DataFrame:
+        """从 API 拉取最近 count 根 K 线"""
+        candlesticks = self.ctx.candlesticks(symbol, lp_period, count, adjust_type=lp_adjust)
+        return self._to_frame(candlesticks)
+
+    def _to_frame(self, candlesticks) -> pd.DataFrame:
+        """将 SDK 返回的 Candlestick 列表转换为 DataFrame"""
+        return candlesticks_to_frame(candlesticks)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """本进程内 K 线缓存的命中统计"""
+        return dict(self.store.stats) if self.store else {}
+
     def get_realtime_quote(self, symbols: Union[str, List[str]]) -> Dict[str, Dict]:
         """
         获取实时行情
@@ -0,0 +1,816 @@
+import time
+import asyncio
+import threading
+import numpy as np
+import pandas as pd
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+from src.core.data_fetcher import DataFetcher
+from src.core.strategy import Signal
+from src.core.strategy_book import StrategyInstance, StrategyBook, load_instances
+from src.core.trader import Trader
+from src.core.notifier import Notifier
+from src.core.context_pool import ContextPool
+from src.core.order_manager import OrderManager, OrderRecord, OrderStatus, order_sequence
+from src.core.paper_broker import PaperBroker
+from src.core.execution_policy import ExecutionPolicy
+from src.core.strategy_positions import StrategyPositions
+from src.core.quote_stream import QuoteBook, LongportQuoteFeed, is_regular_session
+from src.core.trading_calendar import TradingCalendar, get_calendar
+from src.utils.logger import get_logger
+
+try:
+    from apscheduler.triggers.base import BaseTrigger
+except ImportError:  # run --once 不需要调度器
+    BaseTrigger = object
+
+# 各任务从计划时间到完成的默认时限 (秒)，超出计入 missed
+DEFAULT_DEADLINES = {
+    "signal": 120,
+    "stage": 120,
+    "execution": 2400,
+    "risk": 30,
+    "heartbeat": 10,
+    "open_to_submit": 1,   # 开盘执行开始 -> 券商受理 (不是定时任务，按订单统计)
+}
+
+@dataclass
+class JobStats:
+    """单个定时任务的运行统计"""
+    name: str
+    deadline: float
+    runs: int = 0
+    failures: int = 0
+    missed: int = 0
+    durations: deque = field(default_factory=lambda: deque(maxlen=1000))   # 执行耗时 (秒)
+    latencies: deque = field(default_factory=lambda: deque(maxlen=1000))   # 计划时间 -> 完成 (秒)
+
+    def summary(self) -> Dict[str, Any]:
+        d = np.array(self.durations) * 1000
+        lat = np.array(self.latencies) * 1000
+        return {
+            "job": self.name,
+            "runs": self.runs,
+            "failures": self.failures,
+            "missed": self.missed,
+            "p50_ms": float(np.median(d)) if len(d) else None,
+            "p99_ms": float(np.percentile(d, 99)) if len(d) else None,
+            "latency_p50_ms": float(np.median(lat)) if len(lat) else None,
+            "latency_max_ms": float(lat.max()) if len(lat) else None,
+        }
+
+def sync_paper_orders(orders: OrderManager, changed):
+    """把模拟盘订单的成交 / 过期 / 撤销同步到本地订单日志"""
+    for o in changed:
+        orders.apply_broker_update(o.order_id, OrderStatus(o.status), o.filled_quantity or None, o.filled_price)
+
+class SessionTrigger(BaseTrigger):
+    """每个交易日开盘 (anchor='open') / 收盘 (anchor='close') 后 offset_minutes 触发，休市日不触发，半日市按提前收盘时间"""
+    def __init__(self, calendar: TradingCalendar, anchor: str = 'close', offset_minutes: float = 0):
+        if anchor not in ('open', 'close'):
+            raise ValueError(f"Unsupported session anchor: {anchor}")
+        self.calendar = calendar
+        self.anchor = anchor
+        self.offset = pd.Timedelta(minutes=offset_minutes)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        after = pd.Timestamp(previous_fire_time) + pd.Timedelta(microseconds=1) if previous_fire_time else pd.Timestamp(now)
+        find = self.calendar.next_open if self.anchor == 'open' else self.calendar.next_close
+        return (find(after - self.offset) + self.offset).to_pydatetime()
+
+    def __str__(self):
+        return f"session[{self.anchor} + {self.offset.total_seconds() / 60:g} min]"
+
+class TradingEngine:
+    """
+    常驻交易引擎
+
+    数据获取器、多实例信号状态 (StrategyBook)、Trader (账户缓存 / 推送订阅)、订单日志与通知模块
+    在启动时创建一次并预热，并订阅所有标的的行情推送。之后由 APScheduler (AsyncIOScheduler)
+    在同一事件循环中并发调度:
+
+    - signal (默认收盘后 5 分钟): 取各标的当日 K 线 -> 向量化计算所有实例的信号 -> 有信号时登记 PENDING 订单
+    - stage (默认开盘前 5 分钟): 刷新账户、按可用资金 / 持仓复核数量、作废过期信号，把待执行订单按标的备好
+    - execution (默认下一交易日开盘): 热路径只等各标的的开盘推送行情 -> 跳空检查 -> 下单
+      (live 共用一个 OrderExecutor，paper 提交到实例的模拟账户)，记录开盘到券商受理的延迟
+    - risk (盘中每 risk_monitor_seconds 秒): 按 risk.stop_loss_pct / take_profit_pct 检查各实例持仓并平仓
+    - heartbeat: 记录连接与任务统计
+
+    当日 K 线优先取推送行情的 OHLC，其次一次批量请求所有缺失标的的报价，仍缺失 (未预热 /
+    与已有 K 线不连续) 的标的才并发拉取 K 线。所有实例共用一对行情 / 交易连接。
+    config.strategies 配置多个实例 (标的、均线、仓位、资金上限)，未配置时为顶层 symbol + strategy 的单实例。
+
+    阻塞的 SDK 调用放到线程中执行，任务之间互不阻塞。每个任务统计执行耗时、计划时间到完成的延迟，
+    错过调度 (misfire / 上一次仍在运行) 或超出时限都计入 missed。
+    调度、盘中判断与 K 线连续性检查都按交易日历 (TradingCalendar): 休市日不运行，半日市按 13:00 收盘。
+    run_once() 保留原 run_job 语义: 计算信号后立即下单。
+    """
+    def __init__(self, config: Dict[str, Any] = None, mode: str = "signal"):
+        self._t0 = time.perf_counter()
+        self.logger = get_logger("engine")
+        self.config = config or {}
+        self.mode = mode
+        self.risk_conf = self.config.get('risk', {}) or {}
+
+        engine_conf = self.config.get('engine', {}) or {}
+        self.calendar = get_calendar(self.config)
+        self.timezone = self.calendar.tz_info
+        self.signal_delay = engine_conf.get('signal_after_close_minutes', 5)
+        self.execution_delay = engine_conf.get('execution_after_open_minutes', 0)
+        self.stage_lead = engine_conf.get('stage_before_open_minutes', 5)
+        self.open_quote_timeout = engine_conf.get('open_quote_timeout_seconds', 3)
+        # 与 OrderExecutor 相同的执行规则: 信号过期判断、买单按可能付出的最高价分配资金
+        self.policy = ExecutionPolicy(self.config)
+        self.max_signal_age = self.policy.max_signal_age
+        self.heartbeat_minutes = engine_conf.get('heartbeat_minutes', 60)
+        self.risk_seconds = engine_conf.get('risk_monitor_seconds', 60)
+        self.misfire_grace = engine_conf.get('misfire_grace_seconds', 60)
+        self.quote_push = engine_conf.get('quote_push', True)
+        self.quote_max_age = engine_conf.get('quote_max_age_seconds', 300)
+        self.max_workers = (self.config.get('data', {}).get('history', {}) or {}).get('max_workers', 4)
+        deadlines = {**DEFAULT_DEADLINES, **(engine_conf.get('deadlines', {}) or {})}
+        self.stats = {name: JobStats(name, deadline) for name, deadline in deadlines.items()}
+
+        # 策略实例
+        self.instances = load_instances(self.config)
+        self.multi = bool(self.config.get('strategies'))
+        self.by_name = {i.name: i for i in self.instances}
+        self.book = StrategyBook(self.instances)
+        self.symbols = self.book.symbols
+
+        # 常驻模块
+        self.fetcher = DataFetcher(self.config)
+        self.notifier = Notifier(self.config)
+        self.orders = OrderManager(self.config)
+        self.paper: Optional[PaperBroker] = None
+        self.trader: Optional[Trader] = None
+        self.positions: Optional[StrategyPositions] = None
+        if mode == 'paper':
+            self.paper = PaperBroker(self.config, quote_fn=self._last_price)
+        elif mode == 'live':
+            self.trader = Trader(self.config)
+        if self.paper is None and self.multi:
+            # 多个实例共用一个券商账户，各实例持仓单独保存 (不受订单日志压缩影响)
+            orders_conf = self.config.get('orders', {}) or {}
+            self.positions = StrategyPositions(orders_conf.get('positions_path') or
+                                               self.orders.journal.path.with_name('strategy_positions.json'))
+        self.executor = None
+        self.quotes = QuoteBook()
+        self.feed: Optional[LongportQuoteFeed] = None
+        # 每个标的当日 K 线的来源计数
+        self.decisions = {"push": 0, "quote": 0, "fetch": 0}
+
+        self.last_signals: Dict[str, Signal] = {}
+        self.init_seconds = time.perf_counter() - self._t0
+        self.first_decision_seconds: Optional[float] = None
+        self.scheduler = None
+        self._stop: Optional[asyncio.Event] = None
+        self._exited = set()
+        self._early: Dict[str, Tuple] = {}
+        self._push_lock = threading.Lock()
+
+        # 开盘执行: 已备好的订单 (标的 -> 订单)、备好的时刻、等待开盘行情的标的、各订单的计时起点
+        self._armed: Dict[str, List[OrderRecord]] = {}
+        self._armed_at: Optional[float] = None
+        self._open_waiters: Dict[str, asyncio.Event] = {}
+        self._open_started: Dict[str, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _last_price(self, symbol: str) -> float:
+        return self.fetcher.get_realtime_quote(symbol)[symbol]['price']
+
+    def account_for(self, instance: StrategyInstance):
+        """实例下单 / 查询所用的账户: paper 为该实例的模拟账户，live 为共用的 Trader"""
+        if self.paper is None:
+            return self.trader
+        if not self.multi:
+            return self.paper.account((self.config.get('paper', {}) or {}).get('account', 'default'))
+        return self.paper.account(instance.name, initial_cash=instance.capital)
+
+    # ---------- 行情 ----------
+
+    def warm(self):
+        """预热: 并发加载各标的历史K线初始化均线窗口，订阅行情推送，拉取一次账户资金与持仓进入缓存"""
+        for symbol, df in self._fetch_bars(self.symbols).items():
+            self.book.seed(symbol, df)
+        if self.quote_push and self.fetcher.ctx is not None and self.feed is None:
+            try:
+                self.feed = LongportQuoteFeed(self.fetcher.ctx)
+                self.feed.start(self.symbols, self._on_quote)
+            except Exception as e:
+                self.feed = None
+                self.logger.warning(f"Quote push unavailable, signals will fetch bars: {e}")
+        if self.trader is not None:
+            try:
+                self.trader.get_account_balance()
+                self.trader.get_positions()
+                # 直接下单 (run_once) 的成交经订单推送写入订单日志，实例持仓按日志归属
+                self.trader.subscribe_order_updates(self._on_order)
+            except Exception as e:
+                self.logger.warning(f"Account warm-up failed: {e}")
+        self.logger.info(f"Engine warm in {(time.perf_counter() - self._t0) * 1000:.0f} ms: "
+                         f"{len(self.instances)} instances on {len(self.symbols)} symbols")
+
+    def _on_quote(self, symbol: str, fields: Dict[str, Any]):
+        self.quotes.update(symbol, {**fields, "received": time.monotonic()})
+        waiter = self._open_waiters.get(symbol)
+        if waiter is not None:
+            self._loop.call_soon_threadsafe(waiter.set)
+
+    def _on_order(self, event):
+        update = (int(event.executed_quantity or 0), float(event.executed_price or 0) or None)
+        broker_order_id = str(event.order_id)
+        with self._push_lock:
+            if self.orders.by_broker_id(broker_order_id) is None:
+                # submit_order 尚未返回订单号时推送已到达，登记后再应用
+                self._early[broker_order_id] = (event.status, *update)
+                if len(self._early) > 1000:
+                    self._early.pop(next(iter(self._early)))
+                return
+        self.orders.apply_broker_update(broker_order_id, event.status, *update)
+
+    def _fetch_bars(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """并发拉取日K (经本地缓存增量补齐)"""
+        count = self.book.depth + 10
+
+        def fetch(symbol):
+            return self.fetcher.get_historical_klines(symbol, period='day', count=count, refresh=True)
+
+        if len(symbols) == 1:
+            frames = {symbols[0]: fetch(symbols[0])}
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                frames = dict(zip(symbols, pool.map(fetch, symbols)))
+        for symbol, df in frames.items():
+            if df.empty:
+                self.logger.error(f"No data fetched from market for {symbol}.")
+        return {s: df for s, df in frames.items() if not df.empty}
+
+    def _quote_bar(self, symbol: str, quote: Optional[Dict[str, Any]], max_age: float = None) -> Optional[Dict[str, Any]]:
+        """
+        由行情构造当日 K 线；行情过期、来自盘前 / 盘后时段 (收盘价会被盘后成交覆盖)，
+        或当日与该标的最后一根 K 线不连续 (中间可能缺少交易日) 时返回 None
+        """
+        last = self.book.last_timestamp(symbol)
+        if not quote or last is None or not is_regular_session(quote):
+            return None
+        if max_age is not None and time.monotonic() - quote['received'] > max_age:
+            return None
+        ts = pd.Timestamp(quote['timestamp'])
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert(self.timezone).tz_localize(None)
+        ts = ts.normalize()
+        if self.calendar.bars_between(last, ts) > 1:
+            return None
+        return {"timestamp": ts, "open": quote['open'], "high": quote['high'], "low": quote['low'],
+                "close": quote['price']}
+
+    def latest_bars(self) -> Dict[str, Any]:
+        """
+        取各标的当日 K 线并写入信号状态: 推送行情 -> 一次批量报价 -> 并发拉取 K 线
+        """
+        bars = {}
+        for symbol in self.symbols:
+            bar = self._quote_bar(symbol, self.quotes.quotes.get(symbol), self.quote_max_age)
+            if bar is not None:
+                bars[symbol] = bar
+                self.decisions['push'] += 1
+
+        missing = [s for s in self.symbols if s not in bars and self.book.last_timestamp(s) is not None]
+        if missing:
+            try:
+                quotes = self.fetcher.get_realtime_quote(missing)
+            except Exception as e:
+                self.logger.warning(f"Batch quote failed, falling back to K-lines: {e}")
+                quotes = {}
+            for symbol in missing:
+                bar = self._quote_bar(symbol, quotes.get(symbol))
+                if bar is not None:
+                    bars[symbol] = bar
+                    self.decisions['quote'] += 1
+
+        for symbol, bar in bars.items():
+            self.book.update(symbol, float(bar['close']), bar['timestamp'])
+
+        rest = [s for s in self.symbols if s not in bars]
+        if rest:
+            self.logger.info(f"Fetching market data for {len(rest)} symbols...")
+            for symbol, df in self._fetch_bars(rest).items():
+                self.book.seed(symbol, df)
+                bars[symbol] = df.iloc[-1]
+                self.decisions['fetch'] += 1
+        return bars
+
+    # ---------- 决策 ----------
+
+    def decide(self) -> List[OrderRecord]:
+        """
+        取当日 K 线 -> 计算所有实例的信号 -> 计算数量并登记 PENDING 订单
+        """
+        bars = self.latest_bars()
+        if not bars:
+            self.logger.error("No data fetched from market.")
+            return []
+
+        if self.paper is not None:
+            # 模拟盘: 先用最新一根 K 线撮合之前留下的挂单 (T+1 开盘执行)
+            for symbol, bar in bars.items():
+                sync_paper_orders(self.orders, self.paper.on_bar(symbol, bar))
+
+        signals = self.book.signals()
+        if self.first_decision_seconds is None:
+            self.first_decision_seconds = time.perf_counter() - self._t0
+
+        records = []
+        for instance, signal in zip(self.instances, signals):
+            if instance.symbol not in bars:
+                continue
+            self.last_signals[instance.name] = signal
+            if signal.signal_type == "HOLD":
+                continue
+            self.logger.info(f"Signal Result [{instance.name}]: {signal}")
+
+            # 有信号 (BUY/SELL)
+            self.notifier.notify_signal(signal)
+            if self.mode == 'signal':
+                continue
+            try:
+                qty = self._order_quantity(instance, signal)
+            except Exception as e:
+                self.logger.error(f"Sizing for {instance.name} failed: {e}")
+                continue
+            if qty <= 0:
+                continue
+            records.append(self.orders.create(
+                instance.symbol, signal.signal_type, qty,
+                order_type=instance.order_type.lower(),
+                signal_date=str(signal.timestamp)[:10],
+                signal_price=signal.price,
+                strategy=instance.name,
+                note=self.mode
+            ))
+
+        holds = sum(s.signal_type == "HOLD" for s in signals)
+        self.logger.info(f"Signals: {len(signals) - holds} actionable, {holds} hold across {len(signals)} instances")
+        if self.mode == 'signal' and holds < len(signals):
+            self.logger.info("[Signal Mode] Operation complete. No trade executed.")
+        return records
+
+    def _ledger(self, instance: StrategyInstance) -> Tuple[int, float]:
+        """
+        计算实例自己的持仓数量与平均成本 (多个实例共用一个券商账户时区分归属)
+
+        已结束的订单折算进 StrategyPositions 快照，订单日志压缩后结果不变
+        """
+        records = [r for r in self.orders.orders_for(instance.symbol) if r.strategy == instance.name]
+        return self.positions.position(instance.name, instance.symbol, records)
+
+    def position(self, instance: StrategyInstance) -> Tuple[int, float]:
+        """实例可卖数量与成本价"""
+        account = self.account_for(instance)
+        pos = next((p for p in account.get_positions(instance.symbol) if p['symbol'] == instance.symbol), None)
+        qty, cost = (pos.get('available_quantity', 0), pos.get('cost_price', 0.0)) if pos else (0, 0.0)
+        if self.paper is None and self.multi:
+            held, cost = self._ledger(instance)
+            qty = min(qty, held)
+        return qty, cost
+
+    def _committed_cash(self) -> float:
+        """已登记未成交的买单占用的资金 (多个实例共用现金时避免重复分配)"""
+        return sum((r.quantity - r.filled_quantity) * self.policy.budget_price(r.signal_price or 0.0)
+                   for r in self.orders.active_orders() if r.side.upper() == "BUY" and r.note == self.mode)
+
+    def _order_quantity(self, instance: StrategyInstance, signal: Signal) -> int:
+        # 买入按实例的 position_ratio 与资金上限分配现金，卖出为实例的全部持仓
+        account = self.account_for(instance)
+        if signal.signal_type == "BUY":
+            balance = account.get_account_balance()
+            if not balance:
+                self.logger.error("Failed to get account balance.")
+                return 0
+            cash = balance.get('cash', 0)
+            if self.paper is None and self.multi:
+                cash -= self._committed_cash()
+                if instance.capital is not None:
+                    held, cost = self._ledger(instance)
+                    cash = min(cash, instance.capital - held * cost)
+            # 执行器的限价 / 追单可能高于信号价，按最高价分配，避免下单时现金不足
+            price = self.policy.budget_price(signal.price)
+            qty = int(cash * instance.position_ratio / price) if price > 0 else 0
+            if qty <= 0:
+                self.logger.warning(f"Insufficient funds to buy {instance.name}. Cash: {cash}, Price: {signal.price}")
+            return max(qty, 0)
+
+        qty, _ = self.position(instance)
+        if qty <= 0:
+            self.logger.warning(f"Signal is SELL but no position found for {instance.name}.")
+        return qty
+
+    def submit(self, record: OrderRecord):
+        """直接下单 (不经过 OrderExecutor)"""
+        symbol, side, qty = record.symbol, record.side, record.quantity
+        instance = self.by_name.get(record.strategy) or self.instances[0]
+        if self.mode == 'live':
+            self.logger.info(f"[LIVE] Executing {side} {qty} {symbol}...")
+            order_type = instance.order_type
+            # Limit 单以信号价格 (收盘价) 为限价
+            price = record.signal_price if order_type == 'Limit' else None
+            try:
+                order_id = self.trader.submit_order(symbol, side, qty, price, order_type)
+            except Exception:
+                self.orders.transition(record.order_id, OrderStatus.REJECTED)
+                raise
+            with self._push_lock:
+                self.orders.mark_submitted(record.order_id, str(order_id), limit_price=price,
+                                           execution_date=datetime.now().strftime('%Y-%m-%d'))
+                early = self._early.pop(str(order_id), None)
+            if early is not None:
+                self.orders.apply_broker_update(str(order_id), *early)
+            self.logger.info(f"Trade submitted. ID: {order_id} ({record.order_id})")
+            self.notifier.notify_order(f"Executed {side} {qty} {symbol}. Order ID: {order_id}")
+
+        elif self.mode == 'paper':
+            # 不带限价: 由模拟盘按 order_execution 配置 (跳空保护 / 限价带 / 追单) 撮合
+            account = self.account_for(instance)
+            try:
+                paper_id = account.submit_order(symbol, side, qty, order_type='Market',
+                                                reference_price=record.signal_price, after=record.signal_date)
+            except Exception:
+                self.orders.transition(record.order_id, OrderStatus.REJECTED)
+                raise
+            self.orders.mark_submitted(record.order_id, paper_id, execution_date=datetime.now().strftime('%Y-%m-%d'))
+            paper_order = account.orders[paper_id]
+            if paper_order.status != 'pending':
+                sync_paper_orders(self.orders, [paper_order])
+            self.logger.info(f"[PAPER] {side} {qty} {symbol} -> {paper_id} [{paper_order.status}]")
+            self.notifier.notify_order(f"[PAPER] {side} {qty} {symbol}. Order ID: {paper_id}")
+
+    def run_once(self):
+        """立即运行一次: 计算信号后直接下单 (run --once)"""
+        try:
+            records = self.decide()
+        except Exception as e:
+            self.logger.error(f"Job execution failed: {e}", exc_info=True)
+            self.notifier.send("Error Alert", f"Job failed: {e}")
+            return
+        for record in records:
+            try:
+                self.submit(record)
+            except Exception as e:
+                self.logger.error(f"Order {record.order_id} failed: {e}", exc_info=True)
+                self.notifier.send("Error Alert", f"Order {record.order_id} failed: {e}")
+
+    # ---------- 定时任务 ----------
+
+    async def signal_job(self):
+        records = await asyncio.to_thread(self.decide)
+        if records:
+            self.logger.info(f"{len(records)} orders staged for execution at {self.calendar.next_open()}")
+
+    def staged_orders(self) -> List[OrderRecord]:
+        return [r for r in self.orders.active_orders() if r.state == OrderStatus.PENDING and r.note == self.mode]
+
+    async def ensure_executor(self):
+        if self.mode == 'live' and self.executor is None:
+            from src.core.executor import OrderExecutor
+            self.executor = OrderExecutor(self.trader, self.config, order_manager=self.orders,
+                                          quote_fn=lambda s: self.fetcher.get_realtime_quote(s).get(s, {}))
+            self.executor.on_submit = self._on_submitted
+            await self.executor.start()
+
+    async def _execute(self, record: OrderRecord, open_price: float = None):
+        if self.executor is not None:
+            await self.executor.execute(record.symbol, record.side, record.quantity, record.signal_price,
+                                        record=record, open_price=open_price)
+        else:
+            await asyncio.to_thread(self.submit, record)
+            self._on_submitted(record, None)
+
+    # ---------- 开盘执行 ----------
+
+    def prepare_open(self) -> List[OrderRecord]:
+        """
+        开盘前复核待执行订单 (不在开盘热路径上): 刷新账户缓存，信号日距下次开盘超过
+        max_signal_age_sessions 个交易日的订单作废，卖出数量不超过实例持仓，买入按账户现金依次分配，
+        复核结果写入订单日志 (staged_at)，订单按标的备好供开盘执行
+        """
+        staged = sorted(self.staged_orders(), key=order_sequence)
+        next_open = self.calendar.next_open(datetime.now(self.timezone))
+        if self.trader is not None:
+            try:
+                self.trader.get_account_balance(force=True)
+                self.trader.get_positions(force=True)
+            except Exception as e:
+                self.logger.warning(f"Account refresh before open failed, using cached state: {e}")
+
+        armed: Dict[str, List[OrderRecord]] = {}
+        budgets: Dict[int, float] = {}
+        stamp = datetime.now().isoformat(timespec='seconds')
+        for record in staged:
+            if self.max_signal_age and record.signal_date and \
+                    self.calendar.bars_between(record.signal_date, next_open) > self.max_signal_age:
+                self.logger.warning(f"{record.order_id}: signal of {record.signal_date} is stale at {next_open}, expired")
+                self.orders.transition(record.order_id, OrderStatus.EXPIRED)
+                continue
+
+            instance = self.by_name.get(record.strategy) or self.instances[0]
+            qty = record.quantity
+            if record.side.upper() == "SELL":
+                qty = min(qty, self.position(instance)[0])
+            elif record.signal_price:
+                account = self.account_for(instance)
+                if id(account) not in budgets:
+                    budgets[id(account)] = (account.get_account_balance() or {}).get('cash', 0.0)
+                price = self.policy.budget_price(record.signal_price)
+                qty = min(qty, max(int(budgets[id(account)] / price), 0))
+                budgets[id(account)] -= qty * price
+
+            if qty <= 0:
+                self.logger.warning(f"{record.order_id}: nothing left to {record.side} {record.symbol} at open, cancelled")
+                self.orders.transition(record.order_id, OrderStatus.CANCELLED)
+                continue
+            if qty != record.quantity:
+                self.logger.info(f"{record.order_id}: quantity {record.quantity} -> {qty} after pre-open check")
+            self.orders.update(record.order_id, quantity=qty, staged_at=stamp)
+            armed.setdefault(record.symbol, []).append(record)
+
+        self._armed, self._armed_at = armed, time.monotonic()
+        count = sum(len(v) for v in armed.values())
+        self.logger.info(f"Staged {count} orders on {len(armed)} symbols for the {next_open} open")
+        return [r for records in armed.values() for r in records]
+
+    def _opening(self, quote: Dict[str, Any], armed_at: float) -> bool:
+        """备好之后收到的盘中行情 (带开盘价) 才是当日开盘行情，盘前 / 盘后推送不算"""
+        return quote.get('received', 0) >= armed_at and bool(quote.get('open')) and is_regular_session(quote)
+
+    async def _opening_quote(self, symbol: str, armed_at: float, deadline: float) -> Optional[Dict[str, Any]]:
+        """等待该标的的开盘推送行情，超时返回 None"""
+        event = self._open_waiters.setdefault(symbol, asyncio.Event())
+        try:
+            while True:
+                with self.quotes.lock:
+                    quote = dict(self.quotes.quotes.get(symbol) or {})
+                if self._opening(quote, armed_at):
+                    return quote
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+                event.clear()
+        finally:
+            self._open_waiters.pop(symbol, None)
+
+    def _on_submitted(self, parent: OrderRecord, child: Optional[OrderRecord]):
+        """父订单第一笔子单被受理时记录开盘到下单的延迟"""
+        started = self._open_started.pop(parent.order_id, None)
+        if started is None:
+            return
+        latency = time.perf_counter() - started
+        stats = self.stats.setdefault("open_to_submit", JobStats("open_to_submit", DEFAULT_DEADLINES["open_to_submit"]))
+        stats.runs += 1
+        stats.durations.append(latency)
+        if latency > stats.deadline:
+            stats.missed += 1
+            self.logger.warning(f"{parent.order_id} submitted {latency * 1000:.0f} ms after open (deadline {stats.deadline}s)")
+        self.orders.update(parent.order_id, submit_latency_ms=round(latency * 1000, 2))
+
+    def _fit_open(self, record: OrderRecord, open_price: float) -> bool:
+        """
+        按开盘价复核买单数量: 分配资金时的单价 (budget_price) 买不到复核数量时按开盘限价缩减，
+        缩减为 0 的订单取消。跳空超限的买单由执行器按跳空保护处理，不在这里缩减。
+        """
+        if record.side.upper() != "BUY" or not record.signal_price or \
+                self.policy.gap_blocked(1, record.signal_price, open_price):
+            return True
+        price = float(self.policy.limit_for(open_price, 1))
+        qty = min(record.quantity, int(record.quantity * self.policy.budget_price(record.signal_price) / price))
+        if qty == record.quantity:
+            return True
+        if qty <= 0:
+            self.logger.warning(f"{record.order_id}: opened at {open_price}, cash covers no shares, cancelled")
+            self.orders.transition(record.order_id, OrderStatus.CANCELLED)
+            return False
+        self.logger.info(f"{record.order_id}: quantity {record.quantity} -> {qty} at open {open_price}")
+        self.orders.update(record.order_id, quantity=qty)
+        return True
+
+    async def execute_open(self):
+        """
+        开盘热路径: 各标的收到开盘推送行情即做跳空检查并下单，标的之间互不等待；
+        open_quote_timeout_seconds 内没有推送的标的一次批量查询报价。paper 模式不需要开盘价，直接提交。
+        """
+        staged = {r.order_id for r in self.staged_orders()}
+        if self._armed_at is None or staged != {r.order_id for rs in self._armed.values() for r in rs}:
+            await asyncio.to_thread(self.prepare_open)
+        armed, armed_at = self._armed, self._armed_at
+        self._armed, self._armed_at = {}, None
+        if not armed:
+            return
+        await self.ensure_executor()
+        self._loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.open_quote_timeout
+        resolved, fallback = set(), None
+
+        async def batch_quote(symbol: str) -> Dict[str, Any]:
+            nonlocal fallback
+            if fallback is None:
+                missing = [s for s in armed if s not in resolved]
+                self.logger.warning(f"No opening push for {len(missing)} symbols, querying quotes")
+                fallback = asyncio.ensure_future(asyncio.to_thread(self.fetcher.get_realtime_quote, missing))
+            return (await fallback).get(symbol) or {}
+
+        async def run_symbol(symbol: str, records: List[OrderRecord]):
+            open_price = None
+            if self.mode == 'live':
+                quote = await self._opening_quote(symbol, armed_at, deadline)
+                if quote is not None:
+                    resolved.add(symbol)
+                else:
+                    quote = await batch_quote(symbol)
+                open_price = quote.get('open') or quote.get('price')
+            if open_price:
+                records = [r for r in records if self._fit_open(r, open_price)]
+            for r in records:
+                self._open_started[r.order_id] = start
+            results = await asyncio.gather(*(self._execute(r, open_price) for r in records), return_exceptions=True)
+            for record, result in zip(records, results):
+                self._open_started.pop(record.order_id, None)
+                if isinstance(result, Exception):
+                    self.logger.error(f"Execution of {record.order_id} failed: {result}")
+                    self.notifier.send("Error Alert", f"Execution of {record.order_id} failed: {result}")
+
+        await asyncio.gather(*(run_symbol(s, rs) for s, rs in armed.items()))
+
+    async def stage_job(self):
+        await asyncio.to_thread(self.prepare_open)
+
+    async def execution_job(self):
+        await self.execute_open()
+
+    def in_session(self, now: datetime = None) -> bool:
+        return self.calendar.is_open(now or datetime.now(self.timezone))
+
+    async def risk_job(self):
+        stop = self.risk_conf.get('stop_loss_pct')
+        take = self.risk_conf.get('take_profit_pct')
+        if (stop is None and take is None) or self.mode == 'signal' or not self.in_session():
+            return
+        held = {}
+        for instance in self.instances:
+            qty, cost = await asyncio.to_thread(self.position, instance)
+            if qty > 0 and cost:
+                held[instance.name] = (instance, qty, cost)
+            else:
+                self._exited.discard(instance.name)
+        if not held:
+            return
+
+        # 一次批量报价覆盖所有持仓标的
+        symbols = sorted({i.symbol for i, _, _ in held.values()})
+        quotes = await asyncio.to_thread(self.fetcher.get_realtime_quote, symbols)
+        prices = {s: q['price'] for s, q in quotes.items()}
+        if self.paper is not None:
+            self.paper.mark(prices)
+
+        exits = []
+        for name, (instance, qty, cost) in held.items():
+            price = prices.get(instance.symbol)
+            if not price or name in self._exited:
+                continue
+            pnl_pct = (price / cost - 1) * 100
+            if stop is not None and pnl_pct <= -stop:
+                reason = "stop_loss"
+            elif take is not None and pnl_pct >= take:
+                reason = "take_profit"
+            else:
+                continue
+            self._exited.add(name)
+            self.logger.warning(f"{reason}: {name} P/L {pnl_pct:.2f}%, exiting {qty} {instance.symbol}")
+            self.notifier.send("Risk Alert", f"{reason}: {name} P/L {pnl_pct:.2f}% @ {price}")
+            exits.append(self.orders.create(instance.symbol, "SELL", qty, order_type='market',
+                                            signal_date=datetime.now(self.timezone).strftime('%Y-%m-%d'),
+                                            signal_price=price, strategy=name, note=self.mode))
+        if exits:
+            await asyncio.gather(*(self._execute(r) for r in exits))
+
+    async def heartbeat_job(self):
+        """心跳日志，附带共享连接的状态与任务统计"""
+        parts = []
+        for kind, st in ContextPool.instance().stats().items():
+            if st['connected']:
+                parts.append(f"{kind}: age {st['age_seconds'] / 3600:.1f}h, reuses {st['reuses']}, reconnects {st['reconnects']}")
+        for s in self.stats.values():
+            if s.runs or s.missed:
+                parts.append(f"{s.name}: runs {s.runs}, missed {s.missed}, failures {s.failures}")
+        self.logger.info(f"Heartbeat: Engine is running... {' | '.join(parts)}")
+
+    # ---------- 调度 ----------
+
+    def triggers(self) -> Dict[str, Any]:
+        """任务名 -> APScheduler 触发器"""
+        from apscheduler.triggers.interval import IntervalTrigger
+
+        triggers = {"signal": SessionTrigger(self.calendar, 'close', self.signal_delay),
+                    "heartbeat": IntervalTrigger(minutes=self.heartbeat_minutes)}
+        if self.mode in ('paper', 'live'):
+            triggers["stage"] = SessionTrigger(self.calendar, 'open', self.execution_delay - self.stage_lead)
+            triggers["execution"] = SessionTrigger(self.calendar, 'open', self.execution_delay)
+            if self.risk_seconds > 0:
+                triggers["risk"] = IntervalTrigger(seconds=self.risk_seconds)
+        return triggers
+
+    def jobs(self) -> Dict[str, Callable[[], Awaitable[None]]]:
+        return {"signal": self.signal_job, "stage": self.stage_job, "execution": self.execution_job,
+                "risk": self.risk_job, "heartbeat": self.heartbeat_job}
+
+    def _timed(self, name: str, func: Callable[[], Awaitable[None]]):
+        stats = self.stats.setdefault(name, JobStats(name, DEFAULT_DEADLINES.get(name, 60)))
+
+        async def run():
+            start = time.perf_counter()
+            try:
+                await func()
+            except Exception as e:
+                stats.failures += 1
+                self.logger.error(f"Job {name} failed: {e}", exc_info=True)
+                self.notifier.send("Error Alert", f"Job {name} failed: {e}")
+            finally:
+                stats.durations.append(time.perf_counter() - start)
+        return run
+
+    def _on_event(self, event):
+        from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+        stats = self.stats.get(event.job_id)
+        if stats is None:
+            return
+        if event.code in (EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES):
+            stats.missed += 1
+            self.logger.warning(f"Job {event.job_id} missed its {event.scheduled_run_time} run")
+            return
+        latency = (datetime.now(self.timezone) - event.scheduled_run_time).total_seconds()
+        stats.runs += 1
+        stats.latencies.append(latency)
+        if latency > stats.deadline:
+            stats.missed += 1
+            self.logger.warning(f"Job {event.job_id} finished {latency:.1f}s after schedule (deadline {stats.deadline}s)")
+
+    async def start(self):
+        """预热常驻模块并启动调度器 (需在事件循环中调用)"""
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+
+        self._loop = asyncio.get_running_loop()
+        await asyncio.to_thread(self.warm)
+        await self.ensure_executor()
+
+        jobs = self.jobs()
+        self.scheduler = AsyncIOScheduler(timezone=self.timezone)
+        for name, trigger in self.triggers().items():
+            self.scheduler.add_job(self._timed(name, jobs[name]), trigger, id=name, name=name,
+                                   coalesce=True, max_instances=1, misfire_grace_time=self.misfire_grace)
+        self.scheduler.add_listener(self._on_event, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR |
+                                    EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+        self.scheduler.start()
+        for job in self.scheduler.get_jobs():
+            self.logger.info(f"Scheduled {job.id}: next run {job.next_run_time}")
+
+    async def serve(self):
+        """启动并运行直到 stop()"""
+        self._stop = asyncio.Event()
+        await self.start()
+        try:
+            await self._stop.wait()
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    def shutdown(self):
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        self.close()
+
+    def close(self):
+        if self.trader is not None:
+            self.trader.unsubscribe_order_updates(self._on_order)
+        if self.feed is not None:
+            try:
+                self.feed.stop()
+            except Exception as e:
+                self.logger.warning(f"Quote unsubscribe failed: {e}")
+            self.feed = None
+        self.orders.close()
+        if self.paper is not None:
+            self.paper.close()
+
+    def job_summary(self) -> List[Dict[str, Any]]:
+        return [s.summary() for s in self.stats.values() if s.runs or s.missed or s.durations]
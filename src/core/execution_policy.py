@@ -0,0 +1,125 @@
+import numpy as np
+from typing import Dict, Any
+
+# 成交状态
+FILLED = "filled"
+CHASED = "chased"
+GAP_CANCELLED = "gap_cancelled"
+UNFILLED = "unfilled"
+EXPIRED = "expired"
+
+# 美股常规交易时段的分钟数，日线近似跳空等待时长时使用
+SESSION_MINUTES = 390
+
+def limit_price(reference: float, side: int, limit_conf: Dict[str, Any]):
+    """
+    计算限价: 买入 = 参考价 × (1 + 买入滑点)，卖出 = 参考价 × (1 - 卖出滑点)
+
+    Args:
+        side: 1 买入 / -1 卖出 (可为数组)
+    """
+    buy = limit_conf.get('buy_slippage_pct', 0.3) / 100
+    sell = limit_conf.get('sell_slippage_pct', 0.3) / 100
+    return np.where(np.asarray(side) > 0, reference * (1 + buy), reference * (1 - sell))
+
+def gap_pct(signal_price, open_price):
+    """开盘相对信号价 (T 日收盘) 的跳空幅度 %"""
+    return (open_price - signal_price) / signal_price * 100
+
+class ExecutionPolicy:
+    """
+    config.yaml 的 order_execution 段对应的执行规则，实盘 (OrderExecutor)、模拟盘 (PaperBroker)
+    与回测 (ExecutionSimulator) 共用
+
+    - 跳空保护: 开盘相对信号价的不利跳空 (买入高开 / 卖出低开) 超过 max_gap_pct 时按 action_on_gap
+      取消，或在 wait_minutes 内 (最多到收盘) 等待价格回到容忍带内
+    - 限价参考价: 未触发跳空保护时为开盘价，等待后为回到容忍带内时的价格；限价 = 参考价 ± 滑点
+    - 限价单 timeout_minutes 内未成交则撤单，chase_on_timeout 时剩余数量追市价
+    - 信号日到执行日经过的交易日数超过 max_signal_age_sessions 时订单作废 (0 关闭)
+    """
+    def __init__(self, config: Dict[str, Any] = None):
+        exec_conf = (config or {}).get('order_execution', {}) or {}
+        self.strategy = exec_conf.get('strategy', 'limit')
+        self.limit_conf = exec_conf.get('limit_order', {}) or {}
+        self.timeout_minutes = self.limit_conf.get('timeout_minutes', 30)
+        self.chase_on_timeout = self.limit_conf.get('chase_on_timeout', True)
+
+        gap_conf = exec_conf.get('gap_protection', {}) or {}
+        self.gap_enabled = gap_conf.get('enabled', True)
+        self.max_gap_pct = gap_conf.get('max_gap_pct', 2.0)
+        self.action_on_gap = gap_conf.get('action_on_gap', 'wait')
+        self.wait_minutes = gap_conf.get('wait_minutes', self.timeout_minutes)
+        self.max_signal_age = gap_conf.get('max_signal_age_sessions', 1)
+
+    def gap_blocked(self, side, signal_price, price):
+        """price 相对信号价的不利跳空是否超过容忍度 (可为数组)"""
+        blocked = np.asarray(side) * gap_pct(signal_price, price) > self.max_gap_pct
+        return blocked & self.gap_enabled
+
+    def gap_band(self, side, signal_price):
+        """跳空容忍带边界价: 价格回到该价格以内 (买入不高于 / 卖出不低于) 才继续执行"""
+        return signal_price * (1 + np.asarray(side) * self.max_gap_pct / 100)
+
+    def budget_price(self, signal_price: float) -> float:
+        """
+        买单分配资金用的单价: 执行器可能付出的最高价 = 容忍带上沿 × (1 + 买入滑点)；
+        关闭跳空保护时没有上沿，以信号价计算，开盘时再按开盘价缩减 (TradingEngine)
+        """
+        band = 1 + self.max_gap_pct / 100 if self.gap_enabled else 1.0
+        return signal_price * band * (1 + self.limit_conf.get('buy_slippage_pct', 0.3) / 100)
+
+    def limit_for(self, reference, side):
+        """按参考价 (开盘价 / 跳空等待后回到容忍带内的价格) 计算限价"""
+        return limit_price(reference, side, self.limit_conf)
+
+    def simulate_daily(self, side: np.ndarray, signal_price: np.ndarray, open_: np.ndarray,
+                       high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        用执行日的日线 OHLC 近似模拟 (每个参数均为按订单对齐的数组)
+
+        日线看不到盘中时刻: 跳空等待假设价格在整个交易时段内从开盘价匀速走到有利方向的极值
+        (买入为最低价)，到达容忍带的时刻不晚于 wait_minutes 才算等到；限价触及即视为在超时前成交，
+        追单按收盘价成交。
+
+        Returns:
+            {"fill_price", "status"}，未成交的 fill_price 为 NaN
+        """
+        side = np.asarray(side)
+        signal_price = np.asarray(signal_price, dtype=np.float64)
+        open_ = np.asarray(open_, dtype=np.float64)
+        fill = np.full(len(side), np.nan)
+        status = np.full(len(side), UNFILLED, dtype=object)
+
+        blocked = self.gap_blocked(side, signal_price, open_)
+        reference = open_.copy()
+        ok = ~blocked
+        if blocked.any() and self.action_on_gap == 'wait':
+            band = self.gap_band(side, signal_price)
+            extreme = np.where(side > 0, low, high)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                minute = SESSION_MINUTES * (open_ - band) / (open_ - extreme)
+            back = blocked & (side * (extreme - band) <= 0) & (minute <= self.wait_minutes)
+            reference[back] = band[back]
+            ok |= back
+
+        if self.strategy == 'market':
+            fill[ok] = reference[ok]
+            status[ok] = FILLED
+        else:
+            limit = self.limit_for(reference, side)
+            # 参考价时刻即可成交 (参考价优于限价)
+            at_reference = ok & (side * (limit - reference) >= 0)
+            # 之后盘中触及限价
+            touched = ok & ~at_reference & np.where(side > 0, low <= limit, high >= limit)
+            fill[at_reference] = reference[at_reference]
+            fill[touched] = limit[touched]
+            status[at_reference | touched] = FILLED
+
+            if self.chase_on_timeout:
+                chase = ok & ~at_reference & ~touched
+                fill[chase] = close[chase]
+                status[chase] = CHASED
+
+        if self.action_on_gap == 'cancel':
+            status[blocked] = GAP_CANCELLED
+        return {"fill_price": fill, "status": status}
@@ -0,0 +1,358 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+from src.core.trader import Trader
+from src.core.order_manager import OrderManager, OrderRecord, OrderStatus, TERMINAL_STATUSES, broker_status
+from src.core.execution_policy import ExecutionPolicy, gap_pct
+from src.core.trading_calendar import get_calendar
+from src.utils.logger import get_logger
+
+# _wait_or_cancel 的结果: 订单自行到达终态 (成交 / 被拒 / 外部撤单) 或超时后由执行器撤单
+FINISHED = "finished"
+TIMED_OUT = "timed_out"
+
+@dataclass
+class ExecutionReport:
+    """一次执行 (父订单) 的结果，children 为实际发往券商的子订单"""
+    record: OrderRecord
+    children: List[OrderRecord] = field(default_factory=list)
+
+    @property
+    def filled_quantity(self) -> int:
+        return self.record.filled_quantity
+
+    @property
+    def status(self) -> str:
+        return self.record.status
+
+class OrderWatch:
+    """
+    单笔券商订单的成交跟踪: 由推送更新，终态时唤醒等待方
+    """
+    def __init__(self, broker_order_id: str, quantity: int):
+        self.broker_order_id = broker_order_id
+        self.quantity = quantity
+        self.status = OrderStatus.SUBMITTED
+        self.filled = 0
+        self.price: Optional[float] = None
+        self.done = asyncio.Event()
+
+    def update(self, status: Optional[OrderStatus], executed_quantity: int, executed_price: Optional[float]):
+        if self.done.is_set():
+            return
+        # 推送可能乱序，成交数量只增不减
+        if executed_quantity >= self.filled:
+            self.filled = executed_quantity
+            if executed_price:
+                self.price = executed_price
+        if status is not None:
+            self.status = status
+            if status in TERMINAL_STATUSES:
+                self.done.set()
+
+class OrderExecutor:
+    """
+    基于 asyncio 的订单执行器 (topic.md §3.2 / §3.3 的 order_execution 配置)
+
+    - 开盘后以开盘价 ± 滑点计算限价，不利方向跳空超过 max_gap_pct 时按 action_on_gap 等待或取消
+    - 通过订单推送 (set_on_order_changed) 等待成交，不轮询 today_orders
+    - limit: 限价单 timeout_minutes 内未完全成交则撤单，按 chase_on_timeout 对剩余数量追市价单
+    - twap: 拆成 num_slices 份，在 duration_minutes 内等间隔下限价子单，结束时剩余部分追市价单
+
+    SDK 调用是阻塞的，统一放到线程中执行；等待成交只挂起协程，多笔订单 / 子单在同一事件循环中并发。
+    所有父订单与子订单都记录到 OrderManager。
+    """
+    def __init__(self, trader: Trader, config: Dict[str, Any] = None, order_manager: OrderManager = None,
+                 quote_fn: Callable[[str], Dict[str, Any]] = None):
+        self.logger = get_logger("executor")
+        self.trader = trader
+        self.config = config or {}
+        self.orders = order_manager or OrderManager(self.config)
+        self.quote_fn = quote_fn or self._default_quote
+
+        # 跳空 / 限价 / 追单规则与回测 (ExecutionSimulator)、模拟盘共用
+        self.policy = ExecutionPolicy(self.config)
+        exec_conf = self.config.get('order_execution', {}) or {}
+        self.strategy = self.policy.strategy
+        self.timeout = self.policy.timeout_minutes * 60
+        self.chase_on_timeout = self.policy.chase_on_timeout
+
+        twap_conf = exec_conf.get('twap', {}) or {}
+        self.num_slices = max(1, twap_conf.get('num_slices', 5))
+        self.twap_duration = twap_conf.get('duration_minutes', 60) * 60
+
+        gap_conf = exec_conf.get('gap_protection', {}) or {}
+        self.gap_wait = self.policy.wait_minutes * 60
+        self.gap_poll = gap_conf.get('poll_seconds', 5)
+        self.calendar = get_calendar(self.config)
+
+        # 撤单后等待券商确认的时间；未确认时不追单，避免超量成交
+        self.cancel_wait = exec_conf.get('cancel_wait_seconds', 10)
+        self._inflight = asyncio.Semaphore(exec_conf.get('max_inflight', 16))
+
+        # 子订单被券商受理时回调 (parent, child)，供调用方统计下单延迟
+        self.on_submit: Optional[Callable[[OrderRecord, OrderRecord], None]] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watches: Dict[str, OrderWatch] = {}
+        self._early: Dict[str, tuple] = {}
+
+    def _default_quote(self, symbol: str) -> Dict[str, Any]:
+        from src.core.data_fetcher import DataFetcher
+        return DataFetcher(self.config).get_realtime_quote(symbol).get(symbol, {})
+
+    # ---------- 推送 ----------
+
+    async def start(self):
+        """绑定当前事件循环并订阅订单推送 (执行前调用一次)"""
+        self._loop = asyncio.get_running_loop()
+        await asyncio.to_thread(self.trader.subscribe_order_updates, self._on_push)
+
+    def _on_push(self, event):
+        # SDK 推送线程 -> 事件循环线程
+        update = (
+            str(event.order_id),
+            broker_status(event.status),
+            int(event.executed_quantity or 0),
+            float(event.executed_price or 0) or None,
+        )
+        self._loop.call_soon_threadsafe(self._dispatch, *update)
+
+    def _dispatch(self, broker_order_id: str, status, executed_quantity: int, executed_price):
+        watch = self._watches.get(broker_order_id)
+        if watch is None:
+            if self.orders.by_broker_id(broker_order_id) is not None:
+                # 已结束跟踪的订单 (迟到的重复推送) 只更新订单日志
+                self.orders.apply_broker_update(broker_order_id, status, executed_quantity, executed_price)
+            else:
+                # submit_order 尚未返回订单号时推送已到达，登记后再应用
+                self._early[broker_order_id] = (status, executed_quantity, executed_price)
+                if len(self._early) > 1000:
+                    # 非本执行器下的订单推送不会被认领，只保留最近的
+                    self._early.pop(next(iter(self._early)))
+            return
+        watch.update(status, executed_quantity, executed_price)
+        self.orders.apply_broker_update(broker_order_id, status, executed_quantity, executed_price)
+        if watch.done.is_set():
+            self._watches.pop(broker_order_id, None)
+
+    # ---------- 子订单 ----------
+
+    async def _submit(self, parent: OrderRecord, quantity: int, order_type: str, price: Optional[float],
+                      children: List[OrderRecord], note: str) -> Optional[OrderWatch]:
+        child = self.orders.create(
+            parent.symbol, parent.side, quantity,
+            order_type=order_type.lower(), limit_price=price,
+            signal_date=parent.signal_date, signal_price=parent.signal_price,
+            execution_date=datetime.now().strftime('%Y-%m-%d'),
+            note=f"{note} of {parent.order_id}"
+        )
+        children.append(child)
+        async with self._inflight:
+            try:
+                broker_id = await asyncio.to_thread(
+                    self.trader.submit_order, parent.symbol, parent.side, quantity, price, order_type)
+            except Exception as e:
+                self.logger.error(f"Child order {child.order_id} rejected: {e}")
+                self.orders.transition(child.order_id, OrderStatus.REJECTED)
+                return None
+
+        broker_id = str(broker_id)
+        watch = OrderWatch(broker_id, quantity)
+        self._watches[broker_id] = watch
+        self.orders.mark_submitted(child.order_id, broker_id)
+        if self.on_submit is not None:
+            self.on_submit(parent, child)
+        if broker_id in self._early:
+            self._dispatch(broker_id, *self._early.pop(broker_id))
+        return watch
+
+    async def _wait_or_cancel(self, watch: OrderWatch, timeout: float) -> Optional[str]:
+        """
+        等待订单终态；超时则撤单并等待确认
+
+        Returns:
+            FINISHED: 订单自行到达终态; TIMED_OUT: 超时撤单已确认; None: 撤单未确认
+        """
+        try:
+            await asyncio.wait_for(watch.done.wait(), timeout)
+            return FINISHED
+        except asyncio.TimeoutError:
+            pass
+
+        self.logger.info(f"Order {watch.broker_order_id} timed out ({watch.filled}/{watch.quantity}), cancelling...")
+        try:
+            await asyncio.to_thread(self.trader.cancel_order, watch.broker_order_id)
+        except Exception as e:
+            # 撤单失败通常是订单刚好成交，以推送的最终状态为准
+            self.logger.warning(f"Cancel {watch.broker_order_id} failed: {e}")
+        try:
+            await asyncio.wait_for(watch.done.wait(), self.cancel_wait)
+            return TIMED_OUT
+        except asyncio.TimeoutError:
+            self.logger.error(f"Cancel of {watch.broker_order_id} not confirmed; remaining quantity will not be chased")
+            return None
+
+    async def _run_order(self, parent: OrderRecord, quantity: int, order_type: str, price: Optional[float],
+                         timeout: float, children: List[OrderRecord], note: str):
+        watch = await self._submit(parent, quantity, order_type, price, children, note)
+        if watch is None:
+            return None, None
+        outcome = await self._wait_or_cancel(watch, timeout)
+        return watch, outcome
+
+    @staticmethod
+    def _chaseable(watch: Optional[OrderWatch], outcome: Optional[str]) -> bool:
+        """
+        剩余数量是否可以追市价: 只追执行器自己超时撤单的部分；
+        券商拒单或外部撤单的订单不转成市价单
+        """
+        if outcome == TIMED_OUT:
+            return True
+        return outcome == FINISHED and watch is not None and watch.status == OrderStatus.FILLED
+
+    # ---------- 执行 ----------
+
+    async def _quote(self, symbol: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.quote_fn, symbol) or {}
+
+    async def _gap_check(self, parent: OrderRecord, side: int, open_price: float) -> Optional[float]:
+        """
+        跳空保护，返回下单参考价；取消或等待超时返回 None
+
+        跳空按交易日历判断: 信号日与执行日之间隔了多个交易日 (停机、长假后补单) 时订单作废，
+        wait 模式最多等到当日收盘 (半日市为 13:00)。
+        """
+        now = datetime.now(self.calendar.tz_info)
+        if self.policy.max_signal_age and parent.signal_date:
+            age = self.calendar.bars_between(parent.signal_date, now)
+            if age > self.policy.max_signal_age:
+                self.logger.warning(f"{parent.order_id}: signal of {parent.signal_date} is {age} sessions old, expired")
+                self.orders.transition(parent.order_id, OrderStatus.EXPIRED)
+                return None
+
+        gap = gap_pct(parent.signal_price, open_price)
+        self.orders.update(parent.order_id, open_price=open_price, gap_pct=round(gap, 4))
+        if not self.policy.gap_blocked(side, parent.signal_price, open_price):
+            return open_price
+
+        self.logger.warning(f"{parent.symbol} gapped {gap:+.2f}% against {parent.side} (max {self.policy.max_gap_pct}%)")
+        self.orders.transition(parent.order_id, OrderStatus.GAP_PROTECTED)
+        if self.policy.action_on_gap != 'wait':
+            self.orders.transition(parent.order_id, OrderStatus.CANCELLED)
+            return None
+
+        wait = self.gap_wait
+        if self.calendar.is_open(now):
+            wait = min(wait, (self.calendar.next_close(now) - now).total_seconds())
+        deadline = self._loop.time() + wait
+        while self._loop.time() < deadline:
+            await asyncio.sleep(self.gap_poll)
+            price = (await self._quote(parent.symbol)).get('price')
+            if price and not self.policy.gap_blocked(side, parent.signal_price, price):
+                self.logger.info(f"{parent.symbol} back within gap band at {price}")
+                self.orders.transition(parent.order_id, OrderStatus.PENDING)
+                return price
+
+        self.orders.transition(parent.order_id, OrderStatus.EXPIRED)
+        return None
+
+    async def execute(self, symbol: str, side: str, quantity: int, signal_price: float,
+                      record: OrderRecord = None, open_price: float = None, **details) -> ExecutionReport:
+        """
+        按 order_execution 配置执行一笔订单
+
+        Args:
+            record: 已登记的 PENDING 父订单，不传则新建
+            open_price: 调用方已取得的开盘价 (推送行情)，不传则查询一次行情
+            details: 新建父订单时的其余字段 (signal_date 等)
+        """
+        if self._loop is None:
+            await self.start()
+
+        parent = record or self.orders.create(symbol, side, quantity, signal_price=signal_price,
+                                              order_type=self.strategy, **details)
+        report = ExecutionReport(parent)
+        sign = 1 if side.lower() == 'buy' else -1
+
+        if not open_price:
+            quote = await self._quote(symbol)
+            open_price = quote.get('open') or quote.get('price')
+        if not open_price:
+            self.logger.error(f"No quote for {symbol}, order {parent.order_id} expired")
+            self.orders.transition(parent.order_id, OrderStatus.EXPIRED)
+            return report
+
+        reference = await self._gap_check(parent, sign, open_price)
+        if reference is None:
+            return report
+
+        self.orders.transition(parent.order_id, OrderStatus.SUBMITTED,
+                               execution_date=datetime.now().strftime('%Y-%m-%d'))
+        if self.strategy == 'twap':
+            watches, chaseable = await self._twap(parent, sign, report.children)
+        elif self.strategy == 'market':
+            watch, _ = await self._run_order(parent, quantity, 'Market', None, self.timeout,
+                                             report.children, "market")
+            watches, chaseable = [watch], False
+        else:
+            price = round(float(self.policy.limit_for(reference, sign)), 2)
+            self.orders.update(parent.order_id, limit_price=price)
+            watch, outcome = await self._run_order(parent, quantity, 'Limit', price, self.timeout,
+                                                   report.children, "limit")
+            watches, chaseable = [watch], self._chaseable(watch, outcome)
+
+        filled = sum(w.filled for w in watches if w)
+        remaining = quantity - filled
+        if remaining > 0 and chaseable and self.chase_on_timeout:
+            self.logger.info(f"Chasing {remaining} {symbol} with market order")
+            watch, _ = await self._run_order(parent, remaining, 'Market', None, self.timeout,
+                                             report.children, "chase")
+            watches.append(watch)
+
+        self._finish(parent, [w for w in watches if w])
+        return report
+
+    async def _twap(self, parent: OrderRecord, sign: int, children: List[OrderRecord]):
+        """
+        TWAP: 子单等间隔提交，每份限价 = 当时价格 ± 滑点，存活一个间隔后撤单
+        """
+        n = min(self.num_slices, parent.quantity)
+        base, extra = divmod(parent.quantity, n)
+        sizes = [base + (1 if i < extra else 0) for i in range(n)]
+        interval = self.twap_duration / n
+
+        async def run_slice(i: int, size: int):
+            await asyncio.sleep(i * interval)
+            price = (await self._quote(parent.symbol)).get('price')
+            if not price:
+                # 没有报价的份额不下单，由结束时的追单补足
+                return None, TIMED_OUT
+            limit = round(float(self.policy.limit_for(price, sign)), 2)
+            return await self._run_order(parent, size, 'Limit', limit, interval, children, f"twap {i + 1}/{n}")
+
+        results = await asyncio.gather(*(run_slice(i, s) for i, s in enumerate(sizes)))
+        return [w for w, _ in results], all(self._chaseable(w, o) for w, o in results)
+
+    def _finish(self, parent: OrderRecord, watches: List[OrderWatch]):
+        """按子订单汇总父订单的成交数量、均价、滑点与终态"""
+        filled = sum(w.filled for w in watches)
+        notional = sum(w.filled * w.price for w in watches if w.price)
+        changes = {"filled_quantity": filled}
+        if filled:
+            avg = notional / filled
+            sign = 1 if parent.side.lower() == 'buy' else -1
+            changes.update(filled_price=round(avg, 4),
+                           slippage_pct=round(sign * (avg / parent.signal_price - 1) * 100, 4),
+                           filled_at=datetime.now().isoformat(timespec='seconds'))
+
+        if filled >= parent.quantity:
+            self.orders.transition(parent.order_id, OrderStatus.FILLED, **changes)
+        elif filled > 0:
+            self.orders.transition(parent.order_id, OrderStatus.PARTIAL_FILLED, **changes)
+            self.orders.transition(parent.order_id, OrderStatus.CANCELLED)
+        else:
+            self.orders.transition(parent.order_id, OrderStatus.CANCELLED, **changes)
+        self.logger.info(f"Execution {parent.order_id} finished: {parent.status} {filled}/{parent.quantity}"
+                         + (f" @ {parent.filled_price}" if filled else ""))
@@ -0,0 +1,167 @@
+import time
+import threading
+import pandas as pd
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+from src.core.bar_store import BarStore
+from src.core.data_fetcher import candlesticks_to_frame
+from src.utils.logger import get_logger
+
+# 单次 history_candlesticks_by_date 请求覆盖的自然日跨度
+# Longport 单次最多返回 1000 根 K 线，按美股常规时段估算留出余量
+# (窗口两端均包含在内，实际覆盖 跨度 + 1 个自然日)
+PAGE_DAYS = {
+    'day': 1300,
+    'week': 6500,
+    'month': 27000,
+    'year': 300000,
+    '1m': 1,      # 390 根/日，2 个交易日 780 根
+    '5m': 14,     # 78 根/日
+    '15m': 45,    # 26 根/日
+    '30m': 90,    # 13 根/日
+    '60m': 180,   # 7 根/日
+}
+
+# 单页返回的 K 线数达到该值视为可能被截断，拆成两个窗口重新请求
+PAGE_LIMIT = 1000
+
+# 相邻空页累计跨度达到该天数才视为到达数据起点 (避免节假日连休的短窗口误判)
+MIN_EMPTY_STOP_DAYS = 10
+
+class RateLimiter:
+    """
+    线程安全的令牌桶限速器，控制每秒请求数
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """阻塞直到取得一个令牌"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HistoryLoader:
+    """
+    分页深度历史 K 线加载器
+
+    从 end 向 start 按日期窗口倒序分页，在限速预算内并发拉取，
+    页边界重叠的 K 线按 timestamp 去重，并分批写入本地 BarStore。
+    """
+    def __init__(self, ctx, store: BarStore, max_workers: int = 4,
+                 requests_per_second: float = 8.0, flush_pages: int = 8):
+        self.logger = get_logger("history_loader")
+        self.ctx = ctx
+        self.store = store
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(requests_per_second, burst=max_workers)
+        self.flush_pages = flush_pages
+
+    @staticmethod
+    def plan_pages(period: str, start: date, end: date) -> List[Tuple[date, date]]:
+        """
+        生成从新到旧、互不重叠的日期窗口列表 (两端均包含在内)
+        """
+        span = timedelta(days=PAGE_DAYS.get(period.lower(), PAGE_DAYS['day']))
+        pages = []
+        page_end = end
+        while page_end >= start:
+            page_start = max(page_end - span, start)
+            pages.append((page_start, page_end))
+            page_end = page_start - timedelta(days=1)
+        return pages
+
+    def load(self, symbol: str, period: str, lp_period, lp_adjust, adjust: str,
+             start: date, end: Optional[date] = None,
+             on_page: Optional[Callable[[int, int, int], None]] = None,
+             replace: bool = False) -> pd.DataFrame:
+        """
+        拉取 [start, end] 区间的 K 线并合并进本地存储
+
+        Args:
+            lp_period / lp_adjust: SDK 周期与复权枚举
+            adjust: 复权方式名称 (BarStore 键)
+            on_page: 进度回调 (已完成页数, 总页数, 已获取 K 线数)
+            replace: 不与原有缓存合并，以本次加载的数据替换 (全部页拉取成功后一次写入，
+                     中途失败时原有缓存保持不变)
+
+        Returns:
+            pd.DataFrame: 合并后的本地完整 K 线
+        """
+        end = end or date.today()
+        pages = self.plan_pages(period, start, end)
+        self.logger.info(f"Loading {period} klines for {symbol} from {start} to {end} in {len(pages)} pages...")
+
+        def fetch(window: Tuple[date, date]) -> pd.DataFrame:
+            self.limiter.acquire()
+            candlesticks = self.ctx.history_candlesticks_by_date(symbol, lp_period, lp_adjust, window[0], window[1])
+            page = candlesticks_to_frame(candlesticks)
+            if len(page) < PAGE_LIMIT:
+                return page
+            if window[0] == window[1]:
+                self.logger.warning(f"{symbol} {period} page {window[0]} returned {len(page)} klines, "
+                                    f"possibly truncated at the per-request limit")
+                return page
+            # 达到单次上限，结果可能被截断: 对半拆分窗口重新请求
+            mid = window[0] + timedelta(days=(window[1] - window[0]).days // 2)
+            return pd.concat([fetch((window[0], mid)), fetch((mid + timedelta(days=1), window[1]))],
+                             ignore_index=True)
+
+        merged = self.store.load(symbol, period, adjust)
+        if replace:
+            merged = merged.iloc[:0]
+        pending: List[pd.DataFrame] = []
+        done = 0
+        fetched = 0
+        # 空页的自然日跨度 (页序号 -> 天数)，分钟线单页只有 1~2 天，需按相邻空页累计判断
+        empty: Dict[int, int] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 按从新到旧的顺序提交，线程池也按此顺序执行
+            futures = {executor.submit(fetch, window): i for i, window in enumerate(pages)}
+            for future in as_completed(futures):
+                i = futures[future]
+                done += 1
+                page = None if future.cancelled() else future.result()
+
+                if page is not None and not page.empty:
+                    fetched += len(page)
+                    pending.append(page)
+                elif page is not None:
+                    empty[i] = (pages[i][1] - pages[i][0]).days + 1
+                    first, last = i, i
+                    while first - 1 in empty:
+                        first -= 1
+                    while last + 1 in empty:
+                        last += 1
+                    if sum(empty[j] for j in range(first, last + 1)) >= MIN_EMPTY_STOP_DAYS:
+                        # 连续多页无数据说明已早于上市日期或数据起点，更早的页不必再请求
+                        for f, j in futures.items():
+                            if j > last:
+                                f.cancel()
+
+                if not replace and len(pending) >= self.flush_pages:
+                    merged = self.store.merge(symbol, period, adjust, pd.concat(pending, ignore_index=True), base=merged)
+                    pending = []
+
+                if on_page:
+                    on_page(done, len(pages), fetched)
+
+        if pending:
+            merged = self.store.merge(symbol, period, adjust, pd.concat(pending, ignore_index=True), base=merged)
+
+        self.store.record('misses', fetched)
+        self.logger.info(f"Loaded {fetched} {period} klines for {symbol}, {len(merged)} bars stored")
+        return merged
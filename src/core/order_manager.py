@@ -0,0 +1,411 @@
+import os
+import json
+import time
+import threading
+from enum import Enum
+from pathlib import Path
+from dataclasses import dataclass, field, asdict, fields
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+from src.utils.logger import get_logger
+
+class OrderStatus(Enum):
+    """订单生命周期状态 (topic.md §3.5)"""
+    PENDING = "pending"           # 待执行（信号已确认，等待开盘）
+    SUBMITTED = "submitted"       # 已提交
+    PARTIAL_FILLED = "partial"    # 部分成交
+    FILLED = "filled"             # 完全成交
+    CANCELLED = "cancelled"       # 已取消
+    REJECTED = "rejected"         # 被拒绝
+    EXPIRED = "expired"           # 已过期
+    GAP_PROTECTED = "gap_protected"  # 跳空保护中
+
+TERMINAL_STATUSES = {OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.REJECTED, OrderStatus.EXPIRED}
+
+# 允许的状态迁移 (终态不可再迁移)
+TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.SUBMITTED, OrderStatus.GAP_PROTECTED, OrderStatus.CANCELLED,
+                          OrderStatus.REJECTED, OrderStatus.EXPIRED},
+    OrderStatus.GAP_PROTECTED: {OrderStatus.PENDING, OrderStatus.SUBMITTED, OrderStatus.CANCELLED,
+                                OrderStatus.EXPIRED},
+    OrderStatus.SUBMITTED: {OrderStatus.PARTIAL_FILLED, OrderStatus.FILLED, OrderStatus.CANCELLED,
+                            OrderStatus.REJECTED, OrderStatus.EXPIRED},
+    OrderStatus.PARTIAL_FILLED: {OrderStatus.PARTIAL_FILLED, OrderStatus.FILLED, OrderStatus.CANCELLED,
+                                 OrderStatus.EXPIRED},
+}
+
+# Longport OrderStatus 名称 -> 本地状态
+BROKER_STATUS_MAP = {
+    "NotReported": OrderStatus.SUBMITTED,
+    "ReplacedNotReported": OrderStatus.SUBMITTED,
+    "ProtectedNotReported": OrderStatus.SUBMITTED,
+    "VarietiesNotReported": OrderStatus.SUBMITTED,
+    "WaitToNew": OrderStatus.SUBMITTED,
+    "New": OrderStatus.SUBMITTED,
+    "WaitToReplace": OrderStatus.SUBMITTED,
+    "PendingReplace": OrderStatus.SUBMITTED,
+    "Replaced": OrderStatus.SUBMITTED,
+    "PartialFilled": OrderStatus.PARTIAL_FILLED,
+    "Filled": OrderStatus.FILLED,
+    "WaitToCancel": OrderStatus.SUBMITTED,
+    "PendingCancel": OrderStatus.SUBMITTED,
+    "Canceled": OrderStatus.CANCELLED,
+    "PartialWithdrawal": OrderStatus.CANCELLED,
+    "Rejected": OrderStatus.REJECTED,
+    "Expired": OrderStatus.EXPIRED,
+}
+
+def broker_status(status) -> Optional[OrderStatus]:
+    """将 SDK 的 OrderStatus (枚举或字符串) 映射为本地状态，无法识别时返回 None"""
+    name = str(status).rsplit('.', 1)[-1]
+    return BROKER_STATUS_MAP.get(name)
+
+@dataclass
+class OrderRecord:
+    """订单执行记录，字段同 topic.md §3.5"""
+    order_id: str
+    symbol: str
+    side: str
+    quantity: int
+    order_type: str = "limit"
+    status: str = OrderStatus.PENDING.value
+    broker_order_id: Optional[str] = None
+    filled_quantity: int = 0
+    signal_date: Optional[str] = None
+    signal_price: Optional[float] = None
+    execution_date: Optional[str] = None
+    open_price: Optional[float] = None
+    gap_pct: Optional[float] = None
+    limit_price: Optional[float] = None
+    filled_price: Optional[float] = None
+    slippage_pct: Optional[float] = None
+    filled_at: Optional[str] = None
+    strategy: Optional[str] = None   # 所属策略实例 (config.strategies)
+    staged_at: Optional[str] = None  # 开盘前复核完毕的时间
+    submit_latency_ms: Optional[float] = None   # 开盘执行开始 -> 券商受理
+    note: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec='seconds'))
+    updated_at: Optional[str] = None
+
+    @property
+    def state(self) -> OrderStatus:
+        return OrderStatus(self.status)
+
+    @property
+    def is_active(self) -> bool:
+        return self.state not in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+_RECORD_FIELDS = {f.name for f in fields(OrderRecord)}
+
+def order_sequence(record: OrderRecord) -> Tuple[str, int]:
+    """按订单号 (ORD_日期_序号) 排序，同一秒内登记的订单也保持先后顺序"""
+    prefix, _, number = record.order_id.rpartition('_')
+    return prefix, int(number) if number.isdigit() else 0
+
+class OrderJournal:
+    """
+    追加写入的订单事件日志 (JSON Lines)
+
+    写入先进入文件缓冲区，满 sync_every 条或距首条未落盘事件 sync_interval 秒后
+    统一 flush + fsync (组提交)，多笔订单事件只付一次 fsync 的代价。
+    sync_interval 为 0 时每条事件立即落盘。
+    """
+    def __init__(self, path: str, sync_interval: float = 0.05, sync_every: int = 32):
+        self.logger = get_logger("order_journal")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # 上次崩溃可能留下不完整的末行，先补换行，避免新事件与之拼接
+        if self.path.stat().st_size > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+                    self._file.flush()
+        self._pending = 0
+        self._timer: Optional[threading.Timer] = None
+        self.seq = 0
+
+    def replay(self) -> List[Dict[str, Any]]:
+        """读取全部事件；崩溃时写了一半的末行会被忽略"""
+        events = []
+        if not self.path.exists():
+            return events
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Skipping corrupt journal line {lineno} in {self.path}")
+        if events:
+            self.seq = max(self.seq, events[-1].get('seq', 0))
+        return events
+
+    def append(self, event: Dict[str, Any]):
+        with self._lock:
+            self.seq += 1
+            event = {"seq": self.seq, "ts": time.time(), **event}
+            self._file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self._pending += 1
+
+            if self.sync_interval <= 0 or self._pending >= self.sync_every:
+                self._sync_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.sync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def sync(self):
+        """立即落盘所有已写入的事件"""
+        with self._lock:
+            self._sync_locked()
+
+    def rewrite(self, events: List[Dict[str, Any]]):
+        """用给定事件整体替换日志 (压缩用)，写临时文件后原子替换"""
+        with self._lock:
+            self._sync_locked()
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+
+class OrderManager:
+    """
+    订单状态机 + 持久化日志
+
+    每次创建 / 状态迁移都追加一条事件到 OrderJournal，启动时重放日志重建内存状态。
+    内存中按 order_id、券商订单号、symbol 建立索引，状态查询不需要访问 API。
+    """
+    def __init__(self, config: Dict[str, Any] = None, journal_path: str = None):
+        self.logger = get_logger("order_manager")
+        orders_conf = (config or {}).get('orders', {}) or {}
+        path = journal_path or orders_conf.get('journal_path', 'data/orders/journal.jsonl')
+        self.journal = OrderJournal(
+            path,
+            sync_interval=orders_conf.get('sync_interval_ms', 50) / 1000,
+            sync_every=orders_conf.get('sync_every', 32)
+        )
+
+        self._lock = threading.RLock()
+        self._orders: Dict[str, OrderRecord] = {}
+        self._by_broker: Dict[str, str] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._active: Set[str] = set()
+        self._counters: Dict[str, int] = {}
+        self._replay()
+
+    # ---------- 重放 ----------
+
+    def _replay(self):
+        events = self.journal.replay()
+        for event in events:
+            if event.get('type') == 'create':
+                self._index(OrderRecord(**{k: v for k, v in event['order'].items() if k in _RECORD_FIELDS}))
+            elif event.get('type') == 'update' and event.get('order_id') in self._orders:
+                self._apply(self._orders[event['order_id']], event.get('fields', {}))
+        if events:
+            self.logger.info(f"Replayed {len(events)} journal events: {len(self._orders)} orders, {len(self._active)} active")
+
+    def _index(self, record: OrderRecord):
+        self._orders[record.order_id] = record
+        self._by_symbol.setdefault(record.symbol, set()).add(record.order_id)
+        if record.broker_order_id:
+            self._by_broker[record.broker_order_id] = record.order_id
+        if record.is_active:
+            self._active.add(record.order_id)
+        else:
+            self._active.discard(record.order_id)
+
+        # 恢复当日订单号计数，避免重启后编号重复
+        prefix, _, number = record.order_id.rpartition('_')
+        if number.isdigit():
+            self._counters[prefix] = max(self._counters.get(prefix, 0), int(number))
+
+    def _apply(self, record: OrderRecord, changes: Dict[str, Any]):
+        for key, value in changes.items():
+            if key in _RECORD_FIELDS:
+                setattr(record, key, value)
+        self._index(record)
+
+    # ---------- 写操作 ----------
+
+    def _next_id(self) -> str:
+        prefix = f"ORD_{datetime.now().strftime('%Y%m%d')}"
+        self._counters[prefix] = self._counters.get(prefix, 0) + 1
+        return f"{prefix}_{self._counters[prefix]:03d}"
+
+    def create(self, symbol: str, side: str, quantity: int, **details) -> OrderRecord:
+        """
+        登记一笔待执行订单 (PENDING)
+
+        Args:
+            details: OrderRecord 的其余字段 (signal_date, signal_price, order_type, limit_price ...)
+        """
+        with self._lock:
+            record = OrderRecord(order_id=details.pop('order_id', None) or self._next_id(),
+                                 symbol=symbol, side=side, quantity=quantity,
+                                 **{k: v for k, v in details.items() if k in _RECORD_FIELDS})
+            if record.order_id in self._orders:
+                raise ValueError(f"Order {record.order_id} already exists")
+            self._index(record)
+            self.journal.append({"type": "create", "order": record.to_dict()})
+            self.logger.info(f"Order {record.order_id} created: {side} {quantity} {symbol} [{record.status}]")
+            return record
+
+    def transition(self, order_id: str, status: OrderStatus, **changes) -> OrderRecord:
+        """
+        状态迁移并记录其余字段变化；非法迁移抛出 ValueError
+        """
+        with self._lock:
+            record = self._orders.get(order_id)
+            if record is None:
+                raise KeyError(f"Unknown order: {order_id}")
+            current = record.state
+            if status != current and status not in TRANSITIONS.get(current, set()):
+                raise ValueError(f"Invalid order transition {order_id}: {current.value} -> {status.value}")
+            return self._update(record, status=status.value, **changes)
+
+    def update(self, order_id: str, **changes) -> OrderRecord:
+        """只更新字段 (不改变状态)"""
+        with self._lock:
+            record = self._orders.get(order_id)
+            if record is None:
+                raise KeyError(f"Unknown order: {order_id}")
+            changes.pop('status', None)
+            return self._update(record, **changes)
+
+    def _update(self, record: OrderRecord, **changes) -> OrderRecord:
+        changes = {k: v for k, v in changes.items() if k in _RECORD_FIELDS and getattr(record, k) != v}
+        if not changes:
+            return record
+        changes['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        old_status = record.status
+        self._apply(record, changes)
+        self.journal.append({"type": "update", "order_id": record.order_id, "fields": changes})
+        if record.status != old_status:
+            self.logger.info(f"Order {record.order_id}: {old_status} -> {record.status}")
+        return record
+
+    def mark_submitted(self, order_id: str, broker_order_id: str, **changes) -> OrderRecord:
+        return self.transition(order_id, OrderStatus.SUBMITTED, broker_order_id=broker_order_id, **changes)
+
+    def apply_broker_update(self, broker_order_id: str, status, executed_quantity: int = None,
+                            executed_price: float = None, **changes) -> Optional[OrderRecord]:
+        """
+        应用券商推送 / 查询到的订单状态
+
+        推送可能乱序或重复: 未登记的订单、过期的状态 (如已成交后又收到部分成交) 会被忽略。
+        成交时按 signal_price 计算滑点。
+        """
+        with self._lock:
+            order_id = self._by_broker.get(str(broker_order_id))
+            if order_id is None:
+                return None
+            record = self._orders[order_id]
+            target = status if isinstance(status, OrderStatus) else broker_status(status)
+            if target is None:
+                return record
+            if target != record.state and target not in TRANSITIONS.get(record.state, set()):
+                self.logger.debug(f"Ignoring stale update for {order_id}: {record.status} -> {target.value}")
+                return record
+
+            if executed_quantity is not None:
+                changes['filled_quantity'] = int(executed_quantity)
+            if executed_price:
+                changes['filled_price'] = float(executed_price)
+                if record.signal_price:
+                    sign = 1 if record.side.lower() == 'buy' else -1
+                    changes['slippage_pct'] = round(sign * (float(executed_price) / record.signal_price - 1) * 100, 4)
+            if target == OrderStatus.FILLED and not record.filled_at:
+                changes['filled_at'] = datetime.now().isoformat(timespec='seconds')
+            return self._update(record, status=target.value, **changes)
+
+    def sync_from_broker(self, orders: List[Any]) -> int:
+        """
+        用 today_orders 的结果对账 (启动或断线重连后调用)，返回发生变化的订单数
+        """
+        changed = 0
+        for o in orders:
+            record = self.by_broker_id(o.order_id)
+            if record is None:
+                continue
+            before = (record.status, record.filled_quantity)
+            self.apply_broker_update(o.order_id, o.status, getattr(o, 'executed_quantity', None),
+                                     getattr(o, 'executed_price', None))
+            changed += (record.status, record.filled_quantity) != before
+        return changed
+
+    def compact(self, keep_days: int = 30):
+        """
+        压缩日志: 每笔订单只保留一条当前快照，丢弃 keep_days 天前已结束的订单
+        """
+        with self._lock:
+            cutoff = datetime.now().timestamp() - keep_days * 86400
+            kept = [
+                r for r in self._orders.values()
+                if r.is_active or datetime.fromisoformat(r.updated_at or r.created_at).timestamp() >= cutoff
+            ]
+            self.journal.rewrite([
+                {"seq": i + 1, "ts": time.time(), "type": "create", "order": r.to_dict()}
+                for i, r in enumerate(kept)
+            ])
+            self.journal.seq = len(kept)
+            dropped = len(self._orders) - len(kept)
+            self._orders, self._by_broker, self._by_symbol, self._active = {}, {}, {}, set()
+            for r in kept:
+                self._index(r)
+            self.logger.info(f"Compacted order journal: kept {len(kept)}, dropped {dropped}")
+
+    def close(self):
+        self.journal.close()
+
+    # ---------- 查询 (纯内存) ----------
+
+    def get(self, order_id: str) -> Optional[OrderRecord]:
+        return self._orders.get(order_id)
+
+    def by_broker_id(self, broker_order_id: str) -> Optional[OrderRecord]:
+        order_id = self._by_broker.get(str(broker_order_id))
+        return self._orders.get(order_id) if order_id else None
+
+    def status(self, order_id: str) -> Optional[OrderStatus]:
+        record = self._orders.get(order_id)
+        return record.state if record else None
+
+    def orders_for(self, symbol: str, active_only: bool = False) -> List[OrderRecord]:
+        ids = self._by_symbol.get(symbol, ())
+        return [self._orders[i] for i in ids if not active_only or i in self._active]
+
+    def active_orders(self) -> List[OrderRecord]:
+        return [self._orders[i] for i in self._active]
+
+    def all_orders(self) -> List[OrderRecord]:
+        return list(self._orders.values())
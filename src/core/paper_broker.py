@@ -0,0 +1,433 @@
+import threading
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field, asdict, fields
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+from src.core.order_manager import OrderJournal
+from src.core.execution_policy import ExecutionPolicy, FILLED, CHASED, GAP_CANCELLED
+from src.utils.logger import get_logger
+
+# 模拟订单状态 (名称与 order_manager.OrderStatus 的取值一致，便于同步到订单日志)
+PENDING = "pending"
+PAPER_FILLED = "filled"
+CANCELLED = "cancelled"
+REJECTED = "rejected"
+EXPIRED = "expired"
+
+@dataclass
+class PaperPosition:
+    quantity: int = 0
+    avg_cost: float = 0.0
+    realized_pnl: float = 0.0
+
+@dataclass
+class PaperOrder:
+    order_id: str
+    account: str
+    symbol: str
+    side: str                               # "Buy" / "Sell"
+    quantity: int
+    order_type: str = "Market"
+    price: Optional[float] = None           # 限价；为空时按 order_execution 配置模拟执行
+    reference_price: Optional[float] = None  # 参考价 (信号价 / 下单时最新价)
+    after: Optional[str] = None             # 只用该时间之后的 K 线撮合 (信号 K 线时间)
+    status: str = PENDING
+    filled_quantity: int = 0
+    filled_price: Optional[float] = None
+    filled_at: Optional[str] = None
+    note: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec='seconds'))
+
+    @property
+    def sign(self) -> int:
+        return 1 if self.side.lower() == 'buy' else -1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+_ORDER_FIELDS = {f.name for f in fields(PaperOrder)}
+
+class PaperAccount:
+    """
+    一个模拟账户: 现金、持仓 (数量 / 平均成本 / 已实现盈亏) 与挂单
+
+    对外接口与 Trader 一致 (get_account_balance / get_positions / submit_order / cancel_order)，
+    run_job 在 paper 模式下直接用它替代 Trader。所有状态变化由 PaperBroker 写入账本。
+    """
+    def __init__(self, broker: 'PaperBroker', name: str, initial_cash: float, currency: str = "USD"):
+        self.broker = broker
+        self.name = name
+        self.initial_cash = float(initial_cash)
+        self.currency = currency
+        self.cash = float(initial_cash)
+        self.positions: Dict[str, PaperPosition] = {}
+        self.orders: Dict[str, PaperOrder] = {}
+        self.realized_pnl = 0.0
+        self.commission = 0.0
+        self.trades = 0
+        self.seq = 0
+
+    # ---------- 状态变化 (重放账本时同样调用) ----------
+
+    def _apply_fill(self, symbol: str, sign: int, quantity: int, price: float, fee: float):
+        pos = self.positions.setdefault(symbol, PaperPosition())
+        if sign > 0:
+            pos.avg_cost = (pos.avg_cost * pos.quantity + price * quantity) / (pos.quantity + quantity)
+            pos.quantity += quantity
+        else:
+            pnl = (price - pos.avg_cost) * quantity
+            pos.realized_pnl += pnl
+            self.realized_pnl += pnl
+            pos.quantity -= quantity
+            if pos.quantity == 0:
+                pos.avg_cost = 0.0
+        self.cash -= sign * quantity * price + fee
+        self.commission += fee
+        self.trades += 1
+
+    def _reserved_sell(self, symbol: str) -> int:
+        return sum(o.quantity for o in self.orders.values()
+                   if o.status == PENDING and o.symbol == symbol and o.sign < 0)
+
+    # ---------- Trader 兼容接口 ----------
+
+    def get_account_balance(self, currency: str = "USD", force: bool = False) -> Dict[str, float]:
+        with self.broker.lock:
+            market_value = sum(p.quantity * self.broker.last_price(s, p.avg_cost) for s, p in self.positions.items())
+            return {
+                "total_assets": self.cash + market_value,
+                "cash": self.cash,
+                "market_value": market_value,
+                "currency": self.currency
+            }
+
+    def get_positions(self, symbol: str = None, force: bool = False) -> List[Dict[str, Any]]:
+        with self.broker.lock:
+            result = []
+            for s, p in self.positions.items():
+                if p.quantity == 0 or (symbol and s != symbol):
+                    continue
+                price = self.broker.last_price(s, p.avg_cost)
+                result.append({
+                    "symbol": s,
+                    "quantity": p.quantity,
+                    "available_quantity": p.quantity - self._reserved_sell(s),
+                    "cost_price": p.avg_cost,
+                    "current_price": price,
+                    "market_value": p.quantity * price,
+                    "profit_loss": (price - p.avg_cost) * p.quantity
+                })
+            return result
+
+    def submit_order(self, symbol: str, side: str, quantity: int, price: float = None, order_type: str = "Market",
+                     remark: str = None, reference_price: float = None, after: Any = None) -> str:
+        """
+        提交模拟订单，返回模拟订单号
+
+        Args:
+            price: 限价 (Limit 单必填)；Market 单不带价格，按 order_execution 配置模拟执行
+            reference_price: 参考价 (信号价)，用于跳空保护 / 限价带 / 资金检查，缺省取最新价
+            after: 信号 K 线时间，next_bar 模式只用之后的 K 线撮合
+        """
+        if order_type.lower() == 'limit' and price is None:
+            raise ValueError("Price must be provided for Limit orders")
+        return self.broker.submit(self, symbol, side, quantity, price, order_type, remark, reference_price, after)
+
+    def cancel_order(self, order_id: str):
+        self.broker.cancel(self, order_id)
+
+    def get_orders(self, symbol: str = None, active_only: bool = False) -> List[PaperOrder]:
+        return [o for o in self.orders.values()
+                if (not symbol or o.symbol == symbol) and (not active_only or o.status == PENDING)]
+
+    # ---------- 汇总 ----------
+
+    def summary(self) -> Dict[str, Any]:
+        balance = self.get_account_balance()
+        with self.broker.lock:
+            unrealized = sum((self.broker.last_price(s, p.avg_cost) - p.avg_cost) * p.quantity
+                             for s, p in self.positions.items())
+        equity = balance['total_assets']
+        return {
+            "account": self.name,
+            "equity": equity,
+            "cash": self.cash,
+            "market_value": balance['market_value'],
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": unrealized,
+            "commission": self.commission,
+            "return_pct": (equity / self.initial_cash - 1) * 100 if self.initial_cash else 0.0,
+            "trades": self.trades,
+            "open_orders": sum(o.status == PENDING for o in self.orders.values())
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "initial_cash": self.initial_cash, "currency": self.currency, "cash": self.cash,
+            "realized_pnl": self.realized_pnl, "commission": self.commission, "trades": self.trades, "seq": self.seq,
+            # 持仓紧凑存储: symbol -> [数量, 平均成本, 已实现盈亏]
+            "positions": {s: [p.quantity, p.avg_cost, p.realized_pnl] for s, p in self.positions.items()
+                          if p.quantity or p.realized_pnl},
+            "orders": [o.to_dict() for o in self.orders.values() if o.status == PENDING]
+        }
+
+    @classmethod
+    def restore(cls, broker: 'PaperBroker', snap: Dict[str, Any]) -> 'PaperAccount':
+        account = cls(broker, snap['name'], snap['initial_cash'], snap.get('currency', 'USD'))
+        account.cash = snap['cash']
+        account.realized_pnl = snap.get('realized_pnl', 0.0)
+        account.commission = snap.get('commission', 0.0)
+        account.trades = snap.get('trades', 0)
+        account.seq = snap.get('seq', 0)
+        account.positions = {s: PaperPosition(*v) for s, v in snap.get('positions', {}).items()}
+        for o in snap.get('orders', []):
+            order = PaperOrder(**{k: v for k, v in o.items() if k in _ORDER_FIELDS})
+            account.orders[order.order_id] = order
+        return account
+
+class PaperBroker:
+    """
+    进程内模拟盘: 多个模拟账户共享行情与一份账本
+
+    - 成交: fill_on = quote 时按最新报价 ± slippage_pct 立即成交 (限价单不可成交则挂单)；
+      fill_on = next_bar 时挂单，由下一根 K 线 (on_bar) 撮合: 限价单开盘可成交按开盘价，
+      盘中触及按限价，未触及当日过期；不带限价的订单按 order_execution 配置
+      (跳空保护 / 限价带 / 超时追单) 按 ExecutionPolicy (与实盘执行器、回测同一套规则) 的日线近似模拟
+    - 账本: 开户 / 下单 / 成交 / 撤单事件追加写入 JSON Lines (组提交 fsync)，启动时重放恢复，
+      compact() 把每个账户压缩为一条快照
+    - 同一 symbol 的所有账户挂单在 on_bar 中一次向量化撮合，几十个策略变体并行影子交易开销很小
+    """
+    def __init__(self, config: Dict[str, Any] = None, ledger_path: str = None,
+                 quote_fn: Callable[[str], float] = None):
+        self.logger = get_logger("paper_broker")
+        paper_conf = (config or {}).get('paper', {}) or {}
+        self.fill_on = paper_conf.get('fill_on', 'next_bar')
+        if self.fill_on not in ('quote', 'next_bar'):
+            raise ValueError(f"Unknown paper.fill_on: {self.fill_on}")
+        self.slippage_pct = paper_conf.get('slippage_pct', 0.05)
+        self.commission_rate = paper_conf.get('commission_rate', 0.0)
+        self.initial_cash = paper_conf.get('initial_cash', 100000)
+        self.currency = paper_conf.get('currency', 'USD')
+        self.execution = ExecutionPolicy(config)
+        self.quote_fn = quote_fn
+
+        self.journal = OrderJournal(
+            ledger_path or paper_conf.get('ledger_path', 'data/paper/ledger.jsonl'),
+            sync_interval=paper_conf.get('sync_interval_ms', 50) / 1000,
+            sync_every=paper_conf.get('sync_every', 32)
+        )
+        self.lock = threading.RLock()
+        self._accounts: Dict[str, PaperAccount] = {}
+        self._prices: Dict[str, float] = {}
+        self._replay()
+
+    # ---------- 账本 ----------
+
+    def _replay(self):
+        events = self.journal.replay()
+        for event in events:
+            kind = event.get('type')
+            if kind == 'snapshot':
+                account = PaperAccount.restore(self, event['account'])
+                self._accounts[account.name] = account
+                continue
+            account = self._accounts.get(event.get('account'))
+            if kind == 'open':
+                self._accounts[event['account']] = PaperAccount(self, event['account'], event['initial_cash'],
+                                                                event.get('currency', self.currency))
+            elif account is None:
+                continue
+            elif kind == 'order':
+                order = PaperOrder(**{k: v for k, v in event['order'].items() if k in _ORDER_FIELDS})
+                account.orders[order.order_id] = order
+                account.seq = max(account.seq, int(order.order_id.rsplit('-', 1)[-1]))
+            elif kind == 'fill':
+                account._apply_fill(event['symbol'], event['sign'], event['quantity'], event['price'], event['fee'])
+                self._prices[event['symbol']] = event['price']
+                order = account.orders.get(event.get('order_id'))
+                if order is not None:
+                    order.status, order.filled_quantity = PAPER_FILLED, event['quantity']
+                    order.filled_price, order.filled_at = event['price'], event.get('at')
+            elif kind == 'close':
+                order = account.orders.get(event['order_id'])
+                if order is not None:
+                    order.status, order.note = event['status'], event.get('reason')
+        if events:
+            self.logger.info(f"Replayed {len(events)} paper ledger events: {len(self._accounts)} accounts")
+
+    def compact(self):
+        """压缩账本: 每个账户一条快照 (只保留挂单)"""
+        with self.lock:
+            self.journal.rewrite([
+                {"seq": i + 1, "ts": datetime.now().timestamp(), "type": "snapshot", "account": a.snapshot()}
+                for i, a in enumerate(self._accounts.values())
+            ])
+            self.journal.seq = len(self._accounts)
+            for account in self._accounts.values():
+                account.orders = {k: o for k, o in account.orders.items() if o.status == PENDING}
+            self.logger.info(f"Compacted paper ledger: {len(self._accounts)} accounts")
+
+    def close(self):
+        self.journal.close()
+
+    # ---------- 账户 ----------
+
+    def account(self, name: str = "default", initial_cash: float = None) -> PaperAccount:
+        """获取模拟账户，不存在时以 initial_cash (默认 paper.initial_cash) 开户"""
+        with self.lock:
+            account = self._accounts.get(name)
+            if account is None:
+                cash = self.initial_cash if initial_cash is None else initial_cash
+                account = PaperAccount(self, name, cash, self.currency)
+                self._accounts[name] = account
+                self.journal.append({"type": "open", "account": name, "initial_cash": cash,
+                                     "currency": self.currency})
+                self.logger.info(f"Opened paper account {name} with {cash:,.2f} {self.currency}")
+            return account
+
+    def accounts(self) -> List[PaperAccount]:
+        return list(self._accounts.values())
+
+    def summary(self) -> pd.DataFrame:
+        return pd.DataFrame([a.summary() for a in self.accounts()])
+
+    # ---------- 行情 ----------
+
+    def mark(self, prices: Dict[str, float]):
+        """更新盯市价格 (用于市值与浮动盈亏)"""
+        with self.lock:
+            self._prices.update({s: float(p) for s, p in prices.items()})
+
+    def last_price(self, symbol: str, default: float = None) -> Optional[float]:
+        return self._prices.get(symbol, default)
+
+    def _quote(self, symbol: str) -> float:
+        if self.quote_fn is not None:
+            try:
+                price = float(self.quote_fn(symbol))
+                self.mark({symbol: price})
+                return price
+            except Exception as e:
+                self.logger.warning(f"Quote for {symbol} failed, using last price: {e}")
+        price = self._prices.get(symbol)
+        if price is None:
+            raise ValueError(f"No price available for {symbol}")
+        return price
+
+    # ---------- 下单 / 撤单 ----------
+
+    def submit(self, account: PaperAccount, symbol: str, side: str, quantity: int, price: Optional[float],
+               order_type: str, remark: Optional[str], reference_price: Optional[float], after: Any) -> str:
+        quantity = int(quantity)
+        if quantity <= 0:
+            raise ValueError(f"Invalid quantity: {quantity}")
+        side = "Buy" if side.lower() == 'buy' else "Sell"
+        with self.lock:
+            last = self._quote(symbol) if self.fill_on == 'quote' or reference_price is None else None
+            reference_price = reference_price or last
+
+            # 与券商一致: 下单时检查资金 / 可卖数量，不足直接拒绝
+            if side == "Buy":
+                cost = quantity * (price or reference_price) * (1 + self.commission_rate)
+                if cost > account.cash + 1e-9:
+                    raise ValueError(f"Insufficient cash in {account.name}: need {cost:,.2f}, have {account.cash:,.2f}")
+            else:
+                held = account.positions.get(symbol, PaperPosition()).quantity
+                if quantity > held - account._reserved_sell(symbol):
+                    raise ValueError(f"Insufficient position in {account.name}: {symbol} {held}")
+
+            account.seq += 1
+            order = PaperOrder(
+                order_id=f"{account.name}-{account.seq}", account=account.name, symbol=symbol, side=side,
+                quantity=quantity, order_type=order_type, price=price, reference_price=reference_price,
+                after=str(after) if after is not None else datetime.now().isoformat(timespec='seconds'),
+                note=remark
+            )
+            account.orders[order.order_id] = order
+            self.journal.append({"type": "order", "account": account.name, "order": order.to_dict()})
+
+            if self.fill_on == 'quote':
+                fill = last * (1 + order.sign * self.slippage_pct / 100)
+                if price is not None:
+                    fill = min(fill, price) if order.sign > 0 else max(fill, price)
+                    if order.sign * (last - price) > 0:
+                        fill = None     # 限价不可成交，挂单等待 K 线触及
+                if fill is not None:
+                    self._fill(account, order, fill)
+            return order.order_id
+
+    def cancel(self, account: PaperAccount, order_id: str):
+        with self.lock:
+            order = account.orders.get(order_id)
+            if order is None or order.status != PENDING:
+                raise ValueError(f"Order {order_id} is not open")
+            self._close(account, order, CANCELLED, "cancelled by user")
+
+    def _fill(self, account: PaperAccount, order: PaperOrder, price: float):
+        quantity = order.quantity
+        if order.sign > 0:
+            # 成交价高于下单时的估计时按可用现金减少数量
+            quantity = min(quantity, int(account.cash / (price * (1 + self.commission_rate))))
+            if quantity <= 0:
+                self._close(account, order, REJECTED, "insufficient cash at fill")
+                return
+        fee = quantity * price * self.commission_rate
+        at = datetime.now().isoformat(timespec='seconds')
+        account._apply_fill(order.symbol, order.sign, quantity, price, fee)
+        order.status, order.filled_quantity, order.filled_price, order.filled_at = PAPER_FILLED, quantity, price, at
+        self._prices.setdefault(order.symbol, price)
+        self.journal.append({"type": "fill", "account": account.name, "order_id": order.order_id,
+                             "symbol": order.symbol, "sign": order.sign, "quantity": quantity,
+                             "price": price, "fee": fee, "at": at})
+        self.logger.info(f"[PAPER:{account.name}] Filled {order.side} {quantity} {order.symbol} @ {price:.4f}")
+
+    def _close(self, account: PaperAccount, order: PaperOrder, status: str, reason: str):
+        order.status, order.note = status, reason
+        self.journal.append({"type": "close", "account": account.name, "order_id": order.order_id,
+                             "status": status, "reason": reason})
+        self.logger.info(f"[PAPER:{account.name}] Order {order.order_id} {status}: {reason}")
+
+    # ---------- 撮合 ----------
+
+    def on_bar(self, symbol: str, bar: Any) -> List[PaperOrder]:
+        """
+        用一根新 K 线 (含 timestamp / open / high / low / close) 撮合所有账户在该 symbol 上的挂单，
+        并以收盘价盯市。返回本次状态发生变化的订单。
+        """
+        ts = pd.Timestamp(bar['timestamp'])
+        o, h, l, c = (float(bar[k]) for k in ('open', 'high', 'low', 'close'))
+        with self.lock:
+            pending = [(a, order) for a in self._accounts.values() for order in a.orders.values()
+                       if order.status == PENDING and order.symbol == symbol and pd.Timestamp(order.after) < ts]
+            changed = []
+            simulated = [(a, order) for a, order in pending if order.price is None]
+            if simulated:
+                n = len(simulated)
+                result = self.execution.simulate_daily(
+                    np.array([order.sign for _, order in simulated]),
+                    np.array([order.reference_price or o for _, order in simulated], dtype=float),
+                    np.full(n, o), np.full(n, h), np.full(n, l), np.full(n, c)
+                )
+                for (account, order), fill, status in zip(simulated, result['fill_price'], result['status']):
+                    if status in (FILLED, CHASED):
+                        self._fill(account, order, float(fill))
+                    elif status == GAP_CANCELLED:
+                        self._close(account, order, CANCELLED, "gap protection")
+                    else:
+                        self._close(account, order, EXPIRED, "not filled within the session")
+                    changed.append(order)
+
+            for account, order in pending:
+                if order.price is None:
+                    continue
+                if order.sign * (o - order.price) <= 0:
+                    self._fill(account, order, o)
+                elif (l <= order.price) if order.sign > 0 else (h >= order.price):
+                    self._fill(account, order, order.price)
+                else:
+                    self._close(account, order, EXPIRED, "limit not reached")
+                changed.append(order)
+
+            self._prices[symbol] = c
+            return changed
@@ -0,0 +1,122 @@
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Set
+from longport.openapi import SubType
+from src.utils.logger import get_logger
+
+# 盘前 / 盘后 / 夜盘时段 (PushQuote.trade_session)，这些时段的成交价不是当日常规时段的开盘 / 收盘价
+EXTENDED_SESSIONS = ('Pre', 'Post', 'Overnight')
+
+def is_regular_session(quote: Dict[str, Any]) -> bool:
+    """行情是否来自常规交易时段 (没有 session 字段的批量报价视为常规时段)"""
+    session = quote.get('session') or ''
+    return not any(name in session for name in EXTENDED_SESSIONS)
+
+class QuoteBook:
+    """
+    线程安全的最新行情表: 推送线程写入，渲染线程按需读取变化的标的
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.quotes: Dict[str, Dict[str, Any]] = {}
+        self.dirty: Set[str] = set()
+
+    def update(self, symbol: str, fields: Dict[str, Any]):
+        """合并一条行情 (缺失字段沿用旧值，如推送中没有的 prev_close)"""
+        with self.lock:
+            quote = self.quotes.setdefault(symbol, {})
+            quote.update(fields)
+            self.dirty.add(symbol)
+
+    def drain_dirty(self) -> Dict[str, Dict[str, Any]]:
+        """取出自上次调用以来有变化的标的及其最新行情"""
+        with self.lock:
+            changed = {s: dict(self.quotes[s]) for s in self.dirty}
+            self.dirty.clear()
+        return changed
+
+class LongportQuoteFeed:
+    """
+    基于 Longport 推送订阅的行情源
+    """
+    def __init__(self, ctx):
+        self.logger = get_logger("quote_stream")
+        self.ctx = ctx
+        self.symbols: List[str] = []
+
+    def start(self, symbols: List[str], on_quote: Callable[[str, Dict[str, Any]], None]):
+        def handle(symbol, event):
+            on_quote(symbol, {
+                "price": float(event.last_done),
+                "open": float(event.open),
+                "high": float(event.high),
+                "low": float(event.low),
+                "volume": int(event.volume),
+                "timestamp": event.timestamp,
+                "session": str(getattr(event, 'trade_session', '') or '')   # 盘前 / 盘中 / 盘后
+            })
+
+        self.symbols = list(symbols)
+        self.ctx.set_on_quote(handle)
+        self.ctx.subscribe(self.symbols, [SubType.Quote])
+        self.logger.info(f"Subscribed to quote push for {len(self.symbols)} symbols")
+
+    def stop(self):
+        if self.symbols:
+            self.ctx.unsubscribe(self.symbols, [SubType.Quote])
+            self.symbols = []
+
+class ReplayQuoteFeed:
+    """
+    本地回放行情源，用于离线测试 --watch 模式
+
+    文件为 JSON Lines，每行一条行情:
+    {"symbol": "SPY.US", "price": 500.1, "open": 499.0, "high": 501.0, "low": 498.5,
+     "prev_close": 498.0, "volume": 123456, "timestamp": "2026-01-30T09:30:00"}
+    按相邻行 timestamp 的间隔除以 speed 回放，speed <= 0 时不等待。
+    """
+    def __init__(self, path: str, speed: float = 1.0):
+        self.logger = get_logger("quote_stream")
+        self.path = path
+        self.speed = speed
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _load(self) -> List[Dict[str, Any]]:
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if 'timestamp' in record:
+                    record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+                records.append(record)
+        return records
+
+    def start(self, symbols: List[str], on_quote: Callable[[str, Dict[str, Any]], None]):
+        records = self._load()
+        wanted = set(symbols)
+
+        def run():
+            prev_ts = None
+            for record in records:
+                if self.stop_event.is_set():
+                    return
+                symbol = record.pop('symbol')
+                if wanted and symbol not in wanted:
+                    continue
+                ts = record.get('timestamp')
+                if self.speed > 0 and prev_ts is not None and ts is not None and ts > prev_ts:
+                    self.stop_event.wait((ts - prev_ts).total_seconds() / self.speed)
+                prev_ts = ts
+                on_quote(symbol, record)
+            self.logger.info("Quote replay finished")
+
+        self.thread = threading.Thread(target=run, name="quote-replay", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
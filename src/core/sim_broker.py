@@ -0,0 +1,481 @@
+import time
+import queue
+import random
+import zlib
+import itertools
+import threading
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime, date
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Callable
+from longport.openapi import Period, OrderSide, OrderType, OrderStatus
+from src.utils.logger import get_logger
+
+SimCandlestick = namedtuple("SimCandlestick", ["timestamp", "open", "high", "low", "close", "volume", "turnover"])
+
+SIM_PERIODS = {
+    'day': Period.Day,
+    '1m': Period.Min_1,
+    '5m': Period.Min_5,
+    '15m': Period.Min_15,
+    '30m': Period.Min_30,
+    '60m': Period.Min_60,
+}
+
+OPEN_STATUSES = (OrderStatus.New, OrderStatus.PartialFilled)
+
+class SimBrokerError(RuntimeError):
+    """模拟券商拒绝请求 (参数错误 / 资金或持仓不足 / 订单不可撤)"""
+
+def synthetic_bars(symbol: str, bars: int, seed: int = 7, end: date = None,
+                   start_price: float = 100.0, annual_drift: float = 0.07, annual_vol: float = 0.18) -> pd.DataFrame:
+    """
+    生成截至 end 的工作日几何布朗运动日 K (同一 symbol + seed 结果固定)
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+    timestamps = pd.bdate_range(end=pd.Timestamp(end or date.today()), periods=bars)
+    daily_vol = annual_vol / np.sqrt(252)
+    log_ret = rng.normal(annual_drift / 252 - daily_vol ** 2 / 2, daily_vol, bars)
+    close = start_price * np.exp(np.cumsum(log_ret))
+    prev_close = np.concatenate(([start_price], close[:-1]))
+    # 开盘相对昨收的跳空约占当日波动的三分之一
+    open_ = prev_close * np.exp(rng.normal(0, daily_vol / 3, bars))
+    spread = np.abs(rng.normal(0, daily_vol / 2, (2, bars)))
+    high = np.maximum(open_, close) * np.exp(spread[0])
+    low = np.minimum(open_, close) * np.exp(-spread[1])
+    return pd.DataFrame({
+        "timestamp": timestamps.to_numpy(dtype="datetime64[ns]"),
+        "open": np.round(open_, 2),
+        "high": np.round(high, 2),
+        "low": np.round(low, 2),
+        "close": np.round(close, 2),
+        "volume": rng.integers(5_000_000, 50_000_000, bars),
+    })
+
+class SimMarket:
+    """
+    模拟行情: 按 K 线回放价格
+
+    时钟为 (当前 K 线时间, 步)，每根 K 线按 开 -> 低/高 -> 高/低 -> 收 四步推进
+    (阳线先探低、阴线先冲高)。当前 K 线只暴露已走过的部分，与实盘中未收盘的 K 线一致。
+    """
+    STEPS = 4
+
+    def __init__(self, source: str = 'synthetic', bars: int = 2520, seed: int = 7, period: str = 'day',
+                 store_dir: str = 'data/bars', adjust: str = 'forward', start=None):
+        self.logger = get_logger("sim_market")
+        self.source = source
+        self.n_bars = bars
+        self.seed = seed
+        self.period = period
+        self.store_dir = store_dir
+        self.adjust = adjust
+        self.start = start
+        self.series: Dict[str, Dict[str, np.ndarray]] = {}
+        self.now: Optional[np.datetime64] = None
+        self.step = self.STEPS - 1
+
+    def load(self, symbol: str) -> Dict[str, np.ndarray]:
+        """取某标的的 K 线列 (首次访问时生成或读取本地缓存)"""
+        data = self.series.get(symbol)
+        if data is not None:
+            return data
+
+        if self.source == 'store':
+            from src.core.bar_store import BarStore
+            df = BarStore(self.store_dir).load(symbol, self.period, self.adjust)
+            if df.empty:
+                raise SimBrokerError(f"No recorded {self.period} bars for {symbol} in {self.store_dir}")
+        else:
+            df = synthetic_bars(symbol, self.n_bars, self.seed)
+
+        data = {name: df[name].to_numpy() for name in ("open", "high", "low", "close", "volume")}
+        data["timestamp"] = df["timestamp"].to_numpy(dtype="datetime64[ns]")
+        self.series[symbol] = data
+        self.logger.debug(f"Loaded {len(df)} {self.source} bars for {symbol}")
+
+        if self.now is None:
+            # 默认停在最后一根 K 线收盘，start 可指定回放起点 (日期)
+            ts = data["timestamp"]
+            if self.start is not None:
+                idx = min(int(np.searchsorted(ts, np.datetime64(pd.Timestamp(self.start)))), len(ts) - 1)
+                self.now, self.step = ts[idx], 0
+            else:
+                self.now, self.step = ts[-1], self.STEPS - 1
+        return data
+
+    def _index(self, data: Dict[str, np.ndarray]) -> int:
+        """当前时间所在 K 线的下标 (尚未上市为 -1)"""
+        return int(np.searchsorted(data["timestamp"], self.now, side="right")) - 1
+
+    @classmethod
+    def path(cls, o: float, h: float, l: float, c: float) -> tuple:
+        return (o, l, h, c) if c >= o else (o, h, l, c)
+
+    def bar(self, symbol: str, i: int, partial: bool) -> Optional[SimCandlestick]:
+        data = self.load(symbol)
+        o, h, l, c = (float(data[k][i]) for k in ("open", "high", "low", "close"))
+        volume = int(data["volume"][i])
+        if partial and self.step < self.STEPS - 1:
+            walked = self.path(o, h, l, c)[:self.step + 1]
+            h, l, c = max(walked), min(walked), walked[-1]
+            volume = volume * (self.step + 1) // self.STEPS
+        return SimCandlestick(pd.Timestamp(data["timestamp"][i]).to_pydatetime(), o, h, l, c, volume,
+                              round(volume * c, 2))
+
+    def price(self, symbol: str) -> Optional[float]:
+        data = self.load(symbol)
+        i = self._index(data)
+        if i < 0:
+            return None
+        path = self.path(*(float(data[k][i]) for k in ("open", "high", "low", "close")))
+        # 当前 K 线已过期 (停牌 / 数据结束) 时停在收盘价
+        return path[self.step] if data["timestamp"][i] == self.now else path[-1]
+
+    def candlesticks(self, symbol: str, count: int) -> List[SimCandlestick]:
+        i = self._index(self.load(symbol))
+        return [self.bar(symbol, j, partial=(j == i)) for j in range(max(0, i - count + 1), i + 1)]
+
+    def candlesticks_between(self, symbol: str, start: date, end: date) -> List[SimCandlestick]:
+        data = self.load(symbol)
+        ts = data["timestamp"]
+        lo = int(np.searchsorted(ts, np.datetime64(pd.Timestamp(start))))
+        hi = min(int(np.searchsorted(ts, np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1)))), self._index(data) + 1)
+        last = self._index(data)
+        return [self.bar(symbol, j, partial=(j == last)) for j in range(lo, hi)]
+
+    def quote(self, symbol: str) -> Optional[SimpleNamespace]:
+        data = self.load(symbol)
+        i = self._index(data)
+        if i < 0:
+            return None
+        bar = self.bar(symbol, i, partial=data["timestamp"][i] == self.now)
+        prev_close = float(data["close"][i - 1]) if i > 0 else bar.open
+        return SimpleNamespace(symbol=symbol, last_done=bar.close, open=bar.open, high=bar.high, low=bar.low,
+                               prev_close=prev_close, volume=bar.volume, turnover=bar.turnover,
+                               timestamp=bar.timestamp)
+
+    def advance(self) -> bool:
+        """推进一步，已到所有数据末尾时返回 False"""
+        if self.now is None:
+            return False
+        if self.step < self.STEPS - 1:
+            self.step += 1
+            return True
+        upcoming = [d["timestamp"][np.searchsorted(d["timestamp"], self.now, side="right")]
+                    for d in self.series.values() if d["timestamp"][-1] > self.now]
+        if not upcoming:
+            return False
+        self.now, self.step = min(upcoming), 0
+        return True
+
+@dataclass
+class SimOrder:
+    order_id: str
+    symbol: str
+    side: Any
+    order_type: Any
+    quantity: int
+    price: Optional[float]
+    status: Any = field(default_factory=lambda: OrderStatus.New)
+    executed_quantity: int = 0
+    executed_price: float = 0.0
+    submitted_at: datetime = None
+    updated_at: datetime = None
+    msg: str = ""
+    remark: str = ""
+
+    def snapshot(self) -> SimpleNamespace:
+        """推送 / 查询返回的只读副本 (字段名同 SDK 的 Order / PushOrderChanged)"""
+        return SimpleNamespace(
+            order_id=self.order_id, symbol=self.symbol, side=self.side, order_type=self.order_type,
+            status=self.status, quantity=self.quantity, submitted_quantity=self.quantity,
+            executed_quantity=self.executed_quantity, executed_price=self.executed_price,
+            price=self.price, submitted_price=self.price, submitted_at=self.submitted_at,
+            updated_at=self.updated_at, msg=self.msg, remark=self.remark
+        )
+
+class SimBroker:
+    """
+    进程内模拟券商: 行情、撮合与账户共用一把锁
+
+    - 市价单与可立即成交的限价单在提交时按当前价成交；其余限价单挂单，
+      时钟推进时价格穿过限价即按限价成交 (跳空越过时按开盘价成交)
+    - fill_lot > 0 时每一步每笔订单最多成交 fill_lot 股，模拟分批成交
+    - 每次 API 调用注入 latency_ms ± jitter 的延迟；推送在独立线程中按 push_latency_ms 延迟送达
+    - steps_per_second > 0 时后台时钟自动推进，否则由调用方 advance()
+    """
+    def __init__(self, config: Dict[str, Any] = None):
+        self.logger = get_logger("sim_broker")
+        sim_conf = ((config or {}).get('broker', {}) or {}).get('sim', {}) or {}
+        self.market = SimMarket(
+            source=sim_conf.get('source', 'synthetic'),
+            bars=sim_conf.get('bars', 2520),
+            seed=sim_conf.get('seed', 7),
+            period=sim_conf.get('period', 'day'),
+            store_dir=sim_conf.get('store_dir', ((config or {}).get('data', {}) or {}).get('cache_dir', 'data/bars')),
+            start=sim_conf.get('start'),
+        )
+        self.currency = sim_conf.get('currency', 'USD')
+        self.cash = float(sim_conf.get('initial_cash', 100000.0))
+        self.commission_rate = sim_conf.get('commission_rate', 0.0)
+        self.fill_lot = sim_conf.get('fill_lot', 0)
+        self.latency = sim_conf.get('latency_ms', 0) / 1000
+        self.jitter = sim_conf.get('latency_jitter_ms', 0) / 1000
+        self.push_latency = sim_conf.get('push_latency_ms', 0) / 1000
+        # 网络故障注入: 请求丢失 (未到达) 与下单回包丢失 (已受理) 各按该概率发生
+        self.error_rate = sim_conf.get('error_rate', 0.0)
+
+        self.lock = threading.RLock()
+        self.rng = random.Random(sim_conf.get('seed', 7))
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.orders: Dict[str, SimOrder] = {}
+        self.ids = itertools.count(1)
+        self.order_callback: Optional[Callable] = None
+        self.quote_callback: Optional[Callable] = None
+        self.quote_subscriptions: set = set()
+        self.calls: Dict[str, int] = {}
+
+        # 预先加载标的以确定时钟起点 (其余标的在首次访问时加载)
+        for symbol in sim_conf.get('symbols') or [(config or {}).get('symbol', 'SPY.US')]:
+            try:
+                self.market.load(symbol)
+            except SimBrokerError as e:
+                self.logger.warning(str(e))
+
+        self.pushes: "queue.Queue" = queue.Queue()
+        threading.Thread(target=self._push_loop, name="sim-push", daemon=True).start()
+
+        steps_per_second = sim_conf.get('steps_per_second', 0)
+        if steps_per_second > 0:
+            threading.Thread(target=self._clock_loop, args=(1 / steps_per_second,), name="sim-clock", daemon=True).start()
+
+    # ---------- 基础设施 ----------
+
+    def delay(self, method: str):
+        """统计调用次数并注入延迟"""
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise ConnectionError(f"Simulated network error on {method}")
+
+    def _push_loop(self):
+        while True:
+            due, callback, event = self.pushes.get()
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                callback(event)
+            except Exception as e:
+                self.logger.error(f"Push callback failed: {e}")
+
+    def _push_order(self, order: SimOrder):
+        if self.order_callback:
+            self.pushes.put((time.monotonic() + self.push_latency, self.order_callback, order.snapshot()))
+
+    def _clock_loop(self, interval: float):
+        while True:
+            time.sleep(interval)
+            if not self.advance():
+                self.logger.info("Simulated market reached the end of its bars, clock stopped")
+                return
+
+    def advance(self, steps: int = 1) -> bool:
+        """推进行情时钟并撮合挂单，返回是否仍有后续数据"""
+        with self.lock:
+            for _ in range(steps):
+                if not self.market.advance():
+                    return False
+                for order in list(self.orders.values()):
+                    if order.status in OPEN_STATUSES:
+                        self._match(order, resting=True)
+                if self.quote_callback:
+                    for symbol in self.quote_subscriptions:
+                        quote = self.market.quote(symbol)
+                        if quote:
+                            self.pushes.put((time.monotonic() + self.push_latency, lambda q, s=symbol: self.quote_callback(s, q), quote))
+            return True
+
+    # ---------- 撮合 ----------
+
+    def _match(self, order: SimOrder, resting: bool):
+        price = self.market.price(order.symbol)
+        if price is None:
+            return
+        buy = order.side == OrderSide.Buy
+        if order.order_type == OrderType.LO:
+            crossed = price <= order.price if buy else price >= order.price
+            if not crossed:
+                return
+            # 挂单在价格穿越时按限价成交；开盘跳空越过限价时按开盘价 (更优) 成交
+            if resting and self.market.step != 0:
+                price = order.price
+
+        qty = order.quantity - order.executed_quantity
+        if self.fill_lot > 0:
+            qty = min(qty, self.fill_lot)
+        self._fill(order, qty, price)
+
+    def _fill(self, order: SimOrder, qty: int, price: float):
+        buy = order.side == OrderSide.Buy
+        amount = qty * price
+        fee = amount * self.commission_rate
+        pos = self.positions.setdefault(order.symbol, {"quantity": 0, "cost": 0.0})
+        if buy:
+            self.cash -= amount + fee
+            pos["cost"] = (pos["cost"] * pos["quantity"] + amount) / (pos["quantity"] + qty)
+            pos["quantity"] += qty
+        else:
+            self.cash += amount - fee
+            pos["quantity"] -= qty
+            if pos["quantity"] == 0:
+                pos["cost"] = 0.0
+
+        filled = order.executed_quantity + qty
+        order.executed_price = (order.executed_price * order.executed_quantity + amount) / filled
+        order.executed_quantity = filled
+        order.status = OrderStatus.Filled if filled == order.quantity else OrderStatus.PartialFilled
+        order.updated_at = datetime.now()
+        self._push_order(order)
+
+    def _open_sell_quantity(self, symbol: str) -> int:
+        return sum(o.quantity - o.executed_quantity for o in self.orders.values()
+                   if o.symbol == symbol and o.side == OrderSide.Sell and o.status in OPEN_STATUSES)
+
+    # ---------- 交易接口 ----------
+
+    def submit_order(self, symbol, order_type, side, submitted_quantity, time_in_force=None,
+                     submitted_price=None, remark=None, **kwargs) -> str:
+        self.delay('submit_order')
+        quantity = int(submitted_quantity)
+        price = float(submitted_price) if submitted_price is not None else None
+        with self.lock:
+            if quantity <= 0:
+                raise SimBrokerError(f"Invalid quantity: {quantity}")
+            if order_type == OrderType.LO and not price:
+                raise SimBrokerError("Limit order requires submitted_price")
+            last = self.market.price(symbol)
+            if last is None:
+                raise SimBrokerError(f"{symbol} is not trading")
+
+            if side == OrderSide.Buy:
+                cost = quantity * (price or last) * (1 + self.commission_rate)
+                if cost > self.cash + 1e-6:
+                    raise SimBrokerError(f"Insufficient cash: need {cost:.2f}, have {self.cash:.2f}")
+            else:
+                held = self.positions.get(symbol, {}).get("quantity", 0)
+                if quantity > held - self._open_sell_quantity(symbol):
+                    raise SimBrokerError(f"Insufficient position in {symbol}: {held}")
+
+            now = datetime.now()
+            order = SimOrder(str(next(self.ids)), symbol, side, order_type, quantity, price,
+                             submitted_at=now, updated_at=now, remark=remark or "")
+            self.orders[order.order_id] = order
+            self._push_order(order)
+            self._match(order, resting=False)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise ConnectionError("Simulated lost reply on submit_order")
+        return order.order_id
+
+    def cancel_order(self, order_id: str):
+        self.delay('cancel_order')
+        with self.lock:
+            order = self.orders.get(str(order_id))
+            if order is None:
+                raise SimBrokerError(f"Unknown order: {order_id}")
+            if order.status not in OPEN_STATUSES:
+                raise SimBrokerError(f"Order {order_id} is {order.status} and cannot be cancelled")
+            order.status = OrderStatus.Canceled
+            order.updated_at = datetime.now()
+            self._push_order(order)
+
+    def today_orders(self, symbol=None, *args, **kwargs) -> List[SimpleNamespace]:
+        self.delay('today_orders')
+        with self.lock:
+            return [o.snapshot() for o in self.orders.values() if not symbol or o.symbol == symbol]
+
+    def stock_positions(self, symbols=None) -> SimpleNamespace:
+        self.delay('stock_positions')
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        with self.lock:
+            positions = []
+            for symbol, pos in self.positions.items():
+                if pos["quantity"] <= 0 or (symbols and symbol not in symbols):
+                    continue
+                last = self.market.price(symbol) or pos["cost"]
+                positions.append(SimpleNamespace(
+                    symbol=symbol, quantity=pos["quantity"],
+                    available_quantity=pos["quantity"] - self._open_sell_quantity(symbol),
+                    cost_price=pos["cost"], currency=self.currency,
+                    last_done=last, market_value=last * pos["quantity"],
+                    unrealized_pnl=(last - pos["cost"]) * pos["quantity"]
+                ))
+        return SimpleNamespace(channels=[SimpleNamespace(account_channel="sim", positions=positions)])
+
+    def account_balance(self, currency: str = None) -> List[SimpleNamespace]:
+        self.delay('account_balance')
+        with self.lock:
+            market_value = sum((self.market.price(s) or p["cost"]) * p["quantity"] for s, p in self.positions.items())
+            return [SimpleNamespace(currency=self.currency, total_cash=self.cash,
+                                    net_assets=self.cash + market_value, buy_power=self.cash)]
+
+    # ---------- 行情接口 ----------
+
+    def _check_period(self, period):
+        if period != SIM_PERIODS.get(self.market.period, Period.Day):
+            raise SimBrokerError(f"Simulated market only serves {self.market.period} bars")
+
+    def candlesticks(self, symbol, period, count, adjust_type=None, *args, **kwargs) -> List[SimCandlestick]:
+        self.delay('candlesticks')
+        self._check_period(period)
+        with self.lock:
+            return self.market.candlesticks(symbol, int(count))
+
+    def history_candlesticks_by_date(self, symbol, period, adjust_type, start=None, end=None, *args, **kwargs):
+        self.delay('history_candlesticks_by_date')
+        self._check_period(period)
+        with self.lock:
+            return self.market.candlesticks_between(symbol, start or date(1970, 1, 1), end or date.today())
+
+    def quote(self, symbols) -> List[SimpleNamespace]:
+        self.delay('quote')
+        with self.lock:
+            return [q for q in (self.market.quote(s) for s in symbols) if q is not None]
+
+class SimContext:
+    """
+    SimBroker 的上下文视图，提供 QuoteContext / TradeContext 各自的回调与订阅方法，
+    其余调用转发给共享的 SimBroker
+    """
+    def __init__(self, broker: SimBroker, kind: str):
+        self.broker = broker
+        self.kind = kind
+
+    def set_on_order_changed(self, callback):
+        self.broker.order_callback = callback
+
+    def set_on_quote(self, callback):
+        self.broker.quote_callback = callback
+
+    def subscribe(self, symbols=None, sub_types=None, *args, **kwargs):
+        if self.kind == 'quote':
+            self.broker.quote_subscriptions.update(symbols or [])
+
+    def unsubscribe(self, symbols=None, sub_types=None, *args, **kwargs):
+        if self.kind == 'quote':
+            self.broker.quote_subscriptions.difference_update(symbols or [])
+
+    def __getattr__(self, name: str):
+        return getattr(self.broker, name)
+
+def sim_factory(config: Dict[str, Any] = None) -> Callable[[str], SimContext]:
+    """ContextPool 工厂: 行情与交易上下文共享同一个 SimBroker"""
+    broker = SimBroker(config)
+    get_logger("sim_broker").info("Using simulated broker (broker.mode = sim)")
+    return lambda kind: SimContext(broker, kind)
@@ -1,3 +1,4 @@
+import math
 import pandas as pd
 from typing import Optional, Dict
 from dataclasses import dataclass
@@ -70,6 +71,13 @@ class Strategy:
         price = curr['close']
         timestamp = curr['timestamp'] if 'timestamp' in curr else datetime.now()
         
+        return self.evaluate_cross(timestamp, price, short_ma_prev, long_ma_prev, short_ma_curr, long_ma_curr)
+
+    def evaluate_cross(self, timestamp, price: float, short_ma_prev: float, long_ma_prev: float,
+                       short_ma_curr: float, long_ma_curr: float) -> Signal:
+        """
+        根据 T-1 与 T 的均线值判断金叉/死叉
+        """
         signal_type = 'HOLD'
         # 默认理由
         reason = f"MA{self.short_window}:{short_ma_curr:.2f}, MA{self.long_window}:{long_ma_curr:.2f}"
@@ -99,3 +107,140 @@ class Strategy:
             reason=reason
         )
 
+class RollingMean:
+    """
+    环形缓冲区滚动均值，push 为 O(1)
+
+    运行和使用 Kahan 补偿求和，并每满一个窗口用 math.fsum 重新校准，
+    窗口内数值全部相同时直接返回该值 (与 pandas rolling().mean() 一致)。
+    """
+    __slots__ = ('window', 'buf', 'idx', 'count', 'total', 'comp', 'pushes', 'same_count', 'last_value')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buf = [0.0] * window
+        self.idx = 0
+        self.count = 0
+        self.total = 0.0
+        self.comp = 0.0
+        self.pushes = 0
+        self.same_count = 0
+        self.last_value = None
+
+    def _add(self, x: float):
+        # Kahan 补偿加法
+        y = x - self.comp
+        t = self.total + y
+        self.comp = (t - self.total) - y
+        self.total = t
+
+    def push(self, x: float):
+        if self.count == self.window:
+            self._add(-self.buf[self.idx])
+        else:
+            self.count += 1
+        self.buf[self.idx] = x
+        self._add(x)
+        self.idx = (self.idx + 1) % self.window
+
+        self.same_count = self.same_count + 1 if x == self.last_value else 1
+        self.last_value = x
+
+        self.pushes += 1
+        if self.pushes % self.window == 0:
+            self._resync()
+
+    def replace_last(self, x: float):
+        """修正最后一个值 (同一根 K 线的更新)"""
+        last = (self.idx - 1) % self.window
+        self.buf[last] = x
+        self.last_value = x
+        self._resync()
+        # 重新统计末尾连续相同值的个数
+        same = 0
+        for k in range(self.count):
+            if self.buf[(last - k) % self.window] != x:
+                break
+            same += 1
+        self.same_count = same
+
+    def _resync(self):
+        if self.count == self.window:
+            self.total = math.fsum(self.buf)
+        else:
+            self.total = math.fsum(self.buf[:self.count])
+        self.comp = 0.0
+
+    @property
+    def value(self) -> float:
+        if self.count < self.window:
+            return float('nan')
+        if self.same_count >= self.window:
+            return self.last_value
+        return self.total / self.window
+
+class IncrementalStrategy(Strategy):
+    """
+    增量双均线信号引擎
+
+    每根新 K 线调用 update() 以 O(1) 更新短/长均线并返回与 check_signal 相同语义的 Signal，
+    不依赖 pandas。可先用 seed() 从历史 DataFrame 预热。
+    """
+    def __init__(self, short_window: int = 5, long_window: int = 20):
+        super().__init__(short_window, long_window)
+        self.reset()
+
+    def reset(self):
+        self.short_ma = RollingMean(self.short_window)
+        self.long_ma = RollingMean(self.long_window)
+        self.bars = 0
+        self.last_timestamp = None
+        self.prev_short = float('nan')
+        self.prev_long = float('nan')
+
+    def seed(self, data: pd.DataFrame) -> Optional[Signal]:
+        """
+        用历史数据预热，返回最后一根 K 线对应的信号
+        只需最后 long_window + 1 根即可确定当前及上一根的均线
+        """
+        self.reset()
+        if data.empty:
+            return None
+        if 'timestamp' in data.columns:
+            data = data.sort_values('timestamp')
+        # 保留 bars 计数以匹配 check_signal 的数据量检查
+        skipped = max(len(data) - (self.long_window + 1), 0)
+        tail = data.iloc[skipped:]
+        closes = tail['close'].tolist()
+        timestamps = tail['timestamp'].tolist() if 'timestamp' in tail.columns else [None] * len(closes)
+
+        signal = None
+        self.bars = skipped
+        for ts, close in zip(timestamps, closes):
+            signal = self.update(close, ts)
+        return signal
+
+    def update(self, close: float, timestamp=None) -> Signal:
+        """
+        输入一根新 K 线的收盘价，返回信号
+        与上一根 timestamp 相同时视为对最后一根 K 线的修正
+        """
+        if timestamp is not None and self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            if timestamp < self.last_timestamp:
+                raise ValueError(f"Out-of-order bar: {timestamp} < {self.last_timestamp}")
+            self.short_ma.replace_last(close)
+            self.long_ma.replace_last(close)
+        else:
+            self.prev_short = self.short_ma.value
+            self.prev_long = self.long_ma.value
+            self.short_ma.push(close)
+            self.long_ma.push(close)
+            self.bars += 1
+            self.last_timestamp = timestamp
+
+        ts = timestamp if timestamp is not None else datetime.now()
+        if self.bars < self.long_window + 1:
+            msg = f"Insufficient data: have {self.bars}, need > {self.long_window + 1}"
+            return Signal('HOLD', ts, close, 0, 0, msg)
+
+        return self.evaluate_cross(ts, close, self.prev_short, self.prev_long, self.short_ma.value, self.long_ma.value)
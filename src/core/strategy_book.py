@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from src.core.strategy import Strategy, Signal
+
+@dataclass
+class StrategyInstance:
+    """一个策略实例: 标的 + 均线参数 + 仓位设置"""
+    name: str
+    symbol: str
+    short_window: int = 5
+    long_window: int = 20
+    position_ratio: float = 1.0
+    capital: Optional[float] = None     # 该实例可占用的资金上限，None 为不限 (共用账户现金)
+    order_type: str = "Market"
+
+def load_instances(config: Dict[str, Any]) -> List[StrategyInstance]:
+    """
+    读取 config.strategies 列表；未配置时由顶层 symbol / strategy / trading 组成单个实例
+
+    每个条目可写 symbol 或 symbols (列表，按标的展开为多个实例)，未写的参数沿用顶层配置。
+    """
+    config = config or {}
+    strat_conf = config.get('strategy', {}) or {}
+    trading_conf = config.get('trading', {}) or {}
+    defaults = {
+        "short_ma_period": strat_conf.get('short_ma_period', 5),
+        "long_ma_period": strat_conf.get('long_ma_period', 20),
+        "position_ratio": trading_conf.get('position_ratio', 1.0),
+        "capital": None,
+        "order_type": trading_conf.get('order_type', 'Market'),
+    }
+    entries = config.get('strategies') or [{"symbol": config.get('symbol', 'SPY.US'), "name": config.get('symbol', 'SPY.US')}]
+
+    instances = []
+    for entry in entries:
+        conf = {**defaults, **entry}
+        symbols = conf.get('symbols') or [conf.get('symbol') or config.get('symbol', 'SPY.US')]
+        for symbol in symbols:
+            short, long = int(conf['short_ma_period']), int(conf['long_ma_period'])
+            if short >= long:
+                raise ValueError(f"Strategy {entry}: short_ma_period must be less than long_ma_period")
+            name = entry.get('name') if len(symbols) == 1 and entry.get('name') else f"{symbol}_{short}_{long}"
+            instances.append(StrategyInstance(name, symbol, short, long, float(conf['position_ratio']),
+                                              conf['capital'], conf['order_type']))
+
+    names = [i.name for i in instances]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate strategy instance names: {', '.join(duplicates)}")
+    return instances
+
+class StrategyBook:
+    """
+    多实例双均线信号
+
+    每个标的只保留最近 max(long_window) + 1 根收盘价 (标的 × 窗口 矩阵，右对齐)，
+    新 K 线 O(1) 写入；signals() 对每个不同的窗口长度一次算出所有标的当前与上一根的均线，
+    再按实例取值比较，信号语义与 Strategy.check_signal 相同。
+    """
+    def __init__(self, instances: List[StrategyInstance]):
+        self.instances = instances
+        self.symbols = list(dict.fromkeys(i.symbol for i in instances))
+        self.row = {s: k for k, s in enumerate(self.symbols)}
+        self.depth = max(i.long_window for i in instances) + 1
+        self.closes = np.full((len(self.symbols), self.depth), np.nan)
+        self.counts = np.zeros(len(self.symbols), dtype=np.int64)
+        self.timestamps: Dict[str, Any] = {}
+
+        self._rows = np.array([self.row[i.symbol] for i in instances], dtype=np.int64)
+        self._short = np.array([i.short_window for i in instances], dtype=np.int64)
+        self._long = np.array([i.long_window for i in instances], dtype=np.int64)
+        self._strategies = {(i.short_window, i.long_window): Strategy(i.short_window, i.long_window)
+                            for i in instances}
+
+    def last_timestamp(self, symbol: str):
+        return self.timestamps.get(symbol)
+
+    def seed(self, symbol: str, data: pd.DataFrame):
+        """用历史 K 线重置该标的的收盘价窗口"""
+        if 'timestamp' in data.columns:
+            data = data.sort_values('timestamp')
+        k = self.row[symbol]
+        tail = data['close'].to_numpy(dtype=np.float64)[-self.depth:]
+        self.closes[k] = np.nan
+        if len(tail):
+            self.closes[k, -len(tail):] = tail
+        self.counts[k] = len(data)
+        self.timestamps[symbol] = data['timestamp'].iloc[-1] if len(data) and 'timestamp' in data.columns else None
+
+    def update(self, symbol: str, close: float, timestamp):
+        """写入一根新 K 线；与最后一根时间相同时视为修正"""
+        k = self.row[symbol]
+        last = self.timestamps.get(symbol)
+        if last is not None and timestamp <= last:
+            if timestamp < last:
+                raise ValueError(f"Out-of-order bar for {symbol}: {timestamp} < {last}")
+            self.closes[k, -1] = close
+            return
+        self.closes[k, :-1] = self.closes[k, 1:]
+        self.closes[k, -1] = close
+        self.counts[k] += 1
+        self.timestamps[symbol] = timestamp
+
+    def _means(self, windows: np.ndarray, lag: int) -> np.ndarray:
+        """每个实例的 window 均线 (lag=0 当前 / 1 上一根)"""
+        out = np.full(len(self.instances), np.nan)
+        end = self.depth - lag
+        for w in np.unique(windows):
+            ma = self.closes[:, end - w:end].mean(axis=1)
+            mask = windows == w
+            out[mask] = ma[self._rows[mask]]
+        return out
+
+    def signals(self) -> List[Signal]:
+        """按实例顺序返回信号"""
+        short_curr, long_curr = self._means(self._short, 0), self._means(self._long, 0)
+        short_prev, long_prev = self._means(self._short, 1), self._means(self._long, 1)
+        cross = ((short_prev < long_prev) & (short_curr >= long_curr)) | \
+                ((short_prev > long_prev) & (short_curr <= long_curr))
+        enough = self.counts[self._rows] >= self._long + 1
+
+        result = []
+        for n, inst in enumerate(self.instances):
+            k = self._rows[n]
+            price = float(self.closes[k, -1])
+            ts = self.timestamps.get(inst.symbol) or datetime.now()
+            if not enough[n]:
+                result.append(Signal('HOLD', ts, price, 0, 0,
+                                     f"Insufficient data: have {self.counts[k]}, need > {inst.long_window + 1}"))
+            elif cross[n]:
+                result.append(self._strategies[(inst.short_window, inst.long_window)].evaluate_cross(
+                    ts, price, short_prev[n], long_prev[n], short_curr[n], long_curr[n]))
+            else:
+                result.append(Signal('HOLD', ts, price, short_curr[n], long_curr[n],
+                                     f"MA{inst.short_window}:{short_curr[n]:.2f}, MA{inst.long_window}:{long_curr[n]:.2f}"))
+        return result
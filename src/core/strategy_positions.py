@@ -0,0 +1,73 @@
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Tuple
+from src.core.order_manager import OrderRecord, order_sequence
+from src.utils.logger import get_logger
+
+def replay_fills(records: Iterable[OrderRecord], held: int = 0, cost: float = 0.0) -> Tuple[int, float]:
+    """
+    从 (held, cost) 出发按顺序回放成交，返回持仓数量与平均成本 (records 需已按 order_sequence 排序)
+    """
+    for r in records:
+        qty = r.filled_quantity or 0
+        if not qty:
+            continue
+        if r.side.upper() == "BUY":
+            cost = (cost * held + qty * (r.filled_price or r.signal_price or 0.0)) / (held + qty)
+            held += qty
+        else:
+            held = max(0, held - qty)
+    return held, cost if held else 0.0
+
+class StrategyPositions:
+    """
+    多个策略实例共用一个券商账户时各实例自己的持仓 (数量与平均成本)
+
+    持仓 = 已折算的快照 + 订单日志中快照之后的订单成交。按订单号顺序排在最前、已经结束的订单
+    随每次查询折算进快照并记下折算到的订单号，因此订单日志压缩 (OrderManager.compact)
+    丢弃旧订单后持仓不变。快照保存在独立的 JSON 文件中，不写入订单日志。
+    """
+    def __init__(self, path: str):
+        self.logger = get_logger("strategy_positions")
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.positions = json.load(f)
+
+    def position(self, name: str, symbol: str, records: List[OrderRecord]) -> Tuple[int, float]:
+        """
+        计算实例 name 在 symbol 上的持仓
+
+        Args:
+            records: 订单日志中属于该实例的订单 (任意顺序)
+        """
+        records = sorted(records, key=order_sequence)
+        with self.lock:
+            entry = self.positions.get(name) or {}
+            base = (entry.get('quantity', 0), entry.get('cost', 0.0))
+            through = tuple(entry['through']) if entry.get('through') else None
+            fresh = [r for r in records if through is None or order_sequence(r) > through]
+
+            # 连续已结束的订单不会再变化，折算进快照
+            settled = 0
+            while settled < len(fresh) and not fresh[settled].is_active:
+                settled += 1
+            if settled:
+                held, cost = replay_fills(fresh[:settled], *base)
+                self.positions[name] = {"symbol": symbol, "quantity": held, "cost": cost,
+                                        "through": list(order_sequence(fresh[settled - 1]))}
+                self._save()
+                base, fresh = (held, cost), fresh[settled:]
+            return replay_fills(fresh, *base)
+
+    def _save(self):
+        # 先写临时文件再替换，中途崩溃不会留下半个文件
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.positions, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
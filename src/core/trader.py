@@ -1,32 +1,121 @@
-from typing import List, Dict, Optional, Any
+import time
+import uuid
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Any, Callable, Union
 from decimal import Decimal
-from longport.openapi import TradeContext, Config, OrderSide, OrderType, TimeInForceType, OrderStatus
+from longport.openapi import OrderSide, OrderType, TimeInForceType, OrderStatus, TopicType
+from src.core.context_pool import ContextPool, is_connection_error
+from src.core.account_state import AccountState
 from src.utils.logger import get_logger
 
+@dataclass
+class OrderRequest:
+    """批量下单中的一笔订单"""
+    symbol: str
+    side: str
+    quantity: int
+    price: Optional[float] = None
+    order_type: str = "Market"
+
+@dataclass
+class BatchResult:
+    """批量操作中单笔的结果: target 为 OrderRequest (下单) 或订单号 (撤单)"""
+    target: Any
+    order_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def is_rate_limited(e: Exception) -> bool:
+    """券商限流错误 (429xxx)，退避后可重试"""
+    return str(getattr(e, 'code', '')).startswith('429')
+
 class Trader:
+    # 进程级共享状态 (随 ContextPool 单例重建): 账户缓存与订单推送的订阅方
+    _shared_lock = threading.RLock()
+    _shared_pool = None
+    _account_state: Optional[AccountState] = None
+    _push_listeners: List[Callable] = []
+    _push_installed = False
+
     def __init__(self, config: Dict[str, Any] = None):
         self.logger = get_logger("trader")
         self.config = config or {}
         
-        # 从硬编码文件加载配置
+        # 使用进程级共享的 TradeContext，首次使用时建立连接
         try:
-            from src.core.lp_config import get_hardcoded_lp_config
-            lp_config = get_hardcoded_lp_config()
-            self.ctx = TradeContext(lp_config)
+            self.ctx = ContextPool.instance().trade()
             self.logger.debug("Longport TradeContext initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize TradeContext: {e}")
             self.ctx = None
 
+        account_conf = self.config.get('account', {}) or {}
+        self.cache_ttl = account_conf.get('cache_ttl_seconds', 30)
+        self.background_refresh = account_conf.get('background_refresh', True)
+
+    def _shared(self):
+        """取当前连接池对应的共享状态，连接池被重建 (切换 live / sim) 时一并重置"""
+        pool = ContextPool.instance()
+        with Trader._shared_lock:
+            if Trader._shared_pool is not pool:
+                Trader._shared_pool = pool
+                Trader._account_state = None
+                Trader._push_listeners = []
+                Trader._push_installed = False
+        return Trader
+
+    @property
+    def account(self) -> Optional[AccountState]:
+        """共享的账户缓存 (account.cache_ttl_seconds 为 0 时不启用)"""
+        if self.ctx is None or self.cache_ttl <= 0:
+            return None
+        shared = self._shared()
+        if shared._account_state is None:
+            with shared._shared_lock:
+                if shared._account_state is None:
+                    state = AccountState(self._fetch_balance, self._fetch_positions,
+                                         ttl=self.cache_ttl, background=self.background_refresh)
+                    shared._account_state = state
+                    # 成交推送即时更新缓存
+                    try:
+                        self.subscribe_order_updates(state.on_order_changed)
+                    except Exception as e:
+                        self.logger.warning(f"Order push unavailable, account cache relies on TTL only: {e}")
+        return shared._account_state
+
     def _check_connection(self):
         if self.ctx is None:
             raise RuntimeError("TradeContext not initialized. Check your src/core/lp_config.py configuration.")
 
-    def get_account_balance(self, currency: str = "USD") -> Dict[str, float]:
+    def get_account_balance(self, currency: str = "USD", force: bool = False) -> Dict[str, float]:
+        """
+        获取账户余额信息 (默认读取账户缓存，force=True 时同步拉取)
+        """
+        self._check_connection()
+        account = self.account
+        if account is not None:
+            return account.balance(currency, force=force)
+        return self._fetch_balance(currency)
+
+    def get_positions(self, symbol: str = None, force: bool = False) -> List[Dict[str, Any]]:
         """
-        获取账户余额信息
+        获取持仓列表 (默认读取账户缓存，force=True 时同步拉取)
         """
         self._check_connection()
+        account = self.account
+        if account is not None:
+            return account.positions(symbol, force=force)
+        return self._fetch_positions(symbol)
+
+    def _fetch_balance(self, currency: str = "USD") -> Dict[str, float]:
+        """向券商查询账户余额"""
         try:
             # SDK 3.x 变更为 account_balance
             balances = self.ctx.account_balance()
@@ -48,11 +137,8 @@ class Trader:
             self.logger.error(f"Error getting account balance: {e}")
             raise
 
-    def get_positions(self, symbol: str = None) -> List[Dict[str, Any]]:
-        """
-        获取持仓列表
-        """
-        self._check_connection()
+    def _fetch_positions(self, symbol: str = None) -> List[Dict[str, Any]]:
+        """向券商查询持仓列表"""
         try:
             # SDK 3.x 返回 StockPositionsResponse -> channels -> positions
             resp = self.ctx.stock_positions(symbol if symbol else [])
@@ -77,7 +163,8 @@ class Trader:
             self.logger.error(f"Error getting positions: {e}")
             raise
 
-    def submit_order(self, symbol: str, side: str, quantity: int, price: float = None, order_type: str = "Market") -> str:
+    def submit_order(self, symbol: str, side: str, quantity: int, price: float = None, order_type: str = "Market",
+                     remark: str = None) -> str:
         """
         提交订单
         
@@ -87,6 +174,7 @@ class Trader:
             quantity: 数量
             price: 价格 (Limit单必填)
             order_type: 'Market' or 'Limit'
+            remark: 订单备注 (批量下单用于识别是否已提交成功)
             
         Returns:
             order_id (str)
@@ -110,7 +198,8 @@ class Trader:
                 side=side_enum,
                 submitted_quantity=quantity,
                 submitted_price=Decimal(str(price)) if price else None,
-                time_in_force=TimeInForceType.Day
+                time_in_force=TimeInForceType.Day,
+                remark=remark
             )
             self.logger.info(f"Order submitted successfully. ID: {order_id}")
             return order_id
@@ -128,6 +217,110 @@ class Trader:
             self.logger.error(f"Error cancelling order {order_id}: {e}")
             raise
 
+    def _batch_settings(self, max_workers, retries, backoff):
+        batch_conf = (self.config.get('trading', {}) or {}).get('batch', {}) or {}
+        return (
+            max_workers or batch_conf.get('max_workers', 8),
+            batch_conf.get('retries', 2) if retries is None else retries,
+            batch_conf.get('backoff_seconds', 0.2) if backoff is None else backoff,
+        )
+
+    def _with_retry(self, result: BatchResult, call: Callable[[], Any], retries: int, backoff: float,
+                    retryable: Callable[[Exception], bool], recover: Callable[[], Optional[Any]] = None) -> BatchResult:
+        """
+        执行单笔操作，可重试的错误按指数退避 (带随机抖动) 重试
+
+        recover: 连接错误后确认上一次请求是否已生效，返回非 None 时视为成功，抛出异常时不再重试
+        """
+        for attempt in range(retries + 1):
+            result.attempts = attempt + 1
+            try:
+                result.order_id = str(call())
+                result.error = None
+                return result
+            except Exception as e:
+                result.error = str(e)
+                if recover is not None and is_connection_error(e):
+                    try:
+                        recovered = recover()
+                    except Exception as check_error:
+                        # 无法确认是否已生效时不重试，交给调用方核对
+                        result.error = f"{e} (unconfirmed: {check_error})"
+                        return result
+                    if recovered is not None:
+                        result.order_id, result.error = str(recovered), None
+                        return result
+                if attempt == retries or not retryable(e):
+                    return result
+                time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+        return result
+
+    def submit_orders(self, orders: List[Union[OrderRequest, Dict[str, Any]]], max_workers: int = None,
+                      retries: int = None, backoff: float = None) -> List[BatchResult]:
+        """
+        并发提交一批订单，返回与输入顺序一致的结果
+
+        限流错误退避重试；连接错误时先按备注在今日订单中确认是否已提交，未提交才重试，
+        避免重复下单。其余错误 (资金不足、参数错误等) 不重试。
+
+        Args:
+            orders: OrderRequest 或同名字段的 dict
+            max_workers / retries / backoff: 默认取 config.trading.batch
+        """
+        self._check_connection()
+        max_workers, retries, backoff = self._batch_settings(max_workers, retries, backoff)
+        requests = [o if isinstance(o, OrderRequest) else OrderRequest(**o) for o in orders]
+        batch_id = uuid.uuid4().hex[:8]
+
+        def run(i: int, req: OrderRequest) -> BatchResult:
+            remark = f"batch-{batch_id}-{i}"
+
+            def recover():
+                for o in self.ctx.today_orders(req.symbol):
+                    if getattr(o, 'remark', None) == remark:
+                        self.logger.info(f"Order {remark} was accepted before the connection error: {o.order_id}")
+                        return o.order_id
+                return None
+
+            return self._with_retry(
+                BatchResult(req),
+                lambda: self.submit_order(req.symbol, req.side, req.quantity, req.price, req.order_type, remark=remark),
+                retries, backoff,
+                retryable=lambda e: is_rate_limited(e) or is_connection_error(e),
+                recover=recover
+            )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests) or 1))) as executor:
+            results = list(executor.map(run, range(len(requests)), requests))
+        failed = sum(not r.ok for r in results)
+        self.logger.info(f"Batch {batch_id}: submitted {len(results) - failed}/{len(results)} orders "
+                         f"in {time.perf_counter() - start:.2f}s")
+        return results
+
+    def cancel_orders(self, order_ids: List[str], max_workers: int = None,
+                      retries: int = None, backoff: float = None) -> List[BatchResult]:
+        """
+        并发撤销一批订单 (撤单可安全重试)，返回与输入顺序一致的结果
+        """
+        self._check_connection()
+        max_workers, retries, backoff = self._batch_settings(max_workers, retries, backoff)
+
+        def run(order_id: str) -> BatchResult:
+            return self._with_retry(
+                BatchResult(order_id),
+                lambda: self.cancel_order(order_id) or order_id,
+                retries, backoff,
+                retryable=lambda e: is_rate_limited(e) or is_connection_error(e)
+            )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(order_ids) or 1))) as executor:
+            results = list(executor.map(run, order_ids))
+        failed = sum(not r.ok for r in results)
+        self.logger.info(f"Cancelled {len(results) - failed}/{len(results)} orders in {time.perf_counter() - start:.2f}s")
+        return results
+
     def get_orders(self, symbol: str = None, status: List[str] = None):
         """
         查询订单 (仅示意，SDK可能有 list_orders 或 history_orders 接口)
@@ -142,3 +335,36 @@ class Trader:
             self.logger.error(f"Error getting orders: {e}")
             return []
 
+    def subscribe_order_updates(self, callback):
+        """
+        订阅订单状态推送 (TopicType.Private)，callback 在 SDK 推送线程中以 PushOrderChanged 调用
+
+        SDK 只保留一个推送回调，这里安装一个分发器，转发给进程内所有订阅方。
+        经由 ContextPool 设置的回调与订阅会在断线重连后自动重放。
+        """
+        self._check_connection()
+        shared = self._shared()
+        with shared._shared_lock:
+            if callback not in shared._push_listeners:
+                shared._push_listeners.append(callback)
+            if shared._push_installed:
+                return
+            shared._push_installed = True
+        self.ctx.set_on_order_changed(Trader._dispatch_push)
+        self.ctx.subscribe([TopicType.Private])
+        self.logger.info("Subscribed to order change push")
+
+    def unsubscribe_order_updates(self, callback):
+        """移除订单推送订阅方"""
+        shared = self._shared()
+        with shared._shared_lock:
+            if callback in shared._push_listeners:
+                shared._push_listeners.remove(callback)
+
+    @staticmethod
+    def _dispatch_push(event):
+        for callback in list(Trader._push_listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                get_logger("trader").error(f"Order push listener failed: {e}")
@@ -0,0 +1,252 @@
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from typing import Dict, Any, List, Optional, Tuple, Union
+from src.utils.logger import get_logger
+
+DEFAULT_PERIODS_PER_YEAR = 252
+
+# 非规则休市 (国葬、飓风、9/11 等)
+SPECIAL_CLOSURES = [
+    "1994-04-27", "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14", "2004-06-11", "2007-01-02",
+    "2012-10-29", "2012-10-30", "2018-12-05", "2025-01-09",
+]
+
+DateLike = Union[str, date, datetime, pd.Timestamp, np.datetime64]
+
+def _easter(year: int) -> date:
+    """公历复活节 (Anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """某月第 n 个星期 weekday (n = -1 为最后一个)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(d: date) -> date:
+    """周六休市提前到周五，周日顺延到周一"""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+def us_equity_holidays(year: int) -> Tuple[List[date], List[date]]:
+    """
+    NYSE / Nasdaq 全日休市与 13:00 提前收盘日
+
+    Returns:
+        (holidays, early_closes)
+    """
+    holidays = []
+    new_year = date(year, 1, 1)
+    # 元旦落在周六时不提前到上一年的 12/31 (年末结算日)
+    if new_year.weekday() != 5:
+        holidays.append(_observed(new_year))
+    if year >= 1998:
+        holidays.append(_nth_weekday(year, 1, 0, 3))       # Martin Luther King Jr. Day
+    holidays.append(_nth_weekday(year, 2, 0, 3))           # Washington's Birthday
+    holidays.append(_easter(year) - timedelta(days=2))     # Good Friday
+    holidays.append(_nth_weekday(year, 5, 0, -1))          # Memorial Day
+    if year >= 2022:
+        holidays.append(_observed(date(year, 6, 19)))      # Juneteenth
+    holidays.append(_observed(date(year, 7, 4)))           # Independence Day
+    holidays.append(_nth_weekday(year, 9, 0, 1))           # Labor Day
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    holidays.append(thanksgiving)
+    holidays.append(_observed(date(year, 12, 25)))         # Christmas
+
+    early = [thanksgiving + timedelta(days=1)]
+    # 7/3、12/24 为周一至周四时提前收盘 (为周五时当天是顺延的假日)
+    for d in (date(year, 7, 3), date(year, 12, 24)):
+        if d.weekday() < 4:
+            early.append(d)
+    return holidays, early
+
+class TradingCalendar:
+    """
+    美股交易日历
+
+    启动时把 [start_year, end_year] 内每个交易日的开盘 / 收盘时刻 (UTC 纳秒，已处理夏令时与半日市)
+    预先计算成有序数组，查询 (是否交易日、下一次开盘、两日之间的交易日数) 都是二分查找。
+    """
+    def __init__(self, config: Dict[str, Any] = None):
+        self.logger = get_logger("calendar")
+        conf = ((config or {}).get('calendar', {}) or {})
+        self.tz = conf.get('timezone', 'America/New_York')
+        self.tz_info = ZoneInfo(self.tz)
+        self.start_year = int(conf.get('start_year', 1990))
+        self.end_year = int(conf.get('end_year', 2060))
+        open_time = pd.Timedelta(conf.get('open', '09:30') + ':00')
+        close_time = pd.Timedelta(conf.get('close', '16:00') + ':00')
+        early_time = pd.Timedelta(conf.get('early_close', '13:00') + ':00')
+
+        holidays, early = set(pd.to_datetime(SPECIAL_CLOSURES).date), set()
+        for year in range(self.start_year, self.end_year + 1):
+            h, e = us_equity_holidays(year)
+            holidays.update(h)
+            early.update(e)
+        holidays.update(pd.to_datetime(conf.get('extra_holidays') or []).date)
+        early.update(pd.to_datetime(conf.get('extra_early_closes') or []).date)
+        early -= holidays
+
+        days = np.arange(np.datetime64(f"{self.start_year}-01-01"), np.datetime64(f"{self.end_year + 1}-01-01"))
+        holiday_array = np.array(sorted(holidays), dtype='datetime64[D]')
+        self.sessions = days[np.is_busday(days, holidays=holiday_array)]
+
+        midnight = pd.DatetimeIndex(self.sessions).as_unit('ns')
+        half = np.isin(self.sessions, np.array(sorted(early), dtype='datetime64[D]'))
+        self.early_closes = self.sessions[half]
+        opens = (midnight + open_time).tz_localize(self.tz)
+        closes = (midnight + pd.TimedeltaIndex(np.where(half, early_time.value, close_time.value))).tz_localize(self.tz)
+        self.opens = opens.tz_convert('UTC').asi8
+        self.closes = closes.tz_convert('UTC').asi8
+        # 以交易所当地日期为键 (天数)，供日期类查询
+        self._days = self.sessions.astype(np.int64)
+
+    # ---------- 转换 ----------
+
+    def _day(self, value: DateLike) -> int:
+        """日期 (当地) -> 自 1970-01-01 起的天数"""
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert(self.tz).tz_localize(None)
+        day = ts.normalize().value // 86_400_000_000_000
+        if not self._days[0] - 7 <= day <= self._days[-1] + 7:
+            raise ValueError(f"{ts.date()} is outside the trading calendar "
+                             f"({self.start_year}-{self.end_year}), extend calendar.start_year / end_year")
+        return day
+
+    def _ns(self, value: DateLike) -> int:
+        """时刻 -> UTC 纳秒 (不带时区的时间视为交易所当地时间；夏令时切换的重复 / 跳过时刻取标准时间 / 顺延)"""
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize(self.tz, ambiguous=False, nonexistent='shift_forward')
+        return ts.value
+
+    def _local(self, ns: int) -> pd.Timestamp:
+        return pd.Timestamp(ns, tz='UTC').tz_convert(self.tz)
+
+    def _session(self, k: int) -> pd.Timestamp:
+        if not 0 <= k < len(self.sessions):
+            raise ValueError("Query runs past the end of the trading calendar, extend calendar.end_year")
+        return pd.Timestamp(self.sessions[k])
+
+    # ---------- 日期查询 ----------
+
+    def is_session(self, value: DateLike) -> bool:
+        """当地日期是否为交易日"""
+        day = self._day(value)
+        k = np.searchsorted(self._days, day)
+        return bool(k < len(self._days) and self._days[k] == day)
+
+    def is_early_close(self, value: DateLike) -> bool:
+        k = np.searchsorted(self.early_closes, np.datetime64(self._day(value), 'D'))
+        return bool(k < len(self.early_closes) and self.early_closes[k] == np.datetime64(self._day(value), 'D'))
+
+    def next_session(self, value: DateLike) -> pd.Timestamp:
+        """严格晚于该日期的第一个交易日"""
+        return self._session(np.searchsorted(self._days, self._day(value), side='right'))
+
+    def previous_session(self, value: DateLike) -> pd.Timestamp:
+        """严格早于该日期的最后一个交易日"""
+        return self._session(np.searchsorted(self._days, self._day(value), side='left') - 1)
+
+    def bars_between(self, start: DateLike, end: DateLike) -> int:
+        """(start, end] 之间的交易日数: 相邻两根日K之间为 1，中间缺少 n 个交易日时为 n + 1"""
+        lo, hi = self._day(start), self._day(end)
+        return int(np.searchsorted(self._days, hi, side='right') - np.searchsorted(self._days, lo, side='right'))
+
+    def sessions_in_range(self, start: DateLike, end: DateLike) -> pd.DatetimeIndex:
+        """[start, end] 内的交易日"""
+        lo = np.searchsorted(self._days, self._day(start), side='left')
+        hi = np.searchsorted(self._days, self._day(end), side='right')
+        return pd.DatetimeIndex(self.sessions[lo:hi])
+
+    def session_open(self, value: DateLike) -> Optional[pd.Timestamp]:
+        """该日开盘时刻 (当地时区)，非交易日为 None"""
+        day = self._day(value)
+        k = np.searchsorted(self._days, day)
+        return self._local(self.opens[k]) if k < len(self._days) and self._days[k] == day else None
+
+    def session_close(self, value: DateLike) -> Optional[pd.Timestamp]:
+        """该日收盘时刻 (当地时区，半日市为 13:00)，非交易日为 None"""
+        day = self._day(value)
+        k = np.searchsorted(self._days, day)
+        return self._local(self.closes[k]) if k < len(self._days) and self._days[k] == day else None
+
+    # ---------- 时刻查询 ----------
+
+    def is_open(self, when: DateLike = None) -> bool:
+        """该时刻是否处于常规交易时段"""
+        t = self._ns(when if when is not None else pd.Timestamp.now(tz=self.tz))
+        k = np.searchsorted(self.opens, t, side='right') - 1
+        return bool(k >= 0 and t < self.closes[k])
+
+    def next_open(self, when: DateLike = None) -> pd.Timestamp:
+        """不早于该时刻的下一次开盘"""
+        t = self._ns(when if when is not None else pd.Timestamp.now(tz=self.tz))
+        k = np.searchsorted(self.opens, t, side='left')
+        if k >= len(self.opens):
+            raise ValueError("Query runs past the end of the trading calendar, extend calendar.end_year")
+        return self._local(self.opens[k])
+
+    def next_close(self, when: DateLike = None) -> pd.Timestamp:
+        """不早于该时刻的下一次收盘"""
+        t = self._ns(when if when is not None else pd.Timestamp.now(tz=self.tz))
+        k = np.searchsorted(self.closes, t, side='left')
+        if k >= len(self.closes):
+            raise ValueError("Query runs past the end of the trading calendar, extend calendar.end_year")
+        return self._local(self.closes[k])
+
+    def previous_close(self, when: DateLike = None) -> pd.Timestamp:
+        """早于该时刻的最近一次收盘"""
+        t = self._ns(when if when is not None else pd.Timestamp.now(tz=self.tz))
+        k = np.searchsorted(self.closes, t, side='left') - 1
+        if k < 0:
+            raise ValueError("Query runs before the start of the trading calendar, extend calendar.start_year")
+        return self._local(self.closes[k])
+
+    # ---------- 年化 ----------
+
+    def sessions_per_year(self, start: DateLike = None, end: DateLike = None) -> float:
+        """start / end 所在各自然年的平均交易日数 (年化夏普等使用)"""
+        first = pd.Timestamp(start).year if start is not None else self.start_year
+        last = pd.Timestamp(end).year if end is not None else self.end_year
+        first, last = max(first, self.start_year), min(last, self.end_year)
+        if first > last:
+            return float(DEFAULT_PERIODS_PER_YEAR)
+        years = self.sessions.astype('datetime64[Y]').astype(np.int64) + 1970
+        lo, hi = np.searchsorted(years, first, side='left'), np.searchsorted(years, last, side='right')
+        return (hi - lo) / (last - first + 1)
+
+@lru_cache(maxsize=8)
+def _cached(items: Tuple) -> TradingCalendar:
+    return TradingCalendar({"calendar": {k: list(v) if isinstance(v, tuple) else v for k, v in items}})
+
+def get_calendar(config: Dict[str, Any] = None) -> TradingCalendar:
+    """按 config.calendar 取共享的日历实例 (同一配置只计算一次)"""
+    conf = ((config or {}).get('calendar', {}) or {})
+    return _cached(tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in conf.items())))
+
+def periods_per_year(start: DateLike = None, end: DateLike = None, config: Dict[str, Any] = None) -> float:
+    """日K收益的年化系数: 回测区间内每年的平均交易日数，超出日历范围时为 252"""
+    try:
+        return get_calendar(config).sessions_per_year(start, end)
+    except (ValueError, TypeError):
+        return float(DEFAULT_PERIODS_PER_YEAR)